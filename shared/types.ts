@@ -97,6 +97,50 @@ export interface FileAnalysisResult {
   audio_present: boolean;
 }
 
+// SlideCacheReport interface
+export interface SlideCacheReport {
+  hits: number;
+  misses: number;
+  hit_rate: number;
+  structural: number;
+}
+
+// VisionUsageReport interface
+export interface VisionUsageReport {
+  mode: string;
+  requests: number;
+  slides: number;
+  prompt_tokens: number;
+  completion_tokens: number;
+  seconds: number;
+  tokens_per_slide: number;
+  seconds_per_slide: number;
+}
+
+// StageTiming interface
+export interface StageTiming {
+  stage: string;
+  seconds: number;
+  count: number;
+}
+
+// CheckRun interface
+export interface CheckRun {
+  name: string;
+  cost: "cheap" | "io" | "render" | "model";
+  status: "passed" | "failed" | "skipped";
+  message?: string;
+}
+
+// PromptCheck interface
+export interface PromptCheck {
+  name: string;
+  prompt: string;
+  scope: "every_slide" | "any_slide";
+  depends_on: string[];
+  enabled: boolean;
+}
+
 // Status interface
 export interface Status {
   all_tests_passed: boolean;
@@ -112,6 +156,52 @@ export interface AdminInfo {
   total_submissions: number;
   total_errors?: number;
   decks_to_merge: number;
+  decks_remaining?: number;
+  status_counts?: { [status: string]: number };
+  check_failures?: { [check: string]: number };
+}
+
+// AdminSubmission interface
+export interface AdminSubmission {
+  id: string;
+  submitter?: string;
+  filename?: string;
+  status: string;
+  errors: string[];
+}
+
+// PreflightResult interface
+export interface PreflightResult {
+  passed: boolean;
+  format_check: FormatCheck;
+  size_check?: SizeCheck;
+  slide_count_check?: SlideCountCheck;
+  file_analysis?: FileAnalysisResult;
+  message?: string;
+}
+
+// JobStatus interface
+export interface JobStatus {
+  processing_id: string;
+  status: "queued" | "running" | "completed" | "failed";
+  total_slides?: number;
+  slides_done: number;
+  error?: string;
+}
+
+// BulkDeckStatus interface
+export interface BulkDeckStatus extends JobStatus {
+  source: string;
+}
+
+// BulkBatchStatus interface
+export interface BulkBatchStatus {
+  batch_id: string;
+  total_decks: number;
+  status_counts: { [status: string]: number };
+  total_slides: number;
+  slides_done: number;
+  decks: BulkDeckStatus[];
 }
 
 // SlideInfo interface
@@ -120,6 +210,24 @@ export interface SlideInfo {
   image_url: string;
 }
 
+// SpriteOffset interface
+export interface SpriteOffset {
+  slide_number: number;
+  x: number;
+  y: number;
+  width: number;
+  height: number;
+}
+
+// SpriteSheet interface
+export interface SpriteSheet {
+  image_url: string;
+  width: number;
+  height: number;
+  columns: number;
+  slides: SpriteOffset[];
+}
+
 // AnalysisResult interface
 export interface AnalysisResult {
   submission_id?: string;
@@ -132,4 +240,10 @@ export interface AnalysisResult {
   admin_info?: AdminInfo;
   slides: SlideInfo[];
   processing_id: string;
+  slide_cache?: SlideCacheReport;
+  vision_usage?: VisionUsageReport[];
+  timings?: StageTiming[];
+  checks?: CheckRun[];
+  skipped_stages?: string[];
+  rendered_slides?: number;
 }
@@ -1,32 +1,179 @@
 # app/logging_config.py
 
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 
+from app.metrics import metrics
 
-def setup_logging():
-    logger = logging.getLogger("slide_analyzer")
-    # Set to DEBUG for development, INFO for production
-    logger.setLevel(logging.DEBUG)
+LOG_FILE = os.getenv("LOG_FILE", "slide_analyzer.log")
+# DEBUG for development, INFO for production
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Longer messages are cut, so logging a whole response or slide list
+# cannot cost megabytes of formatting and I/O
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "2000"))
+# Records waiting for the listener thread; past this they are dropped
+# rather than blocking the event loop
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+LOGS_DROPPED = metrics.counter(
+    "slide_analyzer_log_records_dropped_total",
+    "Log records dropped because the logging queue was full")
+
+# The deck being processed by the current task; copied into every record
+processing_id_var: ContextVar[Optional[str]] = ContextVar(
+    "processing_id", default=None)
+
+# Attributes of every LogRecord; any others were passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message", "asctime", "processing_id", "taskName"}
+
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+_queue_handler: Optional[QueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def truncate(text: str, limit: int = None) -> str:
+    limit = LOG_MAX_MESSAGE_CHARS if limit is None else limit
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more characters]"
+
+
+@contextmanager
+def bind_processing_id(processing_id: str):
+    """
+    Tag the records logged by the body, and by the tasks and threads it
+    starts, with `processing_id`.
+    """
+    token = processing_id_var.set(processing_id)
+    try:
+        yield
+    finally:
+        processing_id_var.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, message, the
+    processing id if any, fields passed with extra= and the traceback.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(
+                record.created, timezone.utc).isoformat(
+                    timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "processing_id", None):
+            entry["processing_id"] = record.processing_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=lambda value: truncate(str(value)))
 
-    # Create a file handler that logs debug and higher level messages
-    handler = RotatingFileHandler(
-        "slide_analyzer.log", maxBytes=5*1024*1024, backupCount=2)  # 5 MB per file
-    handler.setLevel(logging.DEBUG)
 
-    # Create a console handler for outputting logs to the console
-    console_handler = logging.StreamHandler()
-    # Show INFO level and above in console
-    console_handler.setLevel(logging.INFO)
+class _ContextQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread unformatted, so the caller
+    pays only for a queue put; the processing id is read here, in the
+    caller's context, since the listener thread has none.
+    """
 
-    # Create a formatter and set it for both handlers
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if getattr(record, "processing_id", None) is None:
+            record.processing_id = processing_id_var.get()
+        return record
 
-    # Add the handlers to the logger
-    logger.addHandler(handler)
-    logger.addHandler(console_handler)
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOGS_DROPPED.inc()
 
+
+class _TruncatingQueueListener(QueueListener):
+    """
+    Formats each record's message once, in the listener thread, and cuts
+    it to LOG_MAX_MESSAGE_CHARS before any handler sees it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = truncate(record.getMessage())
+        record.args = None
+        return record
+
+
+def setup_logging() -> logging.Logger:
+    """
+    Route the "slide_analyzer" logger through a queue to a listener
+    thread that writes JSON lines to LOG_FILE and text to the console.
+
+    Safe to call more than once: the pipeline is installed once per
+    process (again in a forked child, whose listener thread is gone).
+    Arguments of %-style calls are formatted in the listener thread, so
+    pass values that will not change after the call.
+    """
+    global _listener, _listener_pid, _queue_handler
+    logger = logging.getLogger("slide_analyzer")
+    with _setup_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return logger
+        if _queue_handler is not None:
+            logger.removeHandler(_queue_handler)
+
+        file_handler = RotatingFileHandler(
+            LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=2)  # 5 MB
+        file_handler.setLevel(LOG_LEVEL)
+        file_handler.setFormatter(JsonFormatter())
+
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+        records = queue.Queue(LOG_QUEUE_SIZE)
+        _queue_handler = _ContextQueueHandler(records)
+        _listener = _TruncatingQueueListener(
+            records, file_handler, console_handler,
+            respect_handler_level=True)
+        _listener_pid = os.getpid()
+        logger.setLevel(LOG_LEVEL)
+        logger.addHandler(_queue_handler)
+        # Handlers on the root logger would format on the caller's thread
+        logger.propagate = False
+        _listener.start()
+    atexit.register(shutdown_logging)
     return logger
+
+
+def shutdown_logging():
+    """
+    Write out the queued records, stop the listener and close the files.
+    """
+    global _listener, _listener_pid, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        logger = logging.getLogger("slide_analyzer")
+        logger.removeHandler(_queue_handler)
+        logger.propagate = True
+        if _listener_pid == os.getpid():
+            _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = _listener_pid = _queue_handler = None
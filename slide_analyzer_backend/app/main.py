@@ -3,8 +3,6 @@ from dotenv import load_dotenv
 import os
 from fastapi import FastAPI, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import slide_analysis
-from app.logging_config import setup_logging
 from fastapi.staticfiles import StaticFiles
 
 # Get the directory of the current file
@@ -17,7 +15,18 @@ env_path = os.path.join(project_root, '.env')
 # Load the .env file before any other imports
 load_dotenv(dotenv_path=env_path, verbose=True)
 
-# Now import other modules that depend on the environment variables
+# Now import other modules that depend on the environment variables: their
+# settings are read from os.environ when they are imported
+from app.routers import slide_analysis, admin, metrics
+from app.logging_config import setup_logging
+from app.utils.probabilistic_checks import close_openai_client
+from app.services.job_queue import job_queue
+from app.services.registry import registry
+from app.services.render_pool import shutdown_render_pool
+from app.services.pptx_converter import (ConversionError,
+                                         PPTX_CONVERTER_MODE, converter_pool,
+                                         check_converter_mode)
+from app.services.http_client import close_http_client
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -36,6 +45,9 @@ app.add_middleware(
 
 # Include routers
 app.include_router(slide_analysis.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+# Served at the root, where Prometheus scrapes by default
+app.include_router(metrics.router)
 
 # app.mount("/", StaticFiles(directory="../slide_analyzer_frontend/out", html=True), name="frontend")
 
@@ -45,10 +57,20 @@ app.include_router(slide_analysis.router, prefix="/api")
 @app.on_event("startup")
 async def startup_event():
     # Initialize any resources here
-    pass
+    # Jobs only live in memory; those of a previous run are gone
+    registry.fail_orphaned("Processing was interrupted by a server restart.")
+    job_queue.start()
+    try:
+        check_converter_mode(PPTX_CONVERTER_MODE)
+    except ConversionError as e:
+        logger.error("PPTX and Keynote decks cannot be converted: %s", e)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     # Clean up resources here
-    pass
+    await job_queue.stop()
+    shutdown_render_pool()
+    converter_pool.shutdown()
+    await close_openai_client()
+    await close_http_client()
@@ -0,0 +1,271 @@
+# app/metrics.py
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seconds; covers everything from a cache lookup to a slow model call
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        value = (str(value).replace("\\", "\\\\").replace('"', '\\"')
+                 .replace("\n", "\\n"))
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, dict(zip(self.label_names, key)), value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}",
+                 f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} "
+                         f"{_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """
+        Count the body as in progress while it runs.
+        """
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(),
+                 buckets=STAGE_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count))
+                     for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.label_names, key))
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield (f"{self.name}_bucket",
+                       dict(labels, le=_format_value(bound)), bucket_count)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process in the Prometheus text exposition format.
+
+    Counters, gauges and histograms are updated where things happen;
+    collectors are called at scrape time for values other components
+    already keep (queue depth, cache statistics) and return
+    (name, kind, help, [(labels, value)]) families.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labels=()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(),
+                  buckets=STAGE_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def collector(self, function: Callable):
+        self._collectors.append(function)
+        return function
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} "
+                                 f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "slide_analyzer_stage_seconds",
+    "Time spent in each processing stage", labels=("stage",))
+DECKS = metrics.counter(
+    "slide_analyzer_decks_total", "Decks processed, by format and outcome",
+    labels=("format", "outcome"))
+MODEL_CALLS = metrics.counter(
+    "slide_analyzer_model_calls_total",
+    "Vision model requests, by outcome", labels=("outcome",))
+MODEL_CALLS_IN_FLIGHT = metrics.gauge(
+    "slide_analyzer_model_calls_in_flight",
+    "Vision model requests currently awaiting a response")
+MODEL_TOKENS = metrics.counter(
+    "slide_analyzer_model_tokens_total",
+    "Tokens used by vision model requests", labels=("kind",))
+SLIDES = metrics.counter(
+    "slide_analyzer_slides_total",
+    "Slides analyzed, by how they were answered", labels=("source",))
+
+
+class StageTimings:
+    """
+    Seconds spent per stage while processing one deck. Stages that run
+    many times (model calls, per-page rasterization) are summed, so with
+    concurrency their total can exceed the deck's wall-clock time.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self._stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def report(self) -> List[dict]:
+        with self._lock:
+            return [{"stage": stage, "seconds": round(seconds, 4),
+                     "count": count}
+                    for stage, (seconds, count) in self._stages.items()]
+
+
+_stage_timings: ContextVar[Optional[StageTimings]] = ContextVar(
+    "stage_timings", default=None)
+
+
+def record_stage(stage: str, seconds: float):
+    """
+    Record a stage duration in the stage histogram and in the timings of
+    the deck being processed, if any.
+    """
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time the body as `stage`, whether it finishes or raises.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+async def timed(stage: str, awaitable):
+    """
+    Await `awaitable` inside a span; for stages run with asyncio.gather.
+    """
+    with span(stage):
+        return await awaitable
+
+
+@contextmanager
+def stage_timings():
+    """
+    Collect the spans of the body, including those of tasks and threads it
+    starts, into a new StageTimings.
+    """
+    timings = StageTimings()
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
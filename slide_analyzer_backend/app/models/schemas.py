@@ -1,6 +1,6 @@
 from __future__ import annotations
 from pydantic import BaseModel, HttpUrl, EmailStr, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
 
 class Submitter(BaseModel):
@@ -78,6 +78,51 @@ class ProbabilisticCheckResult(BaseModel):
     slide_analyses: List[SlideAnalysis]
 
 
+class SlideCacheReport(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    # Slides whose structural fields came from the text layer
+    structural: int = 0
+
+
+class VisionUsageReport(BaseModel):
+    mode: str  # "single" or "batched"
+    requests: int
+    slides: int
+    prompt_tokens: int
+    completion_tokens: int
+    seconds: float
+    tokens_per_slide: float
+    seconds_per_slide: float
+
+
+class StageTiming(BaseModel):
+    stage: str
+    seconds: float  # summed over every time the stage ran
+    count: int
+
+
+class CheckRun(BaseModel):
+    name: str
+    cost: str  # "cheap", "io", "render" or "model"
+    status: str  # "passed", "failed" or "skipped"
+    message: Optional[str] = None
+
+
+class PromptCheckDefinition(BaseModel):
+    # Asked of every slide; the model answers whether the slide passes
+    prompt: str = Field(min_length=1)
+    # "every_slide" must all pass, or "any_slide" needs one that does
+    scope: Literal["every_slide", "any_slide"] = "every_slide"
+    depends_on: List[str] = []
+    enabled: bool = True
+
+
+class PromptCheck(PromptCheckDefinition):
+    name: str
+
+
 class Status(BaseModel):
     all_tests_passed: bool
     submission_allowed: bool
@@ -91,6 +136,17 @@ class AdminInfo(BaseModel):
     total_submissions: int
     total_errors: Optional[int] = None
     decks_to_merge: int
+    decks_remaining: Optional[int] = None
+    status_counts: Optional[Dict[str, int]] = None
+    check_failures: Optional[Dict[str, int]] = None
+
+
+class AdminSubmission(BaseModel):
+    id: str
+    submitter: Optional[str] = None
+    filename: Optional[str] = None
+    status: str
+    errors: List[str] = []
 
 
 class AnalysisRequest(BaseModel):
@@ -109,8 +165,66 @@ class AnalysisResponse(BaseModel):
     admin_info: Optional[AdminInfo] = None
     slides: Optional[List[SlideInfo]] = None  # Assuming slides is optional
     processing_id: str  # Add this line
+    slide_cache: Optional[SlideCacheReport] = None
+    vision_usage: Optional[List[VisionUsageReport]] = None
+    timings: Optional[List[StageTiming]] = None
+    checks: Optional[List[CheckRun]] = None
+    # Stages not run because a gating check failed
+    skipped_stages: Optional[List[str]] = None
+    # Slides rendered to images; LibreOffice leaves out hidden PPTX and
+    # Keynote slides, which number_of_slides counts
+    rendered_slides: Optional[int] = None
+
+
+class PreflightResponse(BaseModel):
+    passed: bool
+    format_check: FormatCheck
+    # None when the upload was refused before its size was known
+    size_check: Optional[SizeCheck] = None
+    # None when the slides could not be counted
+    slide_count_check: Optional[SlideCountCheck] = None
+    # None past the slide limit, where fonts and media are not read
+    file_analysis: Optional[FileAnalysisResult] = None
+    message: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    processing_id: str
+    status: str
+    total_slides: Optional[int] = None
+    slides_done: int = 0
+    error: Optional[str] = None
+
+
+class BulkDeckStatus(JobStatus):
+    source: str  # Archive member name or URL
+
+
+class BulkBatchStatus(BaseModel):
+    batch_id: str
+    total_decks: int
+    status_counts: Dict[str, int]
+    total_slides: int = 0
+    slides_done: int = 0
+    decks: List[BulkDeckStatus]
 
 
 class SlideInfo(BaseModel):
     slide_number: int
     image_url: str
+
+
+class SpriteOffset(BaseModel):
+    slide_number: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class SpriteSheet(BaseModel):
+    image_url: str
+    width: int
+    height: int
+    columns: int
+    slides: List[SpriteOffset]
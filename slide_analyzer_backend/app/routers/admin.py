@@ -0,0 +1,95 @@
+# app/routers/admin.py
+
+import logging
+from typing import Dict, List
+
+from fastapi import APIRouter, HTTPException, Path, Query
+
+from app.models.schemas import (AdminInfo, AdminSubmission, PromptCheck,
+                                PromptCheckDefinition)
+from app.services.check_engine import CheckGraphError
+from app.services.registry import registry
+from app.services.slide_processor import validate_prompt_checks
+
+logger = logging.getLogger("slide_analyzer")
+
+router = APIRouter(prefix="/admin")
+
+
+@router.get("/summary", response_model=AdminInfo)
+async def get_admin_summary():
+    """
+    How far the submission round is from complete, from counters kept up
+    to date as jobs finish.
+    """
+    return registry.admin_summary()
+
+
+@router.get("/submissions/", response_model=List[AdminSubmission])
+async def list_submissions(limit: int = Query(100, ge=1, le=1000),
+                           offset: int = Query(0, ge=0)):
+    return [
+        {
+            "id": submission["processing_id"],
+            "submitter": submission["submitter_name"]
+            or submission["submitter_email"],
+            "filename": submission["original_filename"],
+            "status": submission["status"],
+            "errors": submission["failed_checks"]
+            + ([submission["error"]] if submission["error"] else []),
+        }
+        for submission in registry.list_submissions(limit, offset)
+    ]
+
+
+@router.get("/check-failures", response_model=Dict[str, int])
+async def get_check_failures():
+    return registry.admin_summary()["check_failures"]
+
+
+@router.get("/check-failures/{check_name}")
+async def get_failing_submissions(check_name: str,
+                                  limit: int = Query(100, ge=1, le=1000),
+                                  offset: int = Query(0, ge=0)):
+    """
+    Latest submissions of the decks failing one check, newest first.
+    """
+    return registry.failing_submissions(check_name, limit, offset)
+
+
+@router.get("/prompt-checks", response_model=List[PromptCheck])
+async def list_prompt_checks():
+    return registry.prompt_checks()
+
+
+@router.put("/prompt-checks/{name}", response_model=PromptCheck)
+async def put_prompt_check(definition: PromptCheckDefinition,
+                           name: str = Path(pattern=r"^[a-z][a-z0-9_]*$",
+                                            max_length=64)):
+    """
+    Create or replace a check the vision model answers for every slide.
+    It runs once the slides are rendered, after the checks it depends on.
+    """
+    check = PromptCheck(name=name, **definition.model_dump())
+    others = [other for other in registry.prompt_checks(enabled_only=True)
+              if other["name"] != name]
+    try:
+        validate_prompt_checks(
+            others + ([check.model_dump()] if check.enabled else []))
+    except CheckGraphError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    registry.put_prompt_check(name, check.prompt, check.scope,
+                              check.depends_on, check.enabled)
+    return check
+
+
+@router.delete("/prompt-checks/{name}", status_code=204)
+async def delete_prompt_check(name: str):
+    dependents = [check["name"] for check in registry.prompt_checks()
+                  if name in check["depends_on"]]
+    if dependents:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Prompt checks {', '.join(dependents)} depend on {name}")
+    if not registry.delete_prompt_check(name):
+        raise HTTPException(status_code=404, detail="Prompt check not found")
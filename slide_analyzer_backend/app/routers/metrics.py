@@ -0,0 +1,50 @@
+# app/routers/metrics.py
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.metrics import metrics
+from app.services.analysis_cache import analysis_cache
+from app.services.http_client import http_fetcher
+from app.services.job_queue import job_queue, RUNNING
+from app.services.slide_processor import get_slide_cache
+from app.services.thumbnail_store import thumbnail_cache
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@metrics.collector
+def collect_queue():
+    running = sum(1 for job in list(job_queue.jobs.values())
+                  if job.status == RUNNING)
+    return [
+        ("slide_analyzer_queue_depth", "gauge",
+         "Jobs waiting for a worker", [({}, job_queue.depth)]),
+        ("slide_analyzer_jobs_running", "gauge",
+         "Jobs being processed", [({}, running)]),
+    ]
+
+
+@metrics.collector
+def collect_caches():
+    lookups = []
+    for cache, stats in (("analysis", analysis_cache.stats()),
+                         ("slide", get_slide_cache().stats()),
+                         ("thumbnail", thumbnail_cache.stats())):
+        lookups.append(({"cache": cache, "result": "hit"}, stats["hits"]))
+        lookups.append(({"cache": cache, "result": "miss"},
+                        stats["misses"]))
+    http = http_fetcher.stats()
+    lookups.append(({"cache": "http", "result": "hit"}, http["cache_hits"]))
+    lookups.append(({"cache": "http", "result": "not_modified"},
+                    http["not_modified"]))
+    return [("slide_analyzer_cache_lookups_total", "counter",
+             "Cache lookups, by cache and result", lookups)]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(),
+                             media_type=PROMETHEUS_CONTENT_TYPE)
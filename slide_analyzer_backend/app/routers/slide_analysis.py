@@ -1,24 +1,114 @@
 # app/routers/slide_analysis.py
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
-from app.services.slide_processor import process_slide_deck, get_slide_image_path
+import asyncio
+from typing import Optional
+from fastapi import (APIRouter, UploadFile, File, Form, HTTPException,
+                     Request, Response)
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from app.services.slide_processor import (process_slide_deck, is_url,
+                                          slide_image_path,
+                                          get_slide_cache,
+                                          rendered_slide_count)
+from app.services.thumbnail_store import (thumbnail_cache, get_sprite_sheet,
+                                          sprite_paths, etag_matches,
+                                          IMMUTABLE_CACHE_CONTROL,
+                                          REVALIDATE_CACHE_CONTROL)
+from app.services.upload_storage import save_upload_stream, UploadRejected
+from app.services.bulk_ingest import (ArchiveMemberUpload, archive_decks,
+                                      batch_progress, parse_url_list,
+                                      save_archive_stream, BULK_MAX_DECKS)
+from app.services.analysis_cache import analysis_cache
+from app.services.job_queue import job_queue, COMPLETED, FAILED
+from app.services.registry import registry
+from app.services.http_client import http_fetcher
+from app.utils.render_profiles import RENDER_PROFILES
+from app.utils.deterministic_checks import format_check
+from app.utils.preflight import preflight_deck, PREFLIGHT_SIZE_LIMIT_MB
+from app.metrics import span
 # Import the response model
-from app.models.schemas import AnalysisResponse, SlideInfo
+from app.models.schemas import (AnalysisResponse, SlideInfo, JobStatus,
+                                SpriteSheet, BulkBatchStatus,
+                                PreflightResponse)
 import os
+import json
 import logging
-import traceback
 import uuid
+import zipfile
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = logging.getLogger("slide_analyzer")
 
 router = APIRouter()
 
 
-@router.post("/process-slide-deck", response_model=AnalysisResponse)
-async def process_slide_deck_endpoint(deck_format: str = Form(...),
-                                      file: UploadFile = File(...)):
+def thumbnail_url(processing_id: str, slide_number: int) -> str:
+    """
+    Content-addressed thumbnail URL; the version changes with the image.
+    """
+    url = f"/api/slide-thumbnails/{processing_id}/{slide_number}"
+    image = thumbnail_cache.get(slide_image_path(processing_id,
+                                                 slide_number))
+    return f"{url}?v={image[1]}" if image else url
+
+
+def cached_image_response(request: Request, image, media_type: str,
+                          version: Optional[str]) -> Response:
+    """
+    Serve image bytes with an ETag, answering matching conditional
+    requests with 304. Requests for the current version may be cached
+    forever.
+    """
+    data, digest = image
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL
+        if version == digest else REVALIDATE_CACHE_CONTROL,
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=media_type, headers=headers)
+
+
+@router.post("/preflight", response_model=PreflightResponse)
+async def preflight_endpoint(file: UploadFile = File(...)):
+    """
+    The format, size and slide count checks of a deck, with its fonts and
+    media, before it is submitted. They are read from the file's headers
+    and the deck is not rendered, queued or kept, so a deck that can never
+    pass is turned away before any expensive check is queued.
+    """
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    file_location = os.path.join("uploads", "preflight",
+                                 f"{uuid.uuid4()}{extension}")
+    try:
+        await save_upload_stream(file, file_location,
+                                 size_limit_mb=PREFLIGHT_SIZE_LIMIT_MB)
+    except UploadRejected as e:
+        # Refused while streaming: report the check that failed
+        if 'size_within_limit' in e.check:
+            return PreflightResponse(
+                passed=False, format_check=format_check(file.filename or ""),
+                size_check=e.check)
+        return PreflightResponse(passed=False, format_check={
+            "accepted_format": False, "file_type": e.check['file_type'],
+            "message": e.message})
+
+    try:
+        with span("preflight"):
+            return await asyncio.to_thread(preflight_deck, file_location,
+                                           file.filename)
+    finally:
+        os.remove(file_location)
+
+
+@router.post("/process-slide-deck", response_model=JobStatus,
+             status_code=202)
+async def process_slide_deck_endpoint(
+        deck_format: str = Form(...),
+        file: UploadFile = File(...),
+        submitter_name: Optional[str] = Form(None),
+        submitter_email: Optional[str] = Form(None),
+        include_timings: bool = Form(False)):
 
     # Generate a unique processing ID
     processing_id = str(uuid.uuid4())
@@ -26,85 +116,363 @@ async def process_slide_deck_endpoint(deck_format: str = Form(...),
     # Create uploads directory if it doesn't exist
     uploads_dir = "uploads"
     os.makedirs(uploads_dir, exist_ok=True)
-    file_location = os.path.join(uploads_dir, file.filename)
+    # Stored under the processing ID so identically named uploads never
+    # overwrite each other
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    file_location = os.path.join(uploads_dir, f"{processing_id}{extension}")
 
-    # Save the uploaded file
+    # Stream the uploaded file to disk, rejecting it early if it fails the
+    # size or format checks
     try:
-        logger.info(f"Saving uploaded file to {file_location}")
-        with open(file_location, "wb") as f:
-            contents = await file.read()
-            f.write(contents)
-        logger.info(f"File saved successfully: {file_location}")
+        logger.info("Saving uploaded file %s to %s", file.filename,
+                    file_location)
+        upload = await save_upload_stream(file, file_location)
+        logger.info("File saved successfully: %s (sha256=%s)", file_location,
+                    upload['sha256'])
+    except UploadRejected as e:
+        logger.warning("Upload rejected: %s", e.message)
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
-        logger.error(f"Error saving uploaded file: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error saving uploaded file: %s", e)
         raise HTTPException(status_code=500,
                             detail="Failed to save the uploaded file.")
 
-    # Process the slide deck
-    try:
-        logger.info(f"Starting to process slide deck: {file_location}")
-        # Pass deck_format here
-        result = await process_slide_deck(file_location, processing_id, deck_format)
+    registry.create_submission(processing_id, file_location,
+                               original_filename=file.filename,
+                               deck_format=deck_format,
+                               content_hash=upload['sha256'],
+                               size_bytes=upload['size_bytes'],
+                               submitter_name=submitter_name,
+                               submitter_email=submitter_email)
+
+    job = submit_deck_job(processing_id, file_location, deck_format,
+                          upload['sha256'], include_timings)
+    return job.to_status()
+
+
+def submit_deck_job(processing_id: str, input_path: str, deck_format: str,
+                    content_hash: Optional[str] = None,
+                    include_timings: bool = False):
+    """
+    Queue a registered submission for processing in the background;
+    progress is streamed from /jobs/{processing_id}/events. With
+    include_timings the result carries its per-stage timing breakdown.
+    """
+    async def run(job):
+        logger.info("Starting to process slide deck: %s", input_path)
+        registry.start(processing_id)
+        try:
+            result = await process_slide_deck(
+                input_path, processing_id, deck_format, content_hash,
+                on_progress=job.publish, include_timings=include_timings)
+        except Exception as e:
+            registry.fail(processing_id, str(e))
+            raise
         if result is None:
             logger.error("Processing failed, result is None")
-            raise HTTPException(status_code=500, detail="Processing failed.")
+            registry.fail(processing_id, "Processing failed.")
+            return None
 
         # Update the slides with the correct image URLs
         result.slides = [
             SlideInfo(slide_number=i + 1,
-                      image_url=f"/api/slide-thumbnails/{processing_id}/{i+1}")
-            for i in range(result.file_analysis.number_of_slides)
+                      image_url=thumbnail_url(processing_id, i + 1))
+            for i in range(rendered_slide_count(result))
         ]
-
-        logger.info(f"Slides with image URLs: {result.slides}")
+        registry.complete(processing_id, result)
         logger.info("Slide deck processed successfully")
-        logger.info(f"Result: {result}")
         return result
-    except Exception as e:
-        logger.error(f"Error processing slide deck: {e}")
-        logger.error(traceback.format_exc())
+
+    return job_queue.submit(processing_id, run)
+
+
+def registry_status(submission: dict) -> dict:
+    done = submission["status"] == COMPLETED
+    return {
+        "processing_id": submission["processing_id"],
+        "status": submission["status"],
+        "total_slides": submission["slide_count"],
+        "slides_done": (submission["slide_count"] or 0) if done else 0,
+        "error": submission["error"],
+    }
+
+
+def get_job_or_404(processing_id: str):
+    job = job_queue.get(processing_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{processing_id}", response_model=JobStatus)
+async def get_job_status(processing_id: str):
+    job = job_queue.get(processing_id)
+    if job is not None:
+        return job.to_status()
+    # Jobs run by another worker, or pruned from memory, are in the registry
+    submission = registry.get(processing_id)
+    if submission is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return registry_status(submission)
+
+
+@router.get("/jobs/{processing_id}/result", response_model=AnalysisResponse)
+async def get_job_result(processing_id: str):
+    job = job_queue.get(processing_id)
+    if job is not None:
+        status, result = job.status, job.result
+        done = job.done
+    else:
+        submission = registry.get(processing_id)
+        if submission is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        status = submission["status"]
+        done = status in (COMPLETED, FAILED)
+        result = (registry.get_result(processing_id)
+                  if status == COMPLETED else None)
+    if status == FAILED:
         raise HTTPException(status_code=500,
                             detail="Failed to process the slide deck.")
+    if not done:
+        raise HTTPException(status_code=409,
+                            detail="Slide deck is still being processed.")
+    return result
+
+
+@router.get("/jobs/{processing_id}/events")
+async def stream_job_events(processing_id: str):
+    """
+    Server-Sent Events stream of a job's progress. Past events are replayed
+    first, so clients can connect at any time.
+    """
+    job = get_job_or_404(processing_id)
+
+    async def event_stream():
+        async for event in job.subscribe():
+            yield (f"event: {event['event']}\n"
+                   f"data: {json.dumps(event['data'])}\n\n")
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(event_stream(),
+                             media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache",
+                                      "X-Accel-Buffering": "no"})
+
+
+async def ingest_archive_decks(archive: zipfile.ZipFile, members,
+                               submission_fields: dict):
+    """
+    Decompress each deck of an archive to its own upload file, one chunk at
+    a time, and queue it as soon as it is on disk.
+    """
+    for info in members:
+        processing_id = str(uuid.uuid4())
+        extension = os.path.splitext(info.filename)[1].lower()
+        deck_format = extension.lstrip(".")
+        file_location = os.path.join("uploads",
+                                     f"{processing_id}{extension}")
+        member = ArchiveMemberUpload(archive, info)
+        try:
+            upload = await save_upload_stream(member, file_location)
+        except UploadRejected as e:
+            error = e.message
+        except Exception as e:
+            logger.error("Error extracting %s: %s", info.filename, e)
+            error = "Failed to extract the deck from the archive."
+        else:
+            error = None
+        finally:
+            member.close()
+
+        if error is not None:
+            logger.warning("Archive member %s rejected: %s", info.filename,
+                           error)
+            registry.create_submission(processing_id, info.filename,
+                                       original_filename=info.filename,
+                                       deck_format=deck_format,
+                                       **submission_fields)
+            registry.fail(processing_id, error)
+            continue
+
+        registry.create_submission(processing_id, file_location,
+                                   original_filename=info.filename,
+                                   deck_format=deck_format,
+                                   content_hash=upload['sha256'],
+                                   size_bytes=upload['size_bytes'],
+                                   **submission_fields)
+        submit_deck_job(processing_id, file_location, deck_format,
+                        upload['sha256'])
+
+
+def batch_status(batch_id: str) -> dict:
+    decks = []
+    for submission in registry.batch_submissions(batch_id):
+        job = job_queue.get(submission["processing_id"])
+        status = (job.to_status() if job is not None
+                  else registry_status(submission))
+        status["source"] = (submission["original_filename"]
+                            or submission["file_path"])
+        decks.append(status)
+    return batch_progress(batch_id, decks)
+
+
+@router.post("/bulk-ingest", response_model=BulkBatchStatus,
+             status_code=202)
+async def bulk_ingest_endpoint(
+        file: Optional[UploadFile] = File(None),
+        urls: Optional[str] = Form(None),
+        submitter_name: Optional[str] = Form(None),
+        submitter_email: Optional[str] = Form(None)):
+    """
+    Queue many decks at once, from a zip archive of PDF/PPTX files, a list
+    of presentation URLs, or both. Every deck becomes its own job on the
+    shared worker pool, which bounds how many are processed at once; poll
+    /bulk-ingest/{batch_id} for their aggregate progress.
+    """
+    url_list = parse_url_list(urls or "")
+    if file is None and not url_list:
+        raise HTTPException(status_code=400,
+                            detail="Upload a zip archive or list URLs.")
+
+    batch_id = str(uuid.uuid4())
+    submission_fields = {"submitter_name": submitter_name,
+                         "submitter_email": submitter_email,
+                         "batch_id": batch_id}
+
+    archive_path = None
+    if file is not None:
+        # The archive is kept on disk and read member by member; it is
+        # never extracted as a whole or held in memory
+        archive_path = os.path.join("uploads", f"{batch_id}.zip")
+        try:
+            await save_archive_stream(file, archive_path)
+        except UploadRejected as e:
+            logger.warning("Archive rejected: %s", e.message)
+            raise HTTPException(status_code=e.status_code, detail=e.message)
+
+    try:
+        if archive_path is not None:
+            try:
+                archive = await asyncio.to_thread(zipfile.ZipFile,
+                                                  archive_path)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=415,
+                                    detail="Archive is not a valid zip file.")
+            with archive:
+                members = archive_decks(archive)
+                if len(members) + len(url_list) > BULK_MAX_DECKS:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"At most {BULK_MAX_DECKS} decks per batch.")
+                await ingest_archive_decks(archive, members,
+                                           submission_fields)
+        elif len(url_list) > BULK_MAX_DECKS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {BULK_MAX_DECKS} decks per batch.")
     finally:
-        # Note: We're not deleting the uploaded file immediately anymore
-        logger.info(f"Processed file: {file_location}")
+        if archive_path is not None and os.path.exists(archive_path):
+            os.remove(archive_path)
+
+    for url in url_list:
+        processing_id = str(uuid.uuid4())
+        registry.create_submission(processing_id, url, original_filename=url,
+                                   deck_format="url", **submission_fields)
+        if not is_url(url):
+            registry.fail(processing_id, "Not a valid URL.")
+            continue
+        submit_deck_job(processing_id, url, "url")
+
+    logger.info("Queued bulk batch %s", batch_id)
+    return batch_status(batch_id)
+
+
+@router.get("/bulk-ingest/{batch_id}", response_model=BulkBatchStatus)
+async def get_bulk_batch_status(batch_id: str):
+    status = batch_status(batch_id)
+    if not status["decks"]:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return status
 
 
 @router.get("/slide-images/{slide_number}")
 async def get_slide_image(slide_number: int):
-    # This assumes that the most recent processed file is the one we want
-    # You might need to implement a more robust way to track the current file
-    processed_files = [
-        f for f in os.listdir("uploads")
-        if f.endswith(".pptx") or f.endswith(".pdf")
-    ]
-    if not processed_files:
+    # Slide of the most recently submitted deck that finished processing
+    submission = registry.latest(COMPLETED)
+    if submission is None:
         raise HTTPException(status_code=404, detail="No processed files found")
 
-    latest_file = max(
-        processed_files,
-        key=lambda f: os.path.getctime(os.path.join("uploads", f)))
-    file_location = os.path.join("uploads", latest_file)
-
-    image_path = get_slide_image_path(file_location, slide_number)
+    image_path = slide_image_path(submission["processing_id"], slide_number)
     if not os.path.exists(image_path):
-        logger.warning(f"Slide image not found: {image_path}")
+        logger.warning("Slide image not found: %s", image_path)
         raise HTTPException(status_code=404, detail="Slide image not found")
 
-    logger.info(f"Returning slide image: {image_path}")
-    return FileResponse(image_path, media_type="image/png")
+    logger.info("Returning slide image: %s", image_path)
+    return FileResponse(image_path,
+                        media_type=RENDER_PROFILES['thumbnail'].media_type)
 
 
 @router.get("/slide-thumbnails/{processing_id}/{slide_number}")
-async def get_slide_thumbnail(processing_id: str, slide_number: int):
-    image_path = get_slide_image_path(processing_id, slide_number)
-    if not os.path.exists(image_path):
-        logger.warning(f"Slide thumbnail not found: {image_path}")
+async def get_slide_thumbnail(request: Request, processing_id: str,
+                              slide_number: int, v: Optional[str] = None):
+    image_path = slide_image_path(processing_id, slide_number)
+    image = thumbnail_cache.get(image_path)
+    if image is None:
+        logger.warning("Slide thumbnail not found: %s", image_path)
         raise HTTPException(status_code=404,
                             detail="Slide thumbnail not found")
-    logger.info(f"Returning slide thumbnail: {image_path}")
-    return FileResponse(image_path, media_type="image/png")
+    return cached_image_response(request, image,
+                                 RENDER_PROFILES['thumbnail'].media_type, v)
+
+
+@router.get("/slide-sprites/{processing_id}", response_model=SpriteSheet)
+async def get_slide_sprite_offsets(processing_id: str):
+    """
+    Offsets of every slide thumbnail within the deck's sprite sheet, which
+    is built on first request.
+    """
+    sprite = await asyncio.to_thread(get_sprite_sheet, processing_id)
+    if sprite is None:
+        raise HTTPException(status_code=404, detail="Slide deck not found")
+    return dict(sprite, image_url=(f"/api/slide-sprites/{processing_id}/"
+                                   f"image?v={sprite['digest']}"))
+
+
+@router.get("/slide-sprites/{processing_id}/image")
+async def get_slide_sprite_image(request: Request, processing_id: str,
+                                 v: Optional[str] = None):
+    sprite_path, _ = sprite_paths(processing_id)
+    if not os.path.exists(sprite_path):
+        await asyncio.to_thread(get_sprite_sheet, processing_id)
+    image = thumbnail_cache.get(sprite_path)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Sprite sheet not found")
+    return cached_image_response(request, image,
+                                 RENDER_PROFILES['thumbnail'].media_type, v)
+
+
+@router.get("/slide-previews/{processing_id}/{slide_number}")
+async def get_slide_preview(processing_id: str, slide_number: int):
+    if 'preview' not in RENDER_PROFILES:
+        raise HTTPException(status_code=404,
+                            detail="Full-resolution previews are disabled")
+    image_path = slide_image_path(processing_id, slide_number, 'preview')
+    if not os.path.exists(image_path):
+        logger.warning("Slide preview not found: %s", image_path)
+        raise HTTPException(status_code=404, detail="Slide preview not found")
+    logger.info("Returning slide preview: %s", image_path)
+    return FileResponse(image_path,
+                        media_type=RENDER_PROFILES['preview'].media_type)
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    return {
+        "analysis_cache": analysis_cache.stats(),
+        "slide_cache": get_slide_cache().stats(),
+        "thumbnail_cache": thumbnail_cache.stats(),
+        "http_cache": http_fetcher.stats(),
+    }
 
 
 @router.get("/")
@@ -0,0 +1,174 @@
+# app/services/analysis_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from app.models.schemas import AnalysisResponse
+
+logger = logging.getLogger("slide_analyzer")
+
+ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR",
+                               os.path.join("cache", "analysis"))
+ANALYSIS_CACHE_MAX_MB = float(os.getenv("ANALYSIS_CACHE_MAX_MB", "512"))
+ANALYSIS_CACHE_MAX_AGE_DAYS = float(
+    os.getenv("ANALYSIS_CACHE_MAX_AGE_DAYS", "30"))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Compute the SHA-256 of a file without reading it into memory at once.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def config_fingerprint(config: dict) -> str:
+    """
+    Hash a JSON-serializable description of the check configuration.
+    """
+    encoded = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Persistent on-disk cache of AnalysisResponse results.
+
+    Entries are keyed by the deck content hash plus a fingerprint of the
+    check configuration, so changing a limit or the prompt never serves a
+    stale result. The cache is trimmed back under max_size_mb by evicting
+    the least recently used entries, and entries older than max_age_days
+    are dropped. An entry's age is its file's modification time, set when
+    it is written; reads only move its access time, which orders eviction.
+    """
+
+    def __init__(self,
+                 cache_dir: str = ANALYSIS_CACHE_DIR,
+                 max_size_mb: float = ANALYSIS_CACHE_MAX_MB,
+                 max_age_days: float = ANALYSIS_CACHE_MAX_AGE_DAYS):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, content_hash: str, fingerprint: str) -> str:
+        return hashlib.sha256(
+            f"{content_hash}:{fingerprint}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Return the cached entry for key, or None on a miss.
+
+        The entry is a dict with the cached `response` and the
+        `processing_id` whose slide images it refers to.
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                modified = os.fstat(f.fileno()).st_mtime
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+
+        now = time.time()
+        if now - modified > self.max_age_seconds:
+            self._remove(path)
+            self._count("misses")
+            return None
+
+        # Mark the entry as recently used for eviction, keeping its age
+        try:
+            os.utime(path, (now, modified))
+        except OSError:
+            pass
+
+        self._count("hits")
+        entry["response"] = AnalysisResponse.model_validate(entry["response"])
+        return entry
+
+    def put(self, key: str, response: AnalysisResponse, processing_id: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = {
+            "processing_id": processing_id,
+            "response": response.model_dump(mode="json"),
+        }
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, self._entry_path(key))
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """
+        Drop expired entries, then the least recently used ones until the
+        cache fits in max_size_bytes.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        now = time.time()
+        entries = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(".json"):
+                    continue
+                stat = dir_entry.stat()
+                if now - stat.st_mtime > self.max_age_seconds:
+                    self._remove(dir_entry.path)
+                    self._count("evictions")
+                    continue
+                entries.append((stat.st_atime, stat.st_size, dir_entry.path))
+                total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            self._remove(path)
+            self._count("evictions")
+            total_size -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+analysis_cache = AnalysisCache()
@@ -0,0 +1,127 @@
+# app/services/bulk_ingest.py
+
+import asyncio
+import logging
+import os
+import tempfile
+import zipfile
+from typing import List
+
+from app.services.upload_storage import UploadRejected, UPLOAD_CHUNK_SIZE
+from app.utils.deterministic_checks import size_check
+
+logger = logging.getLogger("slide_analyzer")
+
+BULK_ARCHIVE_SIZE_LIMIT_MB = float(
+    os.getenv("BULK_ARCHIVE_SIZE_LIMIT_MB", "2048"))
+BULK_MAX_DECKS = int(os.getenv("BULK_MAX_DECKS", "500"))
+
+ZIP_MAGIC = b'PK\x03\x04'
+
+
+class ArchiveMemberUpload:
+    """
+    One archive member exposed like an UploadFile, so save_upload_stream
+    can decompress it to disk chunk by chunk with the usual size and format
+    checks.
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo):
+        self.filename = os.path.basename(info.filename)
+        self._archive = archive
+        self._info = info
+        self._file = None
+
+    async def read(self, size: int = -1) -> bytes:
+        if self._file is None:
+            self._file = await asyncio.to_thread(self._archive.open,
+                                                 self._info)
+        return await asyncio.to_thread(self._file.read, size)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+async def save_archive_stream(upload, destination_path: str,
+                              size_limit_mb: float =
+                              BULK_ARCHIVE_SIZE_LIMIT_MB,
+                              chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+    """
+    Stream an uploaded zip archive to disk, rejecting it as soon as it
+    exceeds the size limit or does not start like a zip file. Returns the
+    number of bytes written.
+    """
+    destination_dir = os.path.dirname(destination_path) or "."
+    os.makedirs(destination_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=destination_dir, suffix=".part")
+
+    size_limit_bytes = size_limit_mb * 1024 * 1024
+    size_bytes = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                if size_bytes == 0 and not chunk.startswith(ZIP_MAGIC):
+                    raise UploadRejected(415, "Archive is not a zip file.",
+                                         {"file_type": ".zip"})
+                size_bytes += len(chunk)
+                if size_bytes > size_limit_bytes:
+                    result = size_check(size_bytes / (1024 * 1024),
+                                        size_limit_mb)
+                    raise UploadRejected(413, result['message'], result)
+                await asyncio.to_thread(f.write, chunk)
+        os.replace(temp_path, destination_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size_bytes
+
+
+def archive_decks(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """
+    Members of an archive that could be decks, skipping directories and
+    the metadata macOS and editors add (__MACOSX/, dotfiles).
+    """
+    members = []
+    for info in archive.infolist():
+        name = os.path.basename(info.filename)
+        if (info.is_dir() or not name or name.startswith(".")
+                or info.filename.startswith("__MACOSX/")):
+            continue
+        members.append(info)
+    return members
+
+
+def parse_url_list(text: str) -> List[str]:
+    """
+    URLs separated by newlines, commas or spaces, in order, without
+    duplicates.
+    """
+    urls = []
+    for url in text.replace(",", " ").split():
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def batch_progress(batch_id: str, decks: List[dict]) -> dict:
+    """
+    Aggregate the per-deck job statuses of a batch.
+    """
+    status_counts = {}
+    for deck in decks:
+        status_counts[deck["status"]] = (
+            status_counts.get(deck["status"], 0) + 1)
+    return {
+        "batch_id": batch_id,
+        "total_decks": len(decks),
+        "status_counts": status_counts,
+        "total_slides": sum(deck["total_slides"] or 0 for deck in decks),
+        "slides_done": sum(deck["slides_done"] for deck in decks),
+        "decks": decks,
+    }
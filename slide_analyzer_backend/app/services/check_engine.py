@@ -0,0 +1,229 @@
+# app/services/check_engine.py
+
+import asyncio
+import inspect
+import logging
+import os
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.metrics import span
+
+logger = logging.getLogger("slide_analyzer")
+
+# Cost classes, cheapest first
+CHEAP = "cheap"    # in memory, or a stat call
+IO = "io"          # reads, parses or downloads the deck
+RENDER = "render"  # LibreOffice conversion and rasterization
+MODEL = "model"    # vision model requests
+COST_CLASSES = (CHEAP, IO, RENDER, MODEL)
+# Steps of these classes wait for every gating check, and do not run once
+# one has failed
+GATED_COSTS = (RENDER, MODEL)
+# Steps of a class running at once within one deck; other classes are
+# unbounded. Rendering and model calls are also bounded process-wide.
+COST_CONCURRENCY = {
+    RENDER: int(os.getenv("RENDER_STEP_CONCURRENCY", "1")),
+    MODEL: int(os.getenv("MODEL_STEP_CONCURRENCY", "2")),
+}
+
+PASSED = "passed"
+FAILED = "failed"
+DONE = "done"  # a step that is not a check
+SKIPPED = "skipped"
+
+
+class CheckGraphError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One node of a CheckGraph.
+
+    run(results) receives the results of the steps finished so far, by
+    name, and may return an awaitable. A step with `passed` is a check:
+    passed(result) decides its outcome. When a `gate` check fails, the
+    steps that depend on it and every step of a GATED_COSTS class that
+    has not started are skipped.
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+    cost: str = CHEAP
+    passed: Optional[Callable[[Any], bool]] = None
+    gate: bool = False
+
+    @property
+    def is_check(self) -> bool:
+        return self.passed is not None
+
+
+class GraphRun:
+    """
+    Outcome of a CheckGraph run: each step's status and result, and why
+    skipped steps were skipped.
+    """
+
+    def __init__(self, graph: "CheckGraph"):
+        self.graph = graph
+        self.results: Dict[str, Any] = {}
+        self.statuses: Dict[str, str] = {}
+        self.skip_reasons: Dict[str, str] = {}
+        self.failed_gate: Optional[str] = None
+
+    def skipped(self, name: str) -> bool:
+        return self.statuses.get(name) == SKIPPED
+
+    def skipped_stages(self) -> List[str]:
+        return [name for name in self.graph.order
+                if self.skipped(name)
+                and not self.graph.steps[name].is_check]
+
+    def check_report(self) -> List[dict]:
+        """
+        Status and message of every check, in graph order.
+        """
+        report = []
+        for name in self.graph.order:
+            step = self.graph.steps[name]
+            if not step.is_check:
+                continue
+            result = self.results.get(name)
+            if self.skipped(name):
+                message = f"Skipped because {self.skip_reasons[name]}."
+            elif isinstance(result, dict):
+                message = result.get("message")
+            else:
+                message = None
+            report.append({"name": name, "cost": step.cost,
+                           "status": self.statuses[name],
+                           "message": message})
+        return report
+
+
+class CheckGraph:
+    """
+    Checks and the stages they need, declared with their dependencies and
+    cost classes and run as a DAG: every step starts as soon as what it
+    depends on has finished, so independent steps run concurrently, and
+    rendering and model calls are never started for a deck that has
+    already failed a cheap gating check.
+    """
+
+    def __init__(self, steps: List[Step]):
+        self.steps: Dict[str, Step] = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise CheckGraphError(f"Duplicate step {step.name}")
+            if step.cost not in COST_CLASSES:
+                raise CheckGraphError(
+                    f"{step.name} has unknown cost class {step.cost}")
+            if step.gate and (not step.is_check
+                              or step.cost in GATED_COSTS):
+                raise CheckGraphError(
+                    f"{step.name} cannot gate: gates are checks cheaper "
+                    f"than {GATED_COSTS[0]}")
+            self.steps[step.name] = step
+        self.gates = [step.name for step in steps if step.gate]
+        for step in steps:
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise CheckGraphError(
+                        f"{step.name} depends on unknown step {dependency}")
+        self.order = self._topological_order()
+
+    def dependencies(self, step: Step) -> Tuple[str, ...]:
+        """
+        What `step` waits for: its own dependencies and, for expensive
+        steps, every gate.
+        """
+        if step.cost not in GATED_COSTS:
+            return step.depends_on
+        return step.depends_on + tuple(
+            gate for gate in self.gates if gate not in step.depends_on)
+
+    def _topological_order(self) -> List[str]:
+        order = []
+        state = {}  # name -> "visiting" or "done"
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                cycle = " -> ".join(path[path.index(name):] + [name])
+                raise CheckGraphError(f"Dependency cycle: {cycle}")
+            state[name] = "visiting"
+            for dependency in self.dependencies(self.steps[name]):
+                visit(dependency, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.steps:
+            visit(name, [])
+        return order
+
+    def _skip_reason(self, step: Step, run: GraphRun) -> Optional[str]:
+        for dependency in step.depends_on:
+            if run.skipped(dependency):
+                return f"{dependency} was skipped"
+            if (self.steps[dependency].gate
+                    and run.statuses[dependency] == FAILED):
+                return f"{dependency} failed"
+        if step.cost in GATED_COSTS and run.failed_gate is not None:
+            return f"{run.failed_gate} failed"
+        return None
+
+    async def run(self, on_step: Callable[[Step, GraphRun], None] = None
+                  ) -> GraphRun:
+        """
+        Run every step, each in a `span` of its name. on_step(step, run) is
+        called as each step finishes or is skipped. The first exception
+        cancels the remaining steps and is raised.
+        """
+        run = GraphRun(self)
+        finished = {name: asyncio.Event() for name in self.steps}
+        limits = {cost: asyncio.Semaphore(limit)
+                  for cost, limit in COST_CONCURRENCY.items()}
+
+        async def execute(step: Step):
+            for dependency in self.dependencies(step):
+                await finished[dependency].wait()
+            reason = self._skip_reason(step, run)
+            if reason is not None:
+                status = SKIPPED
+                run.skip_reasons[step.name] = reason
+            else:
+                async with limits.get(step.cost) or nullcontext():
+                    with span(step.name):
+                        result = step.run(run.results)
+                        if inspect.isawaitable(result):
+                            result = await result
+                run.results[step.name] = result
+                if not step.is_check:
+                    status = DONE
+                elif step.passed(result):
+                    status = PASSED
+                else:
+                    status = FAILED
+                    if step.gate and run.failed_gate is None:
+                        run.failed_gate = step.name
+                        logger.info("Gating check %s failed, skipping "
+                                    "rendering and model calls", step.name)
+            run.statuses[step.name] = status
+            if on_step is not None:
+                on_step(step, run)
+            finished[step.name].set()
+
+        tasks = [asyncio.create_task(execute(self.steps[name]))
+                 for name in self.order]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return run
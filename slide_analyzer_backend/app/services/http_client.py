@@ -0,0 +1,258 @@
+# app/services/http_client.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger("slide_analyzer")
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+# Requests in flight to any one host, so a batch of decks from the same
+# service does not trip its rate limits
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "4"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join("cache", "http"))
+HTTP_CACHE_MAX_MB = float(os.getenv("HTTP_CACHE_MAX_MB", "2048"))
+HTTP_CACHE_MAX_AGE_DAYS = float(os.getenv("HTTP_CACHE_MAX_AGE_DAYS", "30"))
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+class HttpFetcher:
+    """
+    Process-wide async HTTP client with keep-alive pooling and a limit on
+    concurrent requests per host.
+
+    fetch() keeps response bodies in an on-disk cache and revalidates them
+    with If-None-Match / If-Modified-Since, so an unchanged resource costs a
+    304 instead of a download. A cached body can also be reused without any
+    request while it is younger than `max_age`, or while the caller's
+    `version` of the resource matches the one it was stored for.
+
+    Like the analysis cache, bodies stored or revalidated more than
+    max_age_days ago are dropped, then the least recently used ones until
+    the cache fits in max_size_mb.
+    """
+
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR,
+                 max_connections: int = HTTP_MAX_CONNECTIONS,
+                 max_per_host: int = HTTP_MAX_PER_HOST,
+                 timeout: float = HTTP_TIMEOUT,
+                 max_size_mb: float = HTTP_CACHE_MAX_MB,
+                 max_age_days: float = HTTP_CACHE_MAX_AGE_DAYS):
+        self.cache_dir = cache_dir
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.requests = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+        self.evictions = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self._host_limits = {}
+
+    def client(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections),
+                timeout=self.timeout,
+                follow_redirects=True)
+            self._loop = loop
+            self._host_limits = {}
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_limits[host]
+
+    async def close(self):
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except RuntimeError:
+                # The loop that owned the connections is already closed
+                pass
+            self._client = None
+            self._loop = None
+            self._host_limits = {}
+
+    def _cache_paths(self, url: str, headers: dict):
+        # Credentials are part of the key so one token's view of a resource
+        # is never served to another
+        key = hashlib.sha256(json.dumps([url, sorted(headers.items())])
+                             .encode("utf-8")).hexdigest()
+        return (os.path.join(self.cache_dir, f"{key}.body"),
+                os.path.join(self.cache_dir, f"{key}.json"))
+
+    def _load_meta(self, meta_path: str, body_path: str) -> Optional[dict]:
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self, meta_path: str, meta: dict):
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, meta_path)
+
+    async def fetch(self, url: str, headers: Optional[dict] = None,
+                    max_age: Optional[float] = None,
+                    version: Optional[str] = None) -> dict:
+        """
+        GET a URL through the cache. Returns {"path", "content_type",
+        "from_cache"}, where path is the cached body on disk. Raises
+        httpx.HTTPStatusError for error responses.
+        """
+        headers = dict(headers or {})
+        os.makedirs(self.cache_dir, exist_ok=True)
+        body_path, meta_path = self._cache_paths(url, headers)
+        meta = self._load_meta(meta_path, body_path)
+
+        if meta is not None:
+            fresh = (max_age is not None
+                     and time.time() - meta["fetched_at"] < max_age)
+            same_version = version is not None and meta.get(
+                "version") == version
+            if fresh or same_version:
+                self.cache_hits += 1
+                self._touch(body_path, keep_age=True)
+                return {"path": body_path,
+                        "content_type": meta.get("content_type"),
+                        "from_cache": True}
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        client = self.client()
+        async with self._host_limit(url):
+            self.requests += 1
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and meta is not None:
+                    self.not_modified += 1
+                    meta.update(fetched_at=time.time(), version=version)
+                    self._save_meta(meta_path, meta)
+                    # Confirmed current, so its age starts over
+                    self._touch(body_path, keep_age=False)
+                    return {"path": body_path,
+                            "content_type": meta.get("content_type"),
+                            "from_cache": True}
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                # Evicted before the new body lands, so it is kept
+                await asyncio.to_thread(self.evict)
+                await self._save_body(response, body_path)
+
+        self._save_meta(meta_path, {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content_type": response.headers.get("content-type"),
+            "version": version,
+            "fetched_at": time.time(),
+        })
+        logger.debug("Fetched %s", url)
+        return {"path": body_path,
+                "content_type": response.headers.get("content-type"),
+                "from_cache": False}
+
+    async def _save_body(self, response: httpx.Response, body_path: str):
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await asyncio.to_thread(f.write, chunk)
+            os.replace(temp_path, body_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _touch(self, body_path: str, keep_age: bool):
+        # Mark the body as recently used for eviction
+        try:
+            now = time.time()
+            modified = os.stat(body_path).st_mtime if keep_age else now
+            os.utime(body_path, (now, modified))
+        except OSError:
+            pass
+
+    def evict(self):
+        """
+        Drop expired bodies, then the least recently used ones until the
+        cache fits in max_size_bytes. A body's metadata goes with it.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        now = time.time()
+        entries = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(".body"):
+                    continue
+                stat = dir_entry.stat()
+                if now - stat.st_mtime > self.max_age_seconds:
+                    self._remove(dir_entry.path)
+                    continue
+                entries.append((stat.st_atime, stat.st_size, dir_entry.path))
+                total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def _remove(self, body_path: str):
+        for path in (body_path, body_path[:-len(".body")] + ".json"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.evictions += 1
+
+    async def fetch_json(self, url: str, headers: Optional[dict] = None,
+                         max_age: Optional[float] = None,
+                         version: Optional[str] = None):
+        result = await self.fetch(url, headers, max_age, version)
+        with open(result["path"], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "cache_hits": self.cache_hits,
+            "evictions": self.evictions,
+        }
+
+
+http_fetcher = HttpFetcher()
+
+
+async def close_http_client():
+    await http_fetcher.close()
@@ -0,0 +1,167 @@
+# app/services/job_queue.py
+
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.logging_config import bind_processing_id
+
+logger = logging.getLogger("slide_analyzer")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Finished jobs are kept this long for status, result and event replay
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, processing_id: str, run: Callable[["Job"], Awaitable]):
+        self.processing_id = processing_id
+        self.run = run
+        self.status = QUEUED
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.total_slides: Optional[int] = None
+        self.slides_done = 0
+        self.events = []
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def publish(self, event: str, data: dict):
+        """
+        Record a progress event and wake up every subscriber.
+        """
+        if event == "file_analysis":
+            # Hidden slides are counted but never rendered or analyzed
+            self.total_slides = data.get("rendered_slides",
+                                         data.get("number_of_slides"))
+        elif event == "slide_analysis":
+            self.slides_done += 1
+        self.events.append({"event": event, "data": data})
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self):
+        """
+        Yield every event of the job, replaying past ones first, until the
+        job has finished.
+        """
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await changed.wait()
+
+    def to_status(self) -> dict:
+        return {
+            "processing_id": self.processing_id,
+            "status": self.status,
+            "total_slides": self.total_slides,
+            "slides_done": self.slides_done,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    In-process queue of slide deck jobs drained by a fixed pool of worker
+    tasks, so requests return immediately and at most `workers` decks are
+    processed at once.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS,
+                 retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self.jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop = None
+        self._tasks = []
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker())
+                       for _ in range(self.workers)]
+        logger.info("Started %s job workers", self.workers)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    def submit(self, processing_id: str,
+               run: Callable[[Job], Awaitable]) -> Job:
+        """
+        Queue `run(job)`; its return value becomes the job result.
+        """
+        self.start()
+        self._prune()
+        job = Job(processing_id, run)
+        self.jobs[processing_id] = job
+        self._queue.put_nowait(job)
+        job.publish("status", {"status": QUEUED})
+        return job
+
+    def get(self, processing_id: str) -> Optional[Job]:
+        return self.jobs.get(processing_id)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _worker(self):
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            try:
+                await self._run(job)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.publish("status", {"status": RUNNING})
+        try:
+            with bind_processing_id(job.processing_id):
+                job.result = await job.run(job)
+            if job.result is None:
+                raise RuntimeError("Processing failed.")
+            job.status = COMPLETED
+        except Exception as e:
+            logger.exception("Job %s failed: %s", job.processing_id, e)
+            job.error = str(e)
+            job.status = FAILED
+        job.finished_at = time.time()
+        job.publish("status", job.to_status())
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [processing_id for processing_id, job in self.jobs.items()
+                   if job.done and job.finished_at < cutoff]
+        for processing_id in expired:
+            del self.jobs[processing_id]
+
+
+job_queue = JobQueue()
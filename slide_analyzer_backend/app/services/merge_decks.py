@@ -1,15 +1,279 @@
 # app/services/merge_decks.py
+
+import json
+import logging
 import os
-from PyPDF2 import PdfFileMerger
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+from app.services.analysis_cache import hash_file
+
+logger = logging.getLogger("slide_analyzer")
+
+APPROVED_DECKS_DIR = os.getenv("APPROVED_DECKS_DIR", "approved_decks")
+MASTER_DECK_PATH = os.getenv("MASTER_DECK_PATH", "master_deck.pdf")
+# Comma-separated deck IDs (file names without extension) fixing the
+# running order; decks not listed follow in order of approval
+MASTER_DECK_ORDER = [
+    deck_id.strip()
+    for deck_id in os.getenv("MASTER_DECK_ORDER", "").split(",")
+    if deck_id.strip()
+]
+# Incremental saves leave superseded objects behind and cannot share
+# resources between decks; the master is rewritten with full garbage
+# collection and deduplication once it grows past this factor of its last
+# compacted size
+MASTER_DECK_COMPACT_GROWTH = float(
+    os.getenv("MASTER_DECK_COMPACT_GROWTH", "1.5"))
+
+_merge_lock = threading.Lock()
+
+
+def manifest_path_for(output_path: str) -> str:
+    return os.path.splitext(output_path)[0] + ".json"
+
+
+class MasterDeck:
+    """
+    The merged master deck and a JSON manifest of the decks in it.
+
+    Newly approved decks are inserted into the existing PDF at their
+    running-order position and saved incrementally, so an approval costs
+    one deck, not the whole master. Only one source deck is open at a
+    time. compact() rewrites the file with garbage=4, which drops orphaned
+    objects and merges fonts and images embedded identically by many decks
+    (the shared conference template) into one copy.
+    """
+
+    def __init__(self, output_path: str = MASTER_DECK_PATH):
+        self.output_path = output_path
+        self.manifest_path = manifest_path_for(output_path)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> dict:
+        """
+        The manifest of the master on disk. Without a readable one the
+        master's pages cannot be told apart, so it is deleted and rebuilt
+        from the approved decks as they are added again.
+        """
+        if os.path.exists(self.output_path):
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                logger.warning("Master deck manifest unreadable, rebuilding")
+            os.remove(self.output_path)
+        return {"order": [], "decks": [], "compacted_size": 0}
+
+    def _save_manifest(self):
+        directory = os.path.dirname(self.manifest_path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    @property
+    def deck_ids(self) -> List[str]:
+        return [deck["deck_id"] for deck in self.manifest["decks"]]
+
+    def _sort_key(self, deck_id: str, approved_at: float):
+        order = self.manifest["order"]
+        if deck_id in order:
+            return (0, order.index(deck_id), 0)
+        return (1, 0, approved_at)
+
+    def _position(self, deck_id: str, approved_at: float) -> int:
+        """
+        Index in the deck list where a deck belongs in running order.
+        """
+        key = self._sort_key(deck_id, approved_at)
+        for index, deck in enumerate(self.manifest["decks"]):
+            if key < self._sort_key(deck["deck_id"], deck["approved_at"]):
+                return index
+        return len(self.manifest["decks"])
+
+    def _page_start(self, index: int) -> int:
+        return sum(deck["page_count"]
+                   for deck in self.manifest["decks"][:index])
+
+    def _open_master(self):
+        if os.path.exists(self.output_path):
+            return fitz.open(self.output_path), True
+        return fitz.open(), False
+
+    def _save(self, master, existing: bool):
+        if existing and master.can_save_incrementally():
+            master.saveIncr()
+        else:
+            self._write_compacted(master)
+        master.close()
+
+    def _write_compacted(self, master):
+        directory = os.path.dirname(self.output_path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".pdf")
+        os.close(fd)
+        try:
+            master.save(temp_path, garbage=4, deflate=True, clean=True)
+            os.replace(temp_path, self.output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.manifest["compacted_size"] = os.path.getsize(self.output_path)
+
+    def add(self, deck_path: str, deck_id: Optional[str] = None,
+            content_hash: Optional[str] = None) -> bool:
+        """
+        Insert or replace one deck. Returns False if the same content is
+        already in the master.
+        """
+        deck_id = deck_id or os.path.splitext(os.path.basename(deck_path))[0]
+        content_hash = content_hash or hash_file(deck_path)
+        existing = next((deck for deck in self.manifest["decks"]
+                         if deck["deck_id"] == deck_id), None)
+        if existing is not None and existing["sha256"] == content_hash:
+            return False
+
+        master, on_disk = self._open_master()
+        try:
+            approved_at = time.time()
+            if existing is not None:
+                # A resubmitted deck keeps its slot
+                approved_at = existing["approved_at"]
+                index = self.manifest["decks"].index(existing)
+                start = self._page_start(index)
+                master.delete_pages(range(start,
+                                          start + existing["page_count"]))
+                self.manifest["decks"].pop(index)
+            index = self._position(deck_id, approved_at)
+            with fitz.open(deck_path) as source:
+                master.insert_pdf(source, start_at=self._page_start(index))
+                page_count = source.page_count
+            self._save(master, on_disk)
+        except BaseException:
+            master.close()
+            raise
+
+        self.manifest["decks"].insert(index, {
+            "deck_id": deck_id,
+            "path": deck_path,
+            "sha256": content_hash,
+            "page_count": page_count,
+            "approved_at": approved_at,
+        })
+        self._save_manifest()
+        logger.info("Merged %s (%s pages) into %s at position %s", deck_id,
+                    page_count, self.output_path, index + 1)
+        return True
+
+    def remove(self, deck_id: str) -> bool:
+        existing = next((deck for deck in self.manifest["decks"]
+                         if deck["deck_id"] == deck_id), None)
+        if existing is None or not os.path.exists(self.output_path):
+            return False
+        index = self.manifest["decks"].index(existing)
+        master, on_disk = self._open_master()
+        start = self._page_start(index)
+        master.delete_pages(range(start, start + existing["page_count"]))
+        if master.page_count:
+            self._save(master, on_disk)
+        else:
+            master.close()
+            os.remove(self.output_path)
+            self.manifest["compacted_size"] = 0
+        self.manifest["decks"].pop(index)
+        self._save_manifest()
+        return True
+
+    def reorder(self, order: List[str]):
+        """
+        Apply a new running order by moving whole decks.
+        """
+        self.manifest["order"] = list(order)
+        target = sorted(self.manifest["decks"],
+                        key=lambda deck: self._sort_key(deck["deck_id"],
+                                                        deck["approved_at"]))
+        if target == self.manifest["decks"]:
+            self._save_manifest()
+            return
+        # Moving page ranges rewrites the page tree anyway; rebuild from
+        # the sources in the new order
+        self.manifest["decks"] = target
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Write the master from scratch from the manifest's source decks.
+        """
+        master = fitz.open()
+        try:
+            for deck in self.manifest["decks"]:
+                with fitz.open(deck["path"]) as source:
+                    master.insert_pdf(source)
+                    deck["page_count"] = source.page_count
+            if master.page_count:
+                self._write_compacted(master)
+            elif os.path.exists(self.output_path):
+                os.remove(self.output_path)
+                self.manifest["compacted_size"] = 0
+        finally:
+            master.close()
+        self._save_manifest()
+
+    def compact(self, force: bool = False) -> bool:
+        """
+        Rewrite the master with garbage collection and deduplication if it
+        has grown enough since the last compaction.
+        """
+        if not os.path.exists(self.output_path):
+            return False
+        size = os.path.getsize(self.output_path)
+        compacted_size = self.manifest.get("compacted_size") or 0
+        if not force and size <= compacted_size * MASTER_DECK_COMPACT_GROWTH:
+            return False
+        with fitz.open(self.output_path) as master:
+            self._write_compacted(master)
+        self._save_manifest()
+        logger.info("Compacted %s from %s to %s bytes", self.output_path, size,
+                    self.manifest['compacted_size'])
+        return True
 
 
-def merge_approved_decks(output_path='master_deck.pdf'):
-    merger = PdfFileMerger()
-    decks_dir = 'approved_decks'
+def merge_approved_decks(output_path: str = MASTER_DECK_PATH,
+                         decks_dir: str = APPROVED_DECKS_DIR,
+                         order: Optional[List[str]] = None) -> dict:
+    """
+    Bring the master deck in line with the approved decks directory:
+    new or changed decks are merged in incrementally, withdrawn ones are
+    removed, and the master is compacted once it has grown enough.
+    """
+    order = MASTER_DECK_ORDER if order is None else order
+    with _merge_lock:
+        master = MasterDeck(output_path)
+        approved = {}
+        for filename in sorted(os.listdir(decks_dir)):
+            if filename.endswith('.pdf'):
+                deck_id = os.path.splitext(filename)[0]
+                approved[deck_id] = os.path.join(decks_dir, filename)
 
-    for filename in os.listdir(decks_dir):
-        if filename.endswith('.pdf'):
-            merger.append(os.path.join(decks_dir, filename))
+        for deck_id in master.deck_ids:
+            if deck_id not in approved:
+                master.remove(deck_id)
+        if order != master.manifest["order"]:
+            master.reorder(order)
+        added = [deck_id for deck_id, path in approved.items()
+                 if master.add(path, deck_id)]
+        master.compact()
 
-    merger.write(output_path)
-    merger.close()
+        return {
+            "output_path": output_path,
+            "decks": master.deck_ids,
+            "added": added,
+            "pages": sum(deck["page_count"]
+                         for deck in master.manifest["decks"]),
+            "size_bytes": os.path.getsize(output_path)
+            if os.path.exists(output_path) else 0,
+        }
@@ -0,0 +1,358 @@
+# app/services/pptx_converter.py
+
+import asyncio
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+logger = logging.getLogger("slide_analyzer")
+
+SOFFICE_BINARY = os.getenv("SOFFICE_BINARY", "soffice")
+PPTX_CONVERTER_WORKERS = int(os.getenv("PPTX_CONVERTER_WORKERS", "2"))
+PPTX_CONVERT_TIMEOUT = float(os.getenv("PPTX_CONVERT_TIMEOUT", "120"))
+PPTX_CONVERTER_BASE_PORT = int(os.getenv("PPTX_CONVERTER_BASE_PORT", "2002"))
+PPTX_PDF_CACHE_DIR = os.getenv("PPTX_PDF_CACHE_DIR",
+                               os.path.join("cache", "pptx_pdf"))
+PPTX_PDF_CACHE_MAX_MB = float(os.getenv("PPTX_PDF_CACHE_MAX_MB", "1024"))
+PPTX_PDF_CACHE_MAX_AGE_DAYS = float(
+    os.getenv("PPTX_PDF_CACHE_MAX_AGE_DAYS", "30"))
+# "subprocess" starts soffice --convert-to for every deck, which works
+# with any LibreOffice install. "uno" keeps each soffice running and
+# converts over its UNO socket instead; it needs LibreOffice's Python
+# bindings importable here, from the python3-uno package or by running the
+# backend with LibreOffice's bundled Python.
+PPTX_CONVERTER_MODE = os.getenv("PPTX_CONVERTER_MODE", "subprocess")
+# How long a freshly started soffice gets to open its UNO socket
+SOFFICE_STARTUP_TIMEOUT = 30
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.connection import NoConnectException
+except ImportError:
+    uno = None
+
+
+class ConversionError(Exception):
+    pass
+
+
+def check_converter_mode(mode: str):
+    """
+    Raise ConversionError if `mode` cannot run here, rather than quietly
+    converting some other way.
+    """
+    if mode == "subprocess":
+        return
+    if mode != "uno":
+        raise ConversionError(f"Unknown PPTX_CONVERTER_MODE {mode!r}")
+    if uno is None:
+        raise ConversionError(
+            "PPTX_CONVERTER_MODE=uno needs LibreOffice's Python UNO "
+            "bindings: install python3-uno or run the backend with "
+            "LibreOffice's bundled Python, or set "
+            "PPTX_CONVERTER_MODE=subprocess")
+
+
+def _uno_properties(**values):
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        properties.append(prop)
+    return tuple(properties)
+
+
+class OfficeWorker:
+    """
+    One long-lived headless LibreOffice with its own user profile.
+
+    In "uno" mode soffice is started once and kept listening on a socket,
+    and every conversion is a load/export/close over that connection. In
+    "subprocess" mode each conversion runs soffice --convert-to, still
+    reusing this worker's already initialized profile.
+    """
+
+    def __init__(self, index: int, port: int,
+                 mode: str = PPTX_CONVERTER_MODE):
+        self.index = index
+        self.port = port
+        self.mode = mode
+        self.profile_dir = tempfile.mkdtemp(prefix=f"soffice_{index}_")
+        self.process: Optional[subprocess.Popen] = None
+        self._desktop = None
+
+    @property
+    def profile_url(self):
+        return f"file://{self.profile_dir}"
+
+    def alive(self) -> bool:
+        if self.mode != "uno":
+            return True
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.mode != "uno":
+            return
+        self.process = subprocess.Popen(
+            [SOFFICE_BINARY, "--headless", "--invisible", "--nologo",
+             "--norestore", "--nodefault", "--nolockcheck",
+             f"-env:UserInstallation={self.profile_url}",
+             f"--accept=socket,host=127.0.0.1,port={self.port};urp;"
+             "StarOffice.ComponentContext"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self._desktop = None
+        logger.info("Started soffice worker %s on port %s", self.index,
+                    self.port)
+
+    def stop(self):
+        self._desktop = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def restart(self):
+        logger.warning("Restarting soffice worker %s", self.index)
+        self.stop()
+        self.start()
+
+    def close(self):
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def _connect(self):
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local)
+        deadline = time.monotonic() + SOFFICE_STARTUP_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(
+                    f"uno:socket,host=127.0.0.1,port={self.port};urp;"
+                    "StarOffice.ComponentContext")
+                break
+            except NoConnectException:
+                if not self.alive() or time.monotonic() > deadline:
+                    raise ConversionError("soffice did not start")
+                time.sleep(0.2)
+        self._desktop = context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", context)
+
+    def convert_uno(self, input_path: str, output_path: str):
+        if self._desktop is None:
+            self._connect()
+        document = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(input_path)), "_blank",
+            0, _uno_properties(Hidden=True, ReadOnly=True))
+        if document is None:
+            raise ConversionError(f"soffice could not open {input_path}")
+        try:
+            document.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                _uno_properties(FilterName="impress_pdf_Export"))
+        finally:
+            document.close(True)
+
+    async def convert_subprocess(self, input_path: str, output_path: str,
+                                 timeout: float):
+        out_dir = tempfile.mkdtemp(dir=os.path.dirname(output_path) or ".")
+        try:
+            process = await asyncio.create_subprocess_exec(
+                SOFFICE_BINARY, "--headless", "--norestore", "--nolockcheck",
+                f"-env:UserInstallation={self.profile_url}",
+                "--convert-to", "pdf", "--outdir", out_dir, input_path,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL)
+            try:
+                await asyncio.wait_for(process.wait(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise
+            name = os.path.splitext(os.path.basename(input_path))[0] + ".pdf"
+            converted = os.path.join(out_dir, name)
+            if process.returncode != 0 or not os.path.exists(converted):
+                raise ConversionError(
+                    f"soffice exited with {process.returncode}")
+            os.replace(converted, output_path)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+
+class OfficeConverterPool:
+    """
+    Pool of warm LibreOffice workers converting PPTX to PDF.
+
+    Each conversion borrows an idle worker and gets `timeout` seconds; a
+    worker that times out, errors or has died is killed and restarted
+    before it is handed out again. Starting the pool raises
+    ConversionError when `mode` cannot run here.
+    """
+
+    def __init__(self, workers: int = PPTX_CONVERTER_WORKERS,
+                 base_port: int = PPTX_CONVERTER_BASE_PORT,
+                 timeout: float = PPTX_CONVERT_TIMEOUT,
+                 mode: str = None):
+        self.size = workers
+        self.base_port = base_port
+        self.timeout = timeout
+        self.mode = mode
+        self._workers = []
+        self._idle: Optional[asyncio.Queue] = None
+
+    def _start(self):
+        if self._idle is not None:
+            return
+        # Resolved on start, so the module setting can be changed until then
+        mode = self.mode or PPTX_CONVERTER_MODE
+        check_converter_mode(mode)
+        self._idle = asyncio.Queue()
+        for index in range(self.size):
+            worker = OfficeWorker(index, self.base_port + index, mode)
+            worker.start()
+            self._workers.append(worker)
+            self._idle.put_nowait(worker)
+
+    async def convert(self, input_path: str, output_path: str):
+        self._start()
+        worker = await self._idle.get()
+        try:
+            if not worker.alive():
+                worker.restart()
+            if worker.mode == "subprocess":
+                await worker.convert_subprocess(input_path, output_path,
+                                                self.timeout)
+            else:
+                await asyncio.wait_for(
+                    asyncio.to_thread(worker.convert_uno, input_path,
+                                      output_path),
+                    self.timeout)
+        except asyncio.TimeoutError:
+            # Killing soffice also unblocks the thread stuck in the UNO call
+            worker.restart()
+            raise ConversionError(
+                f"Conversion timed out after {self.timeout}s")
+        except Exception:
+            worker.restart()
+            raise
+        finally:
+            self._idle.put_nowait(worker)
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
+        self._idle = None
+
+
+converter_pool = OfficeConverterPool()
+# Output path -> [lock, number of conversions holding or awaiting it]
+_conversion_locks = {}
+
+
+@asynccontextmanager
+async def _conversion_lock(pdf_path: str):
+    """
+    Serialize conversions to one output path, dropping the lock once no
+    conversion is holding or waiting for it.
+    """
+    entry = _conversion_locks.setdefault(pdf_path, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _conversion_locks[pdf_path]
+
+
+def evict_pdf_cache(cache_dir: str,
+                    max_size_mb: float = PPTX_PDF_CACHE_MAX_MB,
+                    max_age_days: float = PPTX_PDF_CACHE_MAX_AGE_DAYS):
+    """
+    Drop PDFs written more than max_age_days ago, then the least recently
+    used ones until the cache fits in max_size_mb. Like the analysis
+    cache, age is the modification time and use the access time.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    now = time.time()
+    max_size_bytes = max_size_mb * 1024 * 1024
+    entries = []
+    total_size = 0
+    with os.scandir(cache_dir) as it:
+        for dir_entry in it:
+            if (not dir_entry.name.endswith(".pdf")
+                    or dir_entry.name.endswith(".part.pdf")):
+                continue
+            stat = dir_entry.stat()
+            if now - stat.st_mtime > max_age_days * 24 * 60 * 60:
+                _remove(dir_entry.path)
+                continue
+            entries.append((stat.st_atime, stat.st_size, dir_entry.path))
+            total_size += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= max_size_bytes:
+            break
+        _remove(path)
+        total_size -= size
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def convert_pptx_to_pdf(pptx_path: str, content_hash: str,
+                              pool: OfficeConverterPool = None,
+                              cache_dir: str = None) -> str:
+    """
+    Return the path of a PDF rendering of a PPTX deck.
+
+    Conversions are cached by content hash, so a resubmitted deck is only
+    converted once, and concurrent requests for the same deck share one
+    conversion. The cache is kept within PPTX_PDF_CACHE_MAX_MB and
+    PPTX_PDF_CACHE_MAX_AGE_DAYS.
+    """
+    pool = pool or converter_pool
+    cache_dir = cache_dir or PPTX_PDF_CACHE_DIR
+    pdf_path = os.path.join(cache_dir, f"{content_hash}.pdf")
+
+    async with _conversion_lock(pdf_path):
+        try:
+            modified = os.stat(pdf_path).st_mtime
+        except OSError:
+            modified = None
+        if modified is not None:
+            logger.info("Using cached PDF conversion for %s", pptx_path)
+            # Mark it as recently used for eviction, keeping its age
+            try:
+                os.utime(pdf_path, (time.time(), modified))
+            except OSError:
+                pass
+            return pdf_path
+
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = os.path.join(cache_dir, f"{content_hash}.part.pdf")
+        logger.info("Converting %s to PDF", pptx_path)
+        try:
+            await pool.convert(pptx_path, temp_path)
+            # Evicted before the new conversion lands, so it is kept
+            evict_pdf_cache(cache_dir)
+            os.replace(temp_path, pdf_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return pdf_path
@@ -0,0 +1,570 @@
+# app/services/registry.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from app.models.schemas import AnalysisResponse
+from app.services.job_queue import QUEUED, RUNNING, COMPLETED, FAILED
+
+logger = logging.getLogger("slide_analyzer")
+
+REGISTRY_DB_PATH = os.getenv("REGISTRY_DB_PATH",
+                             os.path.join("data", "registry.db"))
+# How long a writer waits for another process's transaction to finish
+REGISTRY_BUSY_TIMEOUT_MS = int(os.getenv("REGISTRY_BUSY_TIMEOUT_MS", "5000"))
+# Number of decks expected in total, e.g. one per speaker; 0 if unknown
+ADMIN_EXPECTED_DECKS = int(os.getenv("ADMIN_EXPECTED_DECKS", "0"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    processing_id TEXT PRIMARY KEY,
+    file_path TEXT NOT NULL,
+    original_filename TEXT,
+    deck_format TEXT,
+    content_hash TEXT,
+    size_bytes INTEGER,
+    slide_count INTEGER,
+    status TEXT NOT NULL,
+    error TEXT,
+    submitter_name TEXT,
+    submitter_email TEXT,
+    batch_id TEXT,
+    worker_pid INTEGER,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS submissions_created
+    ON submissions (created_at);
+CREATE INDEX IF NOT EXISTS submissions_status_created
+    ON submissions (status, created_at);
+CREATE INDEX IF NOT EXISTS submissions_content_hash
+    ON submissions (content_hash);
+
+CREATE TABLE IF NOT EXISTS check_outcomes (
+    processing_id TEXT NOT NULL
+        REFERENCES submissions (processing_id) ON DELETE CASCADE,
+    check_name TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    message TEXT,
+    PRIMARY KEY (processing_id, check_name)
+);
+CREATE INDEX IF NOT EXISTS check_outcomes_check_passed
+    ON check_outcomes (check_name, passed);
+
+-- Aggregates kept up to date in the same transaction as each change
+CREATE TABLE IF NOT EXISTS admin_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+-- Checks defined by admins, asked of the vision model for every slide
+CREATE TABLE IF NOT EXISTS prompt_checks (
+    name TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    depends_on TEXT NOT NULL,
+    enabled INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+-- One deck per submitter (or per submission without one); ready when its
+-- latest completed submission passed every check. The check failure
+-- counters count these latest submissions only
+CREATE TABLE IF NOT EXISTS decks (
+    deck_key TEXT PRIMARY KEY,
+    processing_id TEXT NOT NULL,
+    ready INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+SUBMISSION_COLUMNS = (
+    "processing_id, file_path, original_filename, deck_format, "
+    "content_hash, size_bytes, slide_count, status, error, "
+    "submitter_name, submitter_email, batch_id, created_at, updated_at")
+
+# Columns added after a registry may already have been created, with their
+# types; they are added before the indexes that use them
+ADDED_SUBMISSION_COLUMNS = [("batch_id", "TEXT"), ("worker_pid", "INTEGER")]
+MIGRATED_INDEXES = """
+CREATE INDEX IF NOT EXISTS submissions_batch
+    ON submissions (batch_id, created_at);
+"""
+
+
+def check_outcomes(response: AnalysisResponse) -> list:
+    """
+    (check name, passed, message) for every check in an analysis. Checks
+    skipped after a gating check failed are left out.
+    """
+    if response.checks is not None:
+        return [(check.name, check.status == "passed", check.message)
+                for check in response.checks if check.status != "skipped"]
+    # Analyses stored before checks were reported individually
+    deterministic = response.deterministic_checks
+    probabilistic = response.probabilistic_checks
+    return [
+        ("format_check", deterministic.format_check.accepted_format,
+         deterministic.format_check.message),
+        ("size_check", deterministic.size_check.size_within_limit,
+         deterministic.size_check.message),
+        ("slide_count_check",
+         deterministic.slide_count_check.slide_count_within_limit,
+         deterministic.slide_count_check.message),
+        ("title_slide_check", probabilistic.title_slide_check.has_title_slide,
+         probabilistic.title_slide_check.message),
+        ("bullet_point_check",
+         probabilistic.bullet_point_check.has_few_bullet_points,
+         probabilistic.bullet_point_check.message),
+        ("image_check", probabilistic.image_check.has_images,
+         probabilistic.image_check.message),
+    ]
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    """
+    SQLite-backed registry of submissions, keyed by processing ID.
+
+    The database runs in WAL mode so readers never block the writer, and
+    every lookup goes through the primary key or an index. Status changes
+    are single conditional UPDATEs, so they stay atomic when several
+    uvicorn workers share the file. Each thread gets its own connection.
+    """
+
+    def __init__(self, path: str = REGISTRY_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Resolved on every call: a relative path follows the working
+        # directory
+        path = os.path.abspath(self.path)
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.path == path:
+            return connection
+        if connection is not None:
+            connection.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit; multi-statement writes open their own transaction
+        connection = sqlite3.connect(path, isolation_level=None,
+                                     timeout=REGISTRY_BUSY_TIMEOUT_MS / 1000)
+        connection.row_factory = sqlite3.Row
+        connection.execute(f"PRAGMA busy_timeout = {REGISTRY_BUSY_TIMEOUT_MS}")
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.executescript(SCHEMA)
+        self._migrate(connection)
+        self._local.connection = connection
+        self._local.path = path
+        return connection
+
+    @staticmethod
+    def _migrate(connection):
+        """
+        Bring a registry created by an older version up to SCHEMA. The
+        columns are checked again under the write lock, so only one of
+        several workers opening the file adds them.
+        """
+        def missing_columns():
+            columns = {row["name"] for row in connection.execute(
+                "PRAGMA table_info(submissions)")}
+            return [(name, column_type)
+                    for name, column_type in ADDED_SUBMISSION_COLUMNS
+                    if name not in columns]
+
+        if missing_columns():
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for name, column_type in missing_columns():
+                    logger.info("Adding submissions.%s to the registry",
+                                name)
+                    connection.execute(
+                        f"ALTER TABLE submissions ADD COLUMN {name} "
+                        f"{column_type}")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        connection.executescript(MIGRATED_INDEXES)
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Write transaction holding the database's write lock from the start,
+        so a read-check-write sequence cannot interleave with other
+        workers.
+        """
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @staticmethod
+    def _bump(connection, name: str, delta: int = 1):
+        connection.execute(
+            "INSERT INTO admin_counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, delta))
+
+    def create_submission(self, processing_id: str, file_path: str,
+                          original_filename: Optional[str] = None,
+                          deck_format: Optional[str] = None,
+                          content_hash: Optional[str] = None,
+                          size_bytes: Optional[int] = None,
+                          submitter_name: Optional[str] = None,
+                          submitter_email: Optional[str] = None,
+                          batch_id: Optional[str] = None):
+        now = time.time()
+        with self._transaction() as connection:
+            # The worker process whose job queue will run the submission
+            connection.execute(
+                f"INSERT INTO submissions ({SUBMISSION_COLUMNS}, worker_pid) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL, ?, NULL, ?, ?, ?, ?, ?, ?)",
+                (processing_id, file_path, original_filename, deck_format,
+                 content_hash, size_bytes, QUEUED, submitter_name,
+                 submitter_email, batch_id, now, now, os.getpid()))
+            self._bump(connection, "submissions")
+            self._bump(connection, f"status:{QUEUED}")
+
+    def _claim(self, connection, processing_id: str,
+               from_statuses: Iterable[str], to_status: str) -> bool:
+        row = connection.execute(
+            "SELECT status FROM submissions WHERE processing_id = ?",
+            (processing_id,)).fetchone()
+        if row is None or row["status"] not in list(from_statuses):
+            return False
+        self._bump(connection, f"status:{row['status']}", -1)
+        self._bump(connection, f"status:{to_status}")
+        return True
+
+    def transition(self, processing_id: str, from_statuses: Iterable[str],
+                   to_status: str, error: Optional[str] = None) -> bool:
+        """
+        Move a submission to `to_status` if it is currently in one of
+        `from_statuses`. Returns False if another worker got there first.
+        """
+        with self._transaction() as connection:
+            if not self._claim(connection, processing_id, from_statuses,
+                               to_status):
+                return False
+            connection.execute(
+                "UPDATE submissions SET status = ?, error = ?, "
+                "updated_at = ? WHERE processing_id = ?",
+                (to_status, error, time.time(), processing_id))
+        return True
+
+    def start(self, processing_id: str) -> bool:
+        return self.transition(processing_id, [QUEUED], RUNNING)
+
+    def fail(self, processing_id: str, error: str) -> bool:
+        return self.transition(processing_id, [QUEUED, RUNNING], FAILED,
+                               error)
+
+    def fail_orphaned(self, error: str) -> int:
+        """
+        Fail the queued and running submissions of worker processes that
+        have exited, whose jobs were lost with their in-memory queue. Call
+        before this process queues anything: its own earlier submissions
+        can only be left from a process that had the same PID. Returns the
+        number of submissions failed.
+        """
+        rows = self._connect().execute(
+            "SELECT processing_id, worker_pid FROM submissions "
+            "WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchall()
+        orphaned = [row["processing_id"] for row in rows
+                    if row["worker_pid"] == os.getpid()
+                    or not _process_alive(row["worker_pid"])]
+        failed = sum(self.fail(processing_id, error)
+                     for processing_id in orphaned)
+        if failed:
+            logger.warning("Failed %s submissions orphaned by a restart",
+                           failed)
+        return failed
+
+    def complete(self, processing_id: str,
+                 response: AnalysisResponse) -> bool:
+        """
+        Store a finished analysis and its per-check outcomes, mark the
+        submission completed and update the admin aggregates, all in one
+        transaction.
+        """
+        outcomes = check_outcomes(response)
+        now = time.time()
+        with self._transaction() as connection:
+            if not self._claim(connection, processing_id, [QUEUED, RUNNING],
+                               COMPLETED):
+                return False
+            connection.execute(
+                "UPDATE submissions SET status = ?, slide_count = ?, "
+                "result = ?, error = NULL, updated_at = ? "
+                "WHERE processing_id = ?",
+                (COMPLETED, response.file_analysis.number_of_slides,
+                 response.model_dump_json(), now, processing_id))
+            connection.executemany(
+                "INSERT OR REPLACE INTO check_outcomes "
+                "(processing_id, check_name, passed, message) "
+                "VALUES (?, ?, ?, ?)",
+                [(processing_id, name, int(passed), message)
+                 for name, passed, message in outcomes])
+            self._update_deck(connection, processing_id, now)
+        return True
+
+    @staticmethod
+    def _failed_checks(connection, processing_id: str) -> list:
+        return [row["check_name"] for row in connection.execute(
+            "SELECT check_name FROM check_outcomes "
+            "WHERE processing_id = ? AND passed = 0", (processing_id,))]
+
+    def _update_deck(self, connection, processing_id: str, now: float):
+        """
+        Make a completed submission its deck's latest, moving the deck and
+        check failure counters from the submission it replaces.
+        """
+        failed_checks = self._failed_checks(connection, processing_id)
+        ready = not failed_checks
+        row = connection.execute(
+            "SELECT COALESCE(submitter_email, processing_id) AS deck_key "
+            "FROM submissions WHERE processing_id = ?",
+            (processing_id,)).fetchone()
+        deck_key = row["deck_key"]
+        previous = connection.execute(
+            "SELECT processing_id, ready FROM decks WHERE deck_key = ?",
+            (deck_key,)).fetchone()
+        if previous is None:
+            self._bump(connection, "decks")
+            self._bump(connection, "decks_ready", int(ready))
+        else:
+            self._bump(connection, "decks_ready",
+                       int(ready) - previous["ready"])
+            previous_failed = self._failed_checks(
+                connection, previous["processing_id"])
+            for name in previous_failed:
+                self._bump(connection, f"check_failures:{name}", -1)
+            if previous_failed:
+                self._bump(connection, "submissions_failing_checks", -1)
+        for name in failed_checks:
+            self._bump(connection, f"check_failures:{name}")
+        if failed_checks:
+            self._bump(connection, "submissions_failing_checks")
+        connection.execute(
+            "INSERT OR REPLACE INTO decks "
+            "(deck_key, processing_id, ready, updated_at) "
+            "VALUES (?, ?, ?, ?)", (deck_key, processing_id, int(ready), now))
+
+    def get(self, processing_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            f"SELECT {SUBMISSION_COLUMNS} FROM submissions "
+            "WHERE processing_id = ?", (processing_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_result(self, processing_id: str) -> Optional[AnalysisResponse]:
+        row = self._connect().execute(
+            "SELECT result FROM submissions WHERE processing_id = ?",
+            (processing_id,)).fetchone()
+        if row is None or row["result"] is None:
+            return None
+        return AnalysisResponse.model_validate(json.loads(row["result"]))
+
+    def latest(self, status: str = COMPLETED) -> Optional[dict]:
+        """
+        Most recently created submission with the given status.
+        """
+        row = self._connect().execute(
+            f"SELECT {SUBMISSION_COLUMNS} FROM submissions "
+            "WHERE status = ? ORDER BY created_at DESC LIMIT 1",
+            (status,)).fetchone()
+        return dict(row) if row else None
+
+    def find_by_content_hash(self, content_hash: str) -> list:
+        rows = self._connect().execute(
+            f"SELECT {SUBMISSION_COLUMNS} FROM submissions "
+            "WHERE content_hash = ? ORDER BY created_at",
+            (content_hash,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def batch_submissions(self, batch_id: str) -> list:
+        """
+        Submissions of one bulk ingestion batch, in the order they were
+        queued.
+        """
+        rows = self._connect().execute(
+            f"SELECT {SUBMISSION_COLUMNS} FROM submissions "
+            "WHERE batch_id = ? ORDER BY created_at, rowid",
+            (batch_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_check_outcomes(self, processing_id: str) -> dict:
+        rows = self._connect().execute(
+            "SELECT check_name, passed, message FROM check_outcomes "
+            "WHERE processing_id = ?", (processing_id,)).fetchall()
+        return {row["check_name"]: {"passed": bool(row["passed"]),
+                                    "message": row["message"]}
+                for row in rows}
+
+    def put_prompt_check(self, name: str, prompt: str, scope: str,
+                         depends_on: list, enabled: bool = True):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO prompt_checks "
+            "(name, prompt, scope, depends_on, enabled, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (name, prompt, scope, json.dumps(depends_on), int(enabled),
+             time.time()))
+
+    def delete_prompt_check(self, name: str) -> bool:
+        cursor = self._connect().execute(
+            "DELETE FROM prompt_checks WHERE name = ?", (name,))
+        return cursor.rowcount > 0
+
+    def prompt_checks(self, enabled_only: bool = False) -> list:
+        rows = self._connect().execute(
+            "SELECT name, prompt, scope, depends_on, enabled "
+            "FROM prompt_checks "
+            + ("WHERE enabled = 1 " if enabled_only else "")
+            + "ORDER BY name").fetchall()
+        return [dict(row, depends_on=json.loads(row["depends_on"]),
+                     enabled=bool(row["enabled"]))
+                for row in rows]
+
+    def admin_counters(self) -> dict:
+        """
+        Every admin aggregate, read from the counters table in one query.
+        """
+        connection = self._connect()
+        counters = {row["name"]: row["value"] for row in connection.execute(
+            "SELECT name, value FROM admin_counters")}
+        if not counters and connection.execute(
+                "SELECT 1 FROM submissions LIMIT 1").fetchone():
+            # Registry written before the counters existed
+            self.rebuild_admin_counters()
+            return self.admin_counters()
+        return counters
+
+    def rebuild_admin_counters(self):
+        """
+        Recompute every aggregate from the submission tables.
+        """
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM admin_counters")
+            connection.execute("DELETE FROM decks")
+            rows = connection.execute(
+                "SELECT status, COUNT(*) AS count FROM submissions "
+                "GROUP BY status").fetchall()
+            for row in rows:
+                self._bump(connection, "submissions", row["count"])
+                self._bump(connection, f"status:{row['status']}",
+                           row["count"])
+            completed = connection.execute(
+                "SELECT processing_id FROM submissions WHERE status = ? "
+                "ORDER BY updated_at", (COMPLETED,)).fetchall()
+            for row in completed:
+                self._update_deck(connection, row["processing_id"],
+                                  time.time())
+
+    def failing_submissions(self, check_name: str, limit: int = 100,
+                            offset: int = 0) -> list:
+        """
+        Decks whose latest submission failed a check, newest first.
+        """
+        rows = self._connect().execute(
+            "SELECT s.processing_id, s.original_filename, s.submitter_name, "
+            "s.submitter_email, c.message, s.updated_at "
+            "FROM decks d JOIN check_outcomes c "
+            "ON c.processing_id = d.processing_id "
+            "JOIN submissions s ON s.processing_id = d.processing_id "
+            "WHERE c.check_name = ? AND c.passed = 0 "
+            "ORDER BY s.updated_at DESC LIMIT ? OFFSET ?",
+            (check_name, limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_submissions(self, limit: int = 100, offset: int = 0) -> list:
+        """
+        A page of submissions, newest first, each with the names of the
+        checks it failed.
+        """
+        rows = self._connect().execute(
+            "SELECT s.processing_id, s.original_filename, s.submitter_name, "
+            "s.submitter_email, s.status, s.error, s.created_at, "
+            "(SELECT GROUP_CONCAT(c.check_name) FROM check_outcomes c "
+            " WHERE c.processing_id = s.processing_id AND c.passed = 0) "
+            "AS failed_checks "
+            "FROM submissions s ORDER BY s.created_at DESC LIMIT ? OFFSET ?",
+            (limit, offset)).fetchall()
+        submissions = []
+        for row in rows:
+            submission = dict(row)
+            submission["failed_checks"] = (
+                row["failed_checks"].split(",") if row["failed_checks"]
+                else [])
+            submissions.append(submission)
+        return submissions
+
+    def admin_summary(self, expected_decks: int = None) -> dict:
+        """
+        Progress of the whole submission round from the maintained
+        counters: constant time however many submissions there are.
+        """
+        expected_decks = (ADMIN_EXPECTED_DECKS if expected_decks is None
+                          else expected_decks)
+        counters = self.admin_counters()
+        latest = self._connect().execute(
+            "SELECT MAX(created_at) AS created_at FROM submissions"
+        ).fetchone()["created_at"]
+
+        decks = counters.get("decks", 0)
+        decks_ready = counters.get("decks_ready", 0)
+        target = expected_decks or decks
+        decks_remaining = max(target - decks_ready, 0)
+        check_failures = {
+            name.split(":", 1)[1]: value for name, value in counters.items()
+            if name.startswith("check_failures:") and value}
+        return {
+            "admin_submission_status":
+            "complete" if target and not decks_remaining else "in_progress",
+            "submitted_at": time.strftime(
+                "%Y-%m-%dT%H:%M:%SZ", time.gmtime(latest)) if latest else "",
+            "errors": [{"check": name, "failures": value}
+                       for name, value in sorted(check_failures.items())],
+            "total_submissions": counters.get("submissions", 0),
+            "total_errors": (counters.get(f"status:{FAILED}", 0)
+                             + counters.get("submissions_failing_checks", 0)),
+            "decks_to_merge": decks_ready,
+            "decks_remaining": decks_remaining,
+            "status_counts": {
+                name.split(":", 1)[1]: value
+                for name, value in counters.items()
+                if name.startswith("status:")},
+            "check_failures": check_failures,
+        }
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+registry = Registry()
@@ -0,0 +1,344 @@
+# app/services/remote_decks.py
+
+import asyncio
+import logging
+import os
+import re
+import time
+from urllib.parse import quote, urlencode
+
+import fitz  # PyMuPDF
+import ijson
+
+from app.services.http_client import http_fetcher
+from app.services.pptx_converter import evict_pdf_cache
+
+logger = logging.getLogger("slide_analyzer")
+
+GOOGLE_DISCOVERY_URL = os.getenv(
+    "GOOGLE_DISCOVERY_URL",
+    "https://{api}.googleapis.com/$discovery/rest?version={version}")
+# Discovery documents change rarely; within this age the cached copy is
+# used without even a conditional request
+GOOGLE_DISCOVERY_MAX_AGE = float(os.getenv("GOOGLE_DISCOVERY_MAX_AGE",
+                                           "86400"))
+GOOGLE_SLIDES_EXPORT_URL = os.getenv(
+    "GOOGLE_SLIDES_EXPORT_URL",
+    "https://docs.google.com/presentation/d/{presentation_id}/export/pdf")
+FIGMA_API_URL = os.getenv("FIGMA_API_URL", "https://api.figma.com")
+REMOTE_DECK_CACHE_DIR = os.getenv("REMOTE_DECK_CACHE_DIR",
+                                  os.path.join("cache", "remote_decks"))
+REMOTE_DECK_CACHE_MAX_MB = float(os.getenv("REMOTE_DECK_CACHE_MAX_MB",
+                                           "1024"))
+REMOTE_DECK_CACHE_MAX_AGE_DAYS = float(
+    os.getenv("REMOTE_DECK_CACHE_MAX_AGE_DAYS", "30"))
+
+# Bytes of a Figma file handed to the JSON parser at a time
+FIGMA_READ_SIZE = 256 * 1024
+
+GOOGLE_SLIDES_URL = re.compile(
+    r'https://docs\.google\.com/presentation/d/([a-zA-Z0-9-_]+)')
+FIGMA_URL = re.compile(r'figma\.com/(?:design|file|slides|proto)/([^/?#]+)')
+
+
+class RemoteDeckError(Exception):
+    pass
+
+
+# Credentials are read on use, after main has loaded the .env file
+def google_headers() -> dict:
+    token = os.getenv("GOOGLE_ACCESS_TOKEN")
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def figma_headers() -> dict:
+    token = os.getenv("FIGMA_ACCESS_TOKEN")
+    return {"X-Figma-Token": token} if token else {}
+
+
+async def discovery_document(api: str, version: str) -> dict:
+    """
+    A Google API discovery document, from the local cache while it is
+    fresh and revalidated with a conditional request after that.
+    """
+    url = GOOGLE_DISCOVERY_URL.format(api=api, version=version)
+    return await http_fetcher.fetch_json(url,
+                                         max_age=GOOGLE_DISCOVERY_MAX_AGE)
+
+
+def method_url(document: dict, method_id: str, **params) -> str:
+    """
+    URL of a discovery document method, e.g. "slides.presentations.get",
+    with its path parameters filled in and the rest as the query string.
+    """
+    resources = document
+    *resource_names, method_name = method_id.split(".")[1:]
+    for name in resource_names:
+        resources = resources["resources"][name]
+    path = resources["methods"][method_name]["path"]
+
+    def expand(match):
+        name = match.group(2)
+        # {+name} is reserved expansion and keeps slashes
+        safe = "/" if match.group(1) else ""
+        return quote(str(params.pop(name)), safe=safe)
+
+    path = re.sub(r"\{(\+?)([^}]+)\}", expand, path)
+    url = document["rootUrl"] + document["servicePath"] + path
+    query = {name: value for name, value in params.items()
+             if value is not None}
+    return f"{url}?{urlencode(query)}" if query else url
+
+
+def summarize_google_presentation(presentation: dict) -> dict:
+    fonts_used = set()
+    video_present = False
+    for slide in presentation.get('slides', []):
+        for element in slide.get('pageElements', []):
+            if 'shape' in element and 'text' in element['shape']:
+                text_elements = element['shape']['text'].get(
+                    'textElements', [])
+                for te in text_elements:
+                    if 'textRun' in te and 'style' in te['textRun']:
+                        font_family = te['textRun']['style'].get('fontFamily')
+                        if font_family:
+                            fonts_used.add(font_family)
+            if 'video' in element:
+                video_present = True
+
+    return {
+        'number_of_slides': len(presentation.get('slides', [])),
+        'fonts_used': sorted(fonts_used),
+        'video_present': video_present,
+        # Audio is not exposed by the Slides API
+        'audio_present': False,
+        'version': presentation.get('revisionId'),
+    }
+
+
+async def analyze_google_slides(presentation_url: str) -> dict:
+    m = GOOGLE_SLIDES_URL.match(presentation_url)
+    if not m:
+        raise RemoteDeckError('Invalid Google Slides URL')
+    presentation_id = m.group(1)
+
+    document = await discovery_document('slides', 'v1')
+    url = method_url(document, 'slides.presentations.get',
+                     presentationId=presentation_id,
+                     key=os.getenv("GOOGLE_API_KEY"))
+    presentation = await http_fetcher.fetch_json(url, google_headers())
+    analysis = summarize_google_presentation(presentation)
+    analysis['presentation_id'] = presentation_id
+    return analysis
+
+
+class _Container:
+    """
+    One open JSON object or array while a Figma file is streamed: its role
+    in the document tree, the key being read (objects only) and the few
+    fields the analysis needs.
+    """
+    __slots__ = ("is_map", "role", "key", "fields", "child_ids")
+
+    def __init__(self, is_map: bool, role: str):
+        self.is_map = is_map
+        self.role = role
+        self.key = None
+        self.fields = {}
+        self.child_ids = None
+
+
+# Role of an object or array given its parent's role and key; anything not
+# listed is skipped without keeping any of its values
+_CHILD_ROLES = {
+    ("file", "document"): "node",
+    ("node", "children"): "children",
+    ("children", None): "node",
+    ("node", "style"): "style",
+    ("node", "interactions"): "interactions",
+    ("interactions", None): "interaction",
+    ("interaction", "actions"): "actions",
+    ("actions", None): "action",
+}
+_FIELDS = {
+    "file": ("version",),
+    "node": ("id", "type"),
+    "style": ("fontFamily",),
+    "action": ("type", "mediaAction"),
+}
+
+
+def summarize_figma_events(events) -> dict:
+    """
+    Summarize a Figma file from ijson basic_parse events, without building
+    the document. The top-level frames of the first page are the slides.
+
+    Only the chain of objects from the root to the current node is held,
+    so memory grows with tree depth rather than document size, and there
+    is no recursion to run out of.
+    """
+    slide_ids = None
+    fonts_used = set()
+    video_media_count = 0
+    version = None
+    stack = []
+    # Depth inside an object or array the analysis does not look at, which
+    # is skipped without tracking its contents
+    skipping = 0
+
+    for event, value in events:
+        if skipping:
+            if event == "start_map" or event == "start_array":
+                skipping += 1
+            elif event == "end_map" or event == "end_array":
+                skipping -= 1
+            continue
+        parent = stack[-1] if stack else None
+        if event == "map_key":
+            parent.key = value
+        elif event == "start_map" or event == "start_array":
+            if parent is None:
+                role = "file"
+            else:
+                role = _CHILD_ROLES.get(
+                    (parent.role, parent.key if parent.is_map else None))
+                if role is None:
+                    skipping = 1
+                    continue
+            container = _Container(event == "start_map", role)
+            if role == "node" and slide_ids is None:
+                # Only a page's children can become the slides
+                container.child_ids = []
+            stack.append(container)
+        elif event == "end_map" or event == "end_array":
+            container = stack.pop()
+            if container.role == "node":
+                fields = container.fields
+                node_type = fields.get("type")
+                if node_type == "CANVAS" and slide_ids is None:
+                    slide_ids = container.child_ids
+                # stack[-1] is the parent's children array
+                if len(stack) >= 2 and stack[-2].child_ids is not None:
+                    parent_node = stack[-2]
+                    if parent_node.fields.get("type") not in (None,
+                                                              "CANVAS"):
+                        parent_node.child_ids = None
+                    elif "id" in fields:
+                        parent_node.child_ids.append(fields["id"])
+            elif container.role == "style":
+                if "fontFamily" in container.fields:
+                    fonts_used.add(container.fields["fontFamily"])
+            elif container.role == "action":
+                if (container.fields.get("type") == "UPDATE_MEDIA_RUNTIME"
+                        and container.fields.get("mediaAction")
+                        == "TOGGLE_PLAY_PAUSE"):
+                    video_media_count += 1
+            elif container.role == "file":
+                version = container.fields.get("version")
+        elif parent.is_map and parent.key in _FIELDS.get(parent.role, ()):
+            parent.fields[parent.key] = value
+
+    slide_ids = slide_ids or []
+    return {
+        'number_of_slides': len(slide_ids),
+        'fonts_used': sorted(fonts_used),
+        'video_present': video_media_count > 0,
+        'video_media_count': video_media_count,
+        'audio_present': False,
+        'slide_ids': slide_ids,
+        'version': version,
+    }
+
+
+def summarize_figma_file(path: str) -> dict:
+    with open(path, "rb") as f:
+        return summarize_figma_events(
+            ijson.basic_parse(f, use_float=True, buf_size=FIGMA_READ_SIZE))
+
+
+async def analyze_figma(figma_url: str) -> dict:
+    m = FIGMA_URL.search(figma_url)
+    if not m:
+        raise RemoteDeckError('Invalid Figma URL format')
+    file_key = m.group(1)
+
+    # The body is streamed to the HTTP cache on disk and parsed from there
+    # incrementally; design files can run to hundreds of MB of JSON
+    result = await http_fetcher.fetch(f"{FIGMA_API_URL}/v1/files/{file_key}",
+                                      figma_headers())
+    analysis = await asyncio.to_thread(summarize_figma_file, result['path'])
+    analysis['file_key'] = file_key
+    return analysis
+
+
+async def download_google_slides_pdf(analysis: dict) -> str:
+    # The export is only downloaded again once the revision changes
+    url = GOOGLE_SLIDES_EXPORT_URL.format(
+        presentation_id=analysis['presentation_id'])
+    result = await http_fetcher.fetch(url, google_headers(),
+                                      version=analysis['version'])
+    return result['path']
+
+
+async def download_figma_pdf(analysis: dict) -> str:
+    """
+    Export every slide frame as PDF and combine them into one deck, cached
+    per file version within REMOTE_DECK_CACHE_MAX_MB and
+    REMOTE_DECK_CACHE_MAX_AGE_DAYS.
+    """
+    file_key, version = analysis['file_key'], analysis['version']
+    pdf_path = os.path.join(REMOTE_DECK_CACHE_DIR,
+                            f"figma-{file_key}-{version}.pdf")
+    if version and os.path.exists(pdf_path):
+        # Mark it as recently used for eviction, keeping its age
+        try:
+            os.utime(pdf_path, (time.time(), os.stat(pdf_path).st_mtime))
+        except OSError:
+            pass
+        return pdf_path
+    if not analysis['slide_ids']:
+        raise RemoteDeckError('Figma file has no slides to export')
+
+    query = urlencode({"ids": ",".join(analysis['slide_ids']),
+                       "format": "pdf"})
+    export = await http_fetcher.fetch_json(
+        f"{FIGMA_API_URL}/v1/images/{file_key}?{query}", figma_headers())
+    if export.get('err'):
+        raise RemoteDeckError(f"Figma export failed: {export['err']}")
+    frames = await asyncio.gather(*(
+        http_fetcher.fetch(export['images'][slide_id])
+        for slide_id in analysis['slide_ids']))
+
+    def combine():
+        os.makedirs(REMOTE_DECK_CACHE_DIR, exist_ok=True)
+        temp_path = f"{pdf_path}.part"
+        with fitz.open() as deck:
+            for frame in frames:
+                with fitz.open(frame['path'], filetype="pdf") as source:
+                    deck.insert_pdf(source)
+            deck.save(temp_path, garbage=3, deflate=True)
+        # Evicted before the new deck lands, so it is kept
+        evict_pdf_cache(REMOTE_DECK_CACHE_DIR, REMOTE_DECK_CACHE_MAX_MB,
+                        REMOTE_DECK_CACHE_MAX_AGE_DAYS)
+        os.replace(temp_path, pdf_path)
+
+    await asyncio.to_thread(combine)
+    return pdf_path
+
+
+async def fetch_remote_deck(url: str, file_format: str) -> dict:
+    """
+    Analyze a deck hosted on Google Slides or Figma and download it as a
+    PDF. Returns {"analysis", "pdf_path"}.
+    """
+    if file_format == 'google_slides':
+        analysis = await analyze_google_slides(url)
+        pdf_path = await download_google_slides_pdf(analysis)
+    elif file_format == 'figma':
+        analysis = await analyze_figma(url)
+        pdf_path = await download_figma_pdf(analysis)
+    else:
+        raise RemoteDeckError(f"Unsupported remote deck format: {file_format}")
+    logger.info("Fetched %s deck %s (version %s)", file_format, url,
+                analysis.get('version'))
+    return {"analysis": analysis, "pdf_path": pdf_path}
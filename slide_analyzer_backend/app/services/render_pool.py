@@ -0,0 +1,83 @@
+# app/services/render_pool.py
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+from app.metrics import record_stage, span
+from app.utils.file_analyzers import render_pdf_page_range
+
+logger = logging.getLogger("slide_analyzer")
+
+# Worker processes used for rasterization; 0 renders in a thread instead
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 1)))
+# Pages handed to a worker at a time. Each task reopens the document, so
+# very small ranges waste time parsing it over and over.
+RENDER_PAGES_PER_TASK = int(os.getenv("RENDER_PAGES_PER_TASK", "8"))
+
+_executor = None
+
+
+def get_render_executor():
+    global _executor
+    if _executor is None and RENDER_WORKERS > 0:
+        # spawn: the API process runs threads (event loop, HTTP clients)
+        # that must not be duplicated by fork
+        _executor = ProcessPoolExecutor(
+            max_workers=RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"))
+        logger.info("Started render pool with %s workers", RENDER_WORKERS)
+    return _executor
+
+
+def shutdown_render_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def page_ranges(page_count, pages_per_task):
+    return [(start, min(start + pages_per_task, page_count))
+            for start in range(0, page_count, pages_per_task)]
+
+
+def _page_count(file_path):
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+async def render_pdf(file_path, profiles=None, executor=None,
+                     pages_per_task=RENDER_PAGES_PER_TASK):
+    """
+    Render every page of a PDF off the event loop.
+
+    Page ranges are sharded across the render process pool; each worker
+    opens the document itself and sends back its pages with renditions as
+    encoded bytes. Pages are returned in document order. The time workers
+    spent rasterizing and encoding is recorded per page as stage timings.
+    """
+    executor = executor or get_render_executor()
+    with span("render"):
+        if executor is None:
+            pages = await asyncio.to_thread(render_pdf_page_range, file_path,
+                                            0, None, profiles)
+        else:
+            # Workers keep the working directory they were started in
+            file_path = os.path.abspath(file_path)
+            page_count = await asyncio.to_thread(_page_count, file_path)
+            loop = asyncio.get_running_loop()
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(executor, render_pdf_page_range,
+                                     file_path, start, stop, profiles)
+                for start, stop in page_ranges(page_count, pages_per_task)))
+            pages = [page for chunk in chunks for page in chunk]
+    # Measured in the workers, page by page
+    for page in pages:
+        for stage, seconds in page['timings'].items():
+            record_stage(stage, seconds)
+    return pages
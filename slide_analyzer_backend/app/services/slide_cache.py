@@ -0,0 +1,142 @@
+# app/services/slide_cache.py
+
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+from app.utils.image_hashing import HASH_FUNCTIONS, hamming_distances
+
+logger = logging.getLogger("slide_analyzer")
+
+# A 64-bit perceptual hash cannot see small text changes: two slides of
+# one template with 3 and 5 bullets are 4 dHash bits apart. Only identical
+# renderings share a result unless "phash" is chosen, and then with a
+# threshold of 2 at most.
+SLIDE_HASH_ALGORITHM = os.getenv("SLIDE_HASH_ALGORITHM", "exact")
+# Slides whose hashes differ in at most this many of 64 bits share a result
+SLIDE_HASH_THRESHOLD = int(os.getenv("SLIDE_HASH_THRESHOLD", "0"))
+SLIDE_CACHE_MAX_ENTRIES = int(os.getenv("SLIDE_CACHE_MAX_ENTRIES", "20000"))
+SLIDE_CACHE_PATH = os.getenv("SLIDE_CACHE_PATH",
+                             os.path.join("cache", "slide_hashes.jsonl"))
+
+
+class SlideHashCache:
+    """
+    Slide-level analysis cache keyed by perceptual hash.
+
+    Lookups return the analysis of the closest known slide if it is within
+    `threshold` bits, so repeated template slides (title, section divider,
+    closing slide) skip the vision call. Entries are appended to a
+    JSON-lines file tagged with the config fingerprint, and the oldest are
+    dropped once max_entries is reached.
+    """
+
+    def __init__(self,
+                 fingerprint: str,
+                 path: Optional[str] = SLIDE_CACHE_PATH,
+                 algorithm: str = SLIDE_HASH_ALGORITHM,
+                 threshold: int = SLIDE_HASH_THRESHOLD,
+                 max_entries: int = SLIDE_CACHE_MAX_ENTRIES):
+        self.fingerprint = fingerprint
+        self.path = path
+        self.hash_function = HASH_FUNCTIONS[algorithm]
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._analyses = []
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def hash_image(self, image_data) -> int:
+        return self.hash_function(image_data)
+
+    def lookup(self, image_hash: int) -> Optional[dict]:
+        with self._lock:
+            if not self._analyses:
+                self.misses += 1
+                return None
+            distances = hamming_distances(self._hashes, image_hash)
+            best = int(np.argmin(distances))
+            if distances[best] > self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(self._analyses[best])
+
+    def add(self, image_hash: int, analysis: dict):
+        with self._lock:
+            self._append(image_hash, analysis)
+            trimmed = len(self._analyses) > self.max_entries
+            if trimmed:
+                # Drop the oldest tenth at once so trims stay rare
+                keep = self.max_entries - self.max_entries // 10
+                self._hashes = self._hashes[-keep:]
+                self._analyses = self._analyses[-keep:]
+            self._persist(image_hash, analysis, rewrite=trimmed)
+
+    def __len__(self):
+        return len(self._analyses)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._analyses),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _append(self, image_hash, analysis):
+        self._hashes = np.append(self._hashes, np.uint64(image_hash))
+        self._analyses.append(analysis)
+
+    def _record(self, image_hash, analysis):
+        return json.dumps({
+            "algorithm": self.algorithm,
+            "fingerprint": self.fingerprint,
+            "hash": image_hash,
+            "analysis": analysis,
+        }) + "\n"
+
+    def _persist(self, image_hash, analysis, rewrite=False):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if rewrite:
+                temp_path = f"{self.path}.part"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    for cached_hash, cached in zip(self._hashes,
+                                                   self._analyses):
+                        f.write(self._record(int(cached_hash), cached))
+                os.replace(temp_path, self.path)
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(self._record(image_hash, analysis))
+        except OSError as e:
+            logger.warning("Could not persist slide cache: %s", e)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if (record.get("fingerprint") == self.fingerprint
+                        and record.get("algorithm") == self.algorithm):
+                    self._append(record["hash"], record["analysis"])
+        if len(self._analyses) > self.max_entries:
+            self._hashes = self._hashes[-self.max_entries:]
+            self._analyses = self._analyses[-self.max_entries:]
+        logger.info("Loaded %s cached slide analyses", len(self._analyses))
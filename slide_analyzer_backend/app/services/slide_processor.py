@@ -1,27 +1,64 @@
 import os
+import asyncio
 import logging
-import traceback
 from urllib.parse import urlparse
-import io
-from PIL import Image  # Add this import
-from pdf2image import convert_from_path  # For PDF files
-from pptx import Presentation  # For PPTX files
-
-from app.utils.deterministic_checks import format_check, size_check, slide_count_check
-from app.utils.file_analyzers import (analyze_pptx, analyze_pdf,
-                                      analyze_markdown, analyze_keynote,
-                                      analyze_google_slides, analyze_canva,
-                                      analyze_figma)
-from app.utils.probabilistic_checks import analyze_slide_image
+import shutil
+from typing import Callable, Optional
+
+from app.utils.deterministic_checks import (format_check, size_check,
+                                            slide_count_check, ALLOWED_FORMATS,
+                                            SIZE_LIMIT_MB, MAX_SLIDES)
+from app.utils.file_analyzers import analyze_markdown, analyze_canva
+from app.utils.keynote_package import analyze_keynote_package
+from app.utils.preflight import count_slides
+from app.utils.probabilistic_checks import (analyze_slide_images,
+                                            SLIDE_ANALYSIS_PROMPT,
+                                            SUBJECTIVE_ANALYSIS_PROMPT,
+                                            BATCH_SLIDE_ANALYSIS_PROMPT,
+                                            BATCH_SUBJECTIVE_ANALYSIS_PROMPT,
+                                            VISION_MODEL, VisionUsage,
+                                            PROMPT_CHECK_KEYS,
+                                            SLIDE_ANALYSIS_KEYS,
+                                            SUBJECTIVE_ANALYSIS_KEYS,
+                                            prompt_check_templates)
+from app.utils.pptx_package import analyze_pptx_package
+from app.utils.structural_classifier import (
+    classify_pptx, CLASSIFIER_VERSION, STRUCTURAL_CONFIDENCE_THRESHOLD,
+    STRUCTURAL_SUBJECTIVE_CHECKS)
+from app.services.analysis_cache import (analysis_cache, hash_file,
+                                         config_fingerprint)
+from app.services.slide_cache import SlideHashCache
+from app.services.render_pool import render_pdf, get_render_executor
+from app.services.pptx_converter import convert_pptx_to_pdf
+from app.services.remote_decks import fetch_remote_deck
+from app.services.registry import registry
+from app.services.check_engine import (CheckGraph, GraphRun, Step, IO,
+                                       MODEL, RENDER)
+from app.utils.render_profiles import RENDER_PROFILES, profiles_fingerprint
+from app.logging_config import bind_processing_id
+from app.metrics import DECKS, SLIDES, span, stage_timings
 from app.models.schemas import (FileAnalysisResult, DeterministicCheckResult,
                                 ProbabilisticCheckResult, SlideAnalysis,
-                                AnalysisResponse, TitleSlideCheck, ImageCheck,
-                                BulletPointCheck)
+                                AnalysisResponse, SlideCacheReport,
+                                StageTiming, CheckRun)
 from pydantic import ValidationError
 
 # Get the logger
 logger = logging.getLogger("slide_analyzer")
 
+MAX_BULLET_POINTS = 10  # Adjust as needed
+
+REQUIRED_ANALYSIS_KEYS = list(SLIDE_ANALYSIS_KEYS)
+
+# Formats rendered from a LibreOffice PDF export, whose slide count comes
+# from the package
+PACKAGE_FORMATS = ['pptx', '.pptx', 'key', '.key']
+
+# Renditions written to disk for the UI; the model input stays in memory
+STORED_PROFILES = [name for name in RENDER_PROFILES if name != 'model']
+
+_slide_cache = None
+
 
 def is_url(path):
     try:
@@ -31,200 +68,724 @@ def is_url(path):
         return False
 
 
+def analysis_fingerprint(prompt_checks=()) -> str:
+    """
+    Fingerprint everything that can change the result for identical input,
+    including the enabled admin-defined prompt checks.
+    """
+    return config_fingerprint({
+        "allowed_formats": ALLOWED_FORMATS,
+        "size_limit_mb": SIZE_LIMIT_MB,
+        "max_slides": MAX_SLIDES,
+        "max_bullet_points": MAX_BULLET_POINTS,
+        "vision_model": VISION_MODEL,
+        "prompt": SLIDE_ANALYSIS_PROMPT,
+        "render_profiles": profiles_fingerprint(RENDER_PROFILES),
+        "structural_classifier": {
+            "version": CLASSIFIER_VERSION,
+            "threshold": STRUCTURAL_CONFIDENCE_THRESHOLD,
+            "subjective_checks": STRUCTURAL_SUBJECTIVE_CHECKS,
+            "subjective_prompt": SUBJECTIVE_ANALYSIS_PROMPT,
+        },
+        "batch_prompts": [BATCH_SLIDE_ANALYSIS_PROMPT,
+                          BATCH_SUBJECTIVE_ANALYSIS_PROMPT],
+        # PPTX fonts include resolved theme fonts
+        "pptx_analyzer": "package",
+        # Slide counts are checked, and gate rendering
+        "checks": "graph",
+        "prompt_checks": [[check['name'], check['prompt'], check['scope'],
+                           check['depends_on']] for check in prompt_checks],
+    })
+
+
+def get_slide_cache() -> SlideHashCache:
+    """
+    Return the process-wide perceptual-hash slide cache, loading it on first
+    use. Only the model and prompt affect a single slide's analysis.
+    """
+    global _slide_cache
+    if _slide_cache is None:
+        _slide_cache = SlideHashCache(config_fingerprint({
+            "vision_model": VISION_MODEL,
+            "prompt": SLIDE_ANALYSIS_PROMPT,
+        }))
+    return _slide_cache
+
+
+def structural_analysis(structure: dict) -> dict:
+    return {key: structure[key] for key in REQUIRED_ANALYSIS_KEYS}
+
+
+async def analyze_slides_with_cache(slide_images, structures=None,
+                                    on_result=None, usage=None):
+    """
+    Analyze slides, answering what the text layer can from `structures`
+    and reusing earlier results for near-identical slides.
+
+    Slides classified with enough confidence skip the vision model
+    entirely, or with STRUCTURAL_SUBJECTIVE_CHECKS=vision only get the
+    subjective questions. Returns the analyses in slide order, the deck's
+    SlideCacheReport and the VisionUsage of its model requests, which are
+    added to `usage` when given.
+    on_result(slide_number, analysis) is called as each slide is resolved.
+    """
+    def resolved(slide_number, analysis):
+        if on_result is not None:
+            on_result(slide_number, analysis)
+
+    structures = structures or [None] * len(slide_images)
+    confident = [structure is not None and
+                 structure['confidence'] >= STRUCTURAL_CONFIDENCE_THRESHOLD
+                 for structure in structures]
+    analyses = [None] * len(slide_images)
+    structural = 0
+    usage = VisionUsage() if usage is None else usage
+
+    if STRUCTURAL_SUBJECTIVE_CHECKS == 'local':
+        for i, structure in enumerate(structures):
+            if confident[i]:
+                analyses[i] = structural_analysis(structure)
+                structural += 1
+                resolved(i + 1, analyses[i])
+
+    slide_cache = get_slide_cache()
+    pending = [i for i, analysis in enumerate(analyses) if analysis is None]
+    slide_hashes = dict(zip(pending, await asyncio.to_thread(
+        lambda: [slide_cache.hash_image(slide_images[i]) for i in pending])))
+    for i in pending:
+        analyses[i] = slide_cache.lookup(slide_hashes[i])
+        if analyses[i] is not None:
+            resolved(i + 1, analyses[i])
+    misses = [i for i in pending if analyses[i] is None]
+
+    full = [i for i in misses if not confident[i]]
+    fresh_analyses = await analyze_slide_images(
+        [slide_images[i] for i in full],
+        slide_numbers=[i + 1 for i in full],
+        media_type=RENDER_PROFILES['model'].media_type,
+        on_result=on_result,
+        usage=usage)
+    for i, analysis in zip(full, fresh_analyses):
+        analyses[i] = analysis
+        if all(key in analysis for key in REQUIRED_ANALYSIS_KEYS):
+            slide_cache.add(slide_hashes[i], analysis)
+
+    # Structural fields stay local; a failed subjective call falls back to
+    # the heuristics
+    subjective = [i for i in misses if confident[i]]
+
+    def merge(slide_number, answer):
+        i = slide_number - 1
+        analyses[i] = structural_analysis(structures[i])
+        analyses[i].update(
+            (key, answer[key]) for key in
+            ('adheres_to_best_practices', 'suggestions') if key in answer)
+        resolved(slide_number, analyses[i])
+
+    if subjective:
+        await analyze_slide_images(
+            [slide_images[i] for i in subjective],
+            slide_numbers=[i + 1 for i in subjective],
+            media_type=RENDER_PROFILES['model'].media_type,
+            on_result=merge,
+            prompt_template=SUBJECTIVE_ANALYSIS_PROMPT,
+            batch_prompt_template=BATCH_SUBJECTIVE_ANALYSIS_PROMPT,
+            required_keys=SUBJECTIVE_ANALYSIS_KEYS,
+            usage=usage)
+        structural += len(subjective)
+
+    hits = len(pending) - len(misses)
+    report = SlideCacheReport(
+        hits=hits,
+        misses=len(misses),
+        hit_rate=hits / len(slide_images) if slide_images else 0.0,
+        structural=structural)
+    SLIDES.inc(hits, source="slide_cache")
+    SLIDES.inc(structural, source="text_layer")
+    SLIDES.inc(len(full), source="vision")
+    # Slides only asked the subjective questions count as classified from
+    # the text layer, in the log as in SLIDES
+    logger.info("Slide cache: %s/%s slides reused, %s classified from the "
+                "text layer, %s analyzed by the vision model", hits,
+                len(slide_images), structural, len(full))
+    for mode in usage.report():
+        logger.info("Vision usage (%s): %s requests, %s tokens and %ss per "
+                    "slide", mode['mode'], mode['requests'],
+                    mode['tokens_per_slide'], mode['seconds_per_slide'])
+    return analyses, report, usage
+
+
+def publish_deterministic_checks(deterministic_checks, publish):
+    for name, check in deterministic_checks:
+        publish("deterministic_check", {"name": name,
+                                        "result": check.model_dump()})
+
+
+def publish_response(response: AnalysisResponse, publish):
+    """
+    Replay the progress events of an already finished analysis.
+    """
+    publish_deterministic_checks(response.deterministic_checks, publish)
+    publish("file_analysis",
+            dict(response.file_analysis.model_dump(),
+                 rendered_slides=rendered_slide_count(response)))
+    for slide in response.probabilistic_checks.slide_analyses:
+        publish("slide_analysis", {"slide_number": slide.slide_number,
+                                   "analysis": slide.analysis})
+
+
+def restore_cached_slide_images(source_processing_id: str,
+                                processing_id: str,
+                                slide_count: int) -> bool:
+    """
+    Make the slide images of a cached result available under a new
+    processing ID, hard-linking where the filesystem allows it.
+    """
+    for slide_number in range(1, slide_count + 1):
+        for profile in STORED_PROFILES:
+            source = slide_image_path(source_processing_id, slide_number,
+                                      profile)
+            if not os.path.exists(source):
+                return False
+            target = get_slide_image_path(processing_id, slide_number,
+                                          profile)
+            try:
+                os.link(source, target)
+            except FileExistsError:
+                pass
+            except OSError:
+                shutil.copyfile(source, target)
+    return True
+
+
 async def process_slide_deck(input_path: str,
                              processing_id: str,
-                             deck_format: str) -> AnalysisResponse:
-    logger.info(f"Starting to process slide deck: {input_path}")
-    try:
-        # Step 1: Format Identification
-        is_file = os.path.isfile(input_path)
-        is_url_path = is_url(input_path)
+                             deck_format: str,
+                             content_hash: Optional[str] = None,
+                             on_progress: Optional[
+                                 Callable[[str, dict], None]] = None,
+                             include_timings: bool = False
+                             ) -> AnalysisResponse:
+    """
+    Run every check on a slide deck and build the AnalysisResponse.
 
-        logger.debug(f"Is file: {is_file}, Is URL: {is_url_path}")
+    If on_progress is given it is called with (event, data) as each stage
+    finishes: one "deterministic_check" per check, "file_analysis" once the
+    deck has been parsed, and one "slide_analysis" per slide.
 
-        if not is_file and not is_url_path:
-            logger.error(f"Invalid input: {input_path}")
-            return None
+    Every stage is timed into the stage histogram; with include_timings
+    the per-stage breakdown of this run is attached to the response.
+    """
+    with bind_processing_id(processing_id), stage_timings() as timings:
+        with span("deck"):
+            response = await analyze_deck(input_path, processing_id,
+                                          deck_format, content_hash,
+                                          on_progress)
+    DECKS.inc(format=deck_format,
+              outcome="failed" if response is None else "completed")
+    if response is not None and include_timings:
+        response = response.model_copy(
+            update={"timings": [StageTiming(**timing)
+                                for timing in timings.report()]})
+    return response
+
+
+def rendered_slide_count(response: AnalysisResponse) -> int:
+    """
+    Number of slides with stored images: none when a gating check failed
+    before rendering.
+    """
+    if response.rendered_slides is not None:
+        return response.rendered_slides
+    # Analyses cached before the rendered count was recorded
+    if response.skipped_stages and "slide_images" in response.skipped_stages:
+        return 0
+    return response.file_analysis.number_of_slides
+
+
+def save_slide_images(processing_id: str, pages: list):
+    for page in pages:
+        for profile in STORED_PROFILES:
+            image_path = get_slide_image_path(processing_id,
+                                              page['page_number'], profile)
+            with open(image_path, 'wb') as f:
+                f.write(page['images'][profile])
+            logger.debug("Saved slide image: %s", image_path)
 
-        # Determine format
+
+def summarize_analyses(analyses: list) -> dict:
+    """
+    The complete slide analyses of a deck and the totals the probabilistic
+    checks are decided on.
+    """
+    summary = {"slide_analyses": [], "title_slide_present": False,
+               "total_bullet_points": 0, "total_images": 0}
+    for slide_number, analysis in enumerate(analyses, start=1):
+        # Check if analysis contains required keys
+        if not all(key in analysis for key in REQUIRED_ANALYSIS_KEYS):
+            logger.error("Analysis for slide %s is incomplete. Skipping.",
+                         slide_number)
+            continue
+        summary["slide_analyses"].append(
+            SlideAnalysis(slide_number=slide_number, analysis=analysis))
+        if analysis.get('is_title_slide'):
+            summary["title_slide_present"] = True
+        summary["total_bullet_points"] += analysis.get('bullet_points', 0)
+        summary["total_images"] += analysis.get('images', 0)
+    return summary
+
+
+def title_slide_result(summary: dict) -> dict:
+    present = summary["title_slide_present"]
+    return {"has_title_slide": present,
+            "message": "Title slide is present."
+            if present else "Title slide is missing."}
+
+
+def bullet_point_result(summary: dict) -> dict:
+    total = summary["total_bullet_points"]
+    return {"has_few_bullet_points": total <= MAX_BULLET_POINTS,
+            "message": f"Total bullet points: {total}."}
+
+
+def image_result(summary: dict) -> dict:
+    total = summary["total_images"]
+    return {"has_images": total > 0, "image_count": total,
+            "message": f"Total images: {total}."}
+
+
+def skipped_check_result(name: str, reason: str) -> dict:
+    """
+    What a check that did not run reports; it does not pass.
+    """
+    message = f"Skipped because {reason}."
+    return {
+        "slide_count_check": {"slide_count_within_limit": False,
+                              "slide_count": 0, "message": message},
+        "title_slide_check": {"has_title_slide": False, "message": message},
+        "bullet_point_check": {"has_few_bullet_points": False,
+                               "message": message},
+        "image_check": {"has_images": False, "image_count": 0,
+                        "message": message},
+    }[name]
+
+
+def check_result(name: str, run: GraphRun) -> dict:
+    if name in run.results:
+        return run.results[name]
+    reason = run.skip_reasons.get(name, f"{run.failed_gate} failed")
+    return skipped_check_result(name, reason)
+
+
+def prompt_check_result(check: dict, answers: list) -> dict:
+    """
+    Decide an admin-defined check from the model's per-slide answers;
+    slides it did not answer usably are left out.
+    """
+    verdicts = {slide_number: answer
+                for slide_number, answer in enumerate(answers, start=1)
+                if isinstance(answer, dict)
+                and isinstance(answer.get('passed'), bool)}
+    if not verdicts:
+        return {"passed": False,
+                "message": "The model gave no usable answer."}
+    passing = [n for n, answer in verdicts.items() if answer['passed']]
+    failing = [n for n, answer in verdicts.items() if not answer['passed']]
+    if check['scope'] == 'any_slide':
+        if not passing:
+            return {"passed": False, "message": "Not met on any slide."}
+        return {"passed": True,
+                "message": f"Met on slide {passing[0]}: "
+                           f"{verdicts[passing[0]].get('reason', '')}"}
+    if failing:
+        slides = ", ".join(str(n) for n in failing)
+        return {"passed": False,
+                "message": f"Not met on slides {slides}. Slide "
+                           f"{failing[0]}: "
+                           f"{verdicts[failing[0]].get('reason', '')}"}
+    return {"passed": True, "message": "Met on every slide."}
+
+
+def is_complete_run(run: GraphRun, usage: VisionUsage) -> bool:
+    """
+    Whether a deck's run came out whole: no stage skipped, no model request
+    failed and every rendered slide has a complete analysis. Anything less
+    may be a passing outage and is not worth caching.
+    """
+    pages = run.results.get("slide_images")
+    summary = run.results.get("slide_summary")
+    return (not run.skipped_stages() and usage.failures == 0
+            and pages is not None and summary is not None
+            and len(summary["slide_analyses"]) == len(pages))
+
+
+def file_analysis_result(file_format: str, run: GraphRun
+                         ) -> FileAnalysisResult:
+    """
+    Deck metadata from the analyze step, completed with what rendering
+    found when it ran.
+    """
+    metadata = run.results.get("analyze") or {}
+    pages = run.results.get("slide_images")
+    number_of_slides = metadata.get('number_of_slides', 0)
+    fonts_used = set(metadata.get('fonts_used', []))
+    video_present = metadata.get('video_present', False)
+    audio_present = metadata.get('audio_present', False)
+    if pages is not None and file_format not in PACKAGE_FORMATS:
+        number_of_slides = len(pages)
+    if pages is not None and file_format in ['pdf', '.pdf']:
+        # One PyMuPDF pass found fonts and media flags with the images
+        for page in pages:
+            fonts_used.update(page['fonts'])
+            video_present = video_present or page['video_present']
+            audio_present = audio_present or page['audio_present']
+    return FileAnalysisResult(number_of_slides=number_of_slides,
+                              fonts_used=sorted(fonts_used),
+                              video_present=video_present,
+                              audio_present=audio_present)
+
+
+def deck_steps(input_path: str, file_format: str, is_file: bool,
+               content_hash: Optional[str], processing_id: str,
+               usage: VisionUsage, on_slide=None,
+               prompt_checks=()) -> list:
+    """
+    The checks of a deck and the stages they need, for a CheckGraph.
+
+    format_check and size_check gate reading the deck at all;
+    slide_count_check, which reads the slide count from the file's headers
+    as preflight does, gates conversion, rendering and model calls. Slide
+    images are saved while the model looks at them, and admin-defined
+    prompt checks run beside the slide analysis. Formats without an
+    analyzer get the first two gates alone.
+    """
+    def run_format_check(results):
         if is_file:
-            format_result = format_check(input_path)
-            file_format = format_result['file_type']
-            logger.info(f"File format determined: {file_format}")
-        else:
-            # For URLs, we need to determine the format based on the URL structure
-            if 'docs.google.com' in input_path:
-                file_format = 'google_slides'
-            elif 'figma.com' in input_path:
-                file_format = 'figma'
-            elif 'canva.com' in input_path:
-                file_format = 'canva'
-            else:
-                logger.error(f"Unsupported URL format: {input_path}")
-                return None
-            logger.info(f"URL format determined: {file_format}")
-
-        # Step 2: Deterministic Checks
-        logger.info("Performing deterministic checks")
-        deterministic_checks = DeterministicCheckResult(
-            format_check=format_check(input_path) if is_file else {
-                "accepted_format": True,
-                "file_type": file_format,
-                "message": "URL format accepted"
-            },
-            size_check=size_check(
-                os.path.getsize(input_path) / (1024 * 1024))
-            if is_file else {
-                "size_within_limit": True,
-                "file_size_mb": 0,
-                "message": "Size check not applicable for URLs"
-            },
-            slide_count_check={
-                "slide_count_within_limit": True,
-                "slide_count": 0,
-                "message":
-                "Slide count will be determined in detailed analysis"
-            })
-        logger.debug(f"Deterministic checks result: {deterministic_checks}")
-
-        # Step 3: Detailed File Analysis and Slide Image Generation
-        logger.info(
-            f"Starting detailed file analysis for format: {file_format}")
-
-        slide_images = []
-
-        if file_format in ['pdf', '.pdf']:
-            # Extract slides from PDF
-            slides = convert_from_path(input_path)
-            total_slides = len(slides)
-
-            for i, slide in enumerate(slides):
-                slide_number = i + 1
-                image_buffer = io.BytesIO()
-                slide.save(image_buffer, format='PNG')
-                slide_images.append(image_buffer.getvalue())
-                logger.debug(f"Processed slide image {slide_number}")
-
-        elif file_format in ['pptx', '.pptx']:
-            # Extract slides from PPTX
-            prs = Presentation(input_path)
-            total_slides = len(prs.slides)
-
-            for i, slide in enumerate(prs.slides):
-                slide_number = i + 1
-                image_path = get_slide_image_path(input_path, slide_number)
-                # Convert slide to image (requires additional tools like `python-pptx` and `Pillow`)
-                # This is a placeholder for actual slide image extraction logic
-                # You might need to use `pptx2png` or other methods to convert slides to images
-                # Example using `slide.shapes` and `Pillow` to render image
-                # Since `python-pptx` does not support slide rendering, consider using `comtypes` on Windows
-                logger.warning(
-                    "Slide image extraction for PPTX is not implemented.")
-                # Save placeholder image
-                Image.new('RGB', (1280, 720),
-                          color='gray').save(image_path)
-                logger.debug(
-                    f"Saved placeholder slide image: {image_path}")
-
-        else:
-            logger.error(
-                f"Unsupported file format for slide image extraction: {
-                    file_format}"
-            )
-            return None
+            return format_check(input_path)
+        return {"accepted_format": True, "file_type": file_format,
+                "message": "URL format accepted"}
 
-        # Step 4: Probabilistic Checks using GPT-4 on slide images
-        logger.info("Starting probabilistic checks")
-        probabilistic_checks = []
-        title_slide_present = False
-        total_bullet_points = 0
-        total_images = 0
-
-        for index, image_data in enumerate(slide_images):
-            slide_number = index + 1
-            logger.debug(f"Analyzing slide image {slide_number}")
-
-            # Call your analysis function
-            analysis = await analyze_slide_image(image_data, slide_number)
-
-            # Check if analysis contains required keys
-            required_keys = [
-                'is_title_slide', 'bullet_points', 'images',
-                'adheres_to_best_practices', 'suggestions'
-            ]
-            if all(key in analysis for key in required_keys):
-                probabilistic_checks.append(
-                    SlideAnalysis(slide_number=slide_number,
-                                  analysis=analysis))
-
-                # Aggregate data for checks
-                if analysis.get('is_title_slide'):
-                    title_slide_present = True
-                total_bullet_points += analysis.get('bullet_points', 0)
-                total_images += analysis.get('images', 0)
-            else:
-                logging.error(
-                    f"Analysis for slide {
-                        slide_number} is incomplete. Skipping."
-                )
+    def run_size_check(results):
+        if is_file:
+            return size_check(os.path.getsize(input_path) / (1024 * 1024))
+        return {"size_within_limit": True, "file_size_mb": 0,
+                "message": "Size check not applicable for URLs"}
+
+    gates = ("format_check", "size_check")
+    steps = [
+        Step("format_check", run_format_check, gate=True,
+             passed=lambda result: result['accepted_format']),
+        Step("size_check", run_size_check, gate=True,
+             passed=lambda result: result['size_within_limit']),
+    ]
+
+    # analyze yields the deck's metadata and count_step the slide count
+    # slide_count_check needs
+    count_step = "analyze"
+    if file_format in ['pdf', '.pdf']:
+        def run_analyze(results):
+            return asyncio.to_thread(
+                lambda: {'number_of_slides': count_slides(input_path,
+                                                          file_format)})
+    elif file_format in ['pptx', '.pptx']:
+        # Fonts and media straight from the package XML, sharded over the
+        # render pool
+        def run_analyze(results):
+            return asyncio.to_thread(analyze_pptx_package, input_path, True,
+                                     get_render_executor())
+
+        # The slide list alone, so the gate does not wait for every
+        # slide's XML to be scanned
+        count_step = "count_slides"
+        steps.append(Step(
+            "count_slides",
+            lambda results: asyncio.to_thread(
+                lambda: {'number_of_slides': count_slides(input_path,
+                                                          file_format)}),
+            depends_on=gates, cost=IO))
+    elif file_format in ['key', '.key']:
+        # The package is streamed for its metadata; LibreOffice imports
+        # Keynote as well
+        def run_analyze(results):
+            return asyncio.to_thread(analyze_keynote_package, input_path)
+    elif file_format in ['google_slides', 'figma']:
+        # Metadata comes from the service's API; the deck itself is
+        # exported to PDF, downloaded again only when it has changed, and
+        # rendered like an upload
+        async def run_analyze(results):
+            remote = await fetch_remote_deck(input_path, file_format)
+            return dict(remote['analysis'], pdf_path=remote['pdf_path'])
+    else:
+        return steps
+
+    steps += [
+        Step("analyze", run_analyze, depends_on=gates, cost=IO),
+        Step("slide_count_check",
+             lambda results: slide_count_check(
+                 results[count_step]['number_of_slides']),
+             depends_on=(count_step,), gate=True,
+             passed=lambda result: result['slide_count_within_limit']),
+    ]
+    render_after = ("analyze",)
+    if file_format in PACKAGE_FORMATS:
+        steps.append(Step(
+            "convert",
+            lambda results: convert_pptx_to_pdf(input_path, content_hash),
+            cost=RENDER))
+        render_after += ("convert",)
+
+    def pdf_source(results):
+        """
+        The PDF to render: LibreOffice's export of a package format, the
+        downloaded export of a remote deck, or the uploaded PDF itself.
+        """
+        if file_format in PACKAGE_FORMATS:
+            return results['convert']
+        if file_format in ['google_slides', 'figma']:
+            return results['analyze']['pdf_path']
+        return input_path
+
+    steps.append(Step("slide_images",
+                      lambda results: render_pdf(pdf_source(results)),
+                      depends_on=render_after, cost=RENDER))
+
+    vision_after = ("slide_images",)
+    if file_format in ['pptx', '.pptx']:
+        steps.append(Step(
+            "classify",
+            lambda results: asyncio.to_thread(classify_pptx, input_path),
+            depends_on=("slide_count_check",), cost=IO))
+        vision_after += ("classify",)
+
+    async def run_vision(results):
+        pages = results['slide_images']
+        structures = [page['structure'] for page in pages]
+        # Placeholders describe a PPTX slide better than the text layer
+        # of its PDF export, as long as the slides line up
+        pptx_structures = results.get('classify')
+        if pptx_structures and len(pptx_structures) == len(pages):
+            structures = pptx_structures
+        return await analyze_slides_with_cache(
+            [page['images']['model'] for page in pages], structures,
+            on_result=on_slide, usage=usage)
+
+    steps += [
+        Step("vision", run_vision, depends_on=vision_after, cost=MODEL),
+        Step("persistence",
+             lambda results: asyncio.to_thread(
+                 save_slide_images, processing_id, results['slide_images']),
+             depends_on=("slide_images",), cost=IO),
+        Step("slide_summary",
+             lambda results: summarize_analyses(results['vision'][0]),
+             depends_on=("vision",)),
+        Step("title_slide_check",
+             lambda results: title_slide_result(results['slide_summary']),
+             depends_on=("slide_summary",),
+             passed=lambda result: result['has_title_slide']),
+        Step("bullet_point_check",
+             lambda results: bullet_point_result(results['slide_summary']),
+             depends_on=("slide_summary",),
+             passed=lambda result: result['has_few_bullet_points']),
+        Step("image_check",
+             lambda results: image_result(results['slide_summary']),
+             depends_on=("slide_summary",),
+             passed=lambda result: result['has_images']),
+    ]
+
+    for check in prompt_checks:
+        async def run_prompt_check(results, check=check):
+            prompt_template, batch_prompt_template = prompt_check_templates(
+                check['prompt'])
+            answers = await analyze_slide_images(
+                [page['images']['model'] for page in results['slide_images']],
+                media_type=RENDER_PROFILES['model'].media_type,
+                prompt_template=prompt_template,
+                batch_prompt_template=batch_prompt_template,
+                required_keys=PROMPT_CHECK_KEYS,
+                usage=usage)
+            return prompt_check_result(check, answers)
+
+        steps.append(Step(
+            check['name'], run_prompt_check,
+            depends_on=("slide_images",) + tuple(check['depends_on']),
+            cost=MODEL, passed=lambda result: result['passed']))
+    return steps
+
+
+def validate_prompt_checks(prompt_checks: list):
+    """
+    Raise CheckGraphError unless the prompt checks fit into a deck's
+    check graph: unique names, known dependencies and no cycles.
+    """
+    CheckGraph(deck_steps("deck.pdf", "pdf", True, None, "", VisionUsage(),
+                          prompt_checks=prompt_checks))
 
-            # When saving the slide images, use the processing_id
-            image_path = get_slide_image_path(processing_id, slide_number)
-            with open(image_path, 'wb') as f:
-                f.write(image_data)
-            logger.debug(f"Saved slide image: {image_path}")
 
-        # Create the required checks
-        title_slide_check = TitleSlideCheck(
-            has_title_slide=title_slide_present,
-            message="Title slide is present."
-            if title_slide_present else "Title slide is missing.")
+async def analyze_deck(input_path: str, processing_id: str,
+                       deck_format: str, content_hash: Optional[str] = None,
+                       on_progress: Optional[
+                           Callable[[str, dict], None]] = None
+                       ) -> AnalysisResponse:
+    logger.info("Starting to process slide deck: %s", input_path)
 
-        max_bullet_points = 10  # Adjust as needed
-        bullet_point_check = BulletPointCheck(
-            has_few_bullet_points=total_bullet_points <= max_bullet_points,
-            message=f"Total bullet points: {total_bullet_points}.")
+    def publish(event, data):
+        if on_progress is not None:
+            on_progress(event, data)
 
-        image_check = ImageCheck(has_images=total_images > 0,
-                                 image_count=total_images,
-                                 message=f"Total images: {total_images}.")
+    def publish_slide(slide_number, analysis):
+        publish("slide_analysis", {"slide_number": slide_number,
+                                   "analysis": analysis})
 
+    try:
+        # Step 1: Format Identification
+        with span("format_detection"):
+            is_file = os.path.isfile(input_path)
+            is_url_path = is_url(input_path)
+
+            logger.debug("Is file: %s, Is URL: %s", is_file, is_url_path)
+
+            if not is_file and not is_url_path:
+                logger.error("Invalid input: %s", input_path)
+                return None
+
+            # Determine format
+            if is_file:
+                format_result = format_check(input_path)
+                file_format = format_result['file_type']
+                logger.info("File format determined: %s", file_format)
+            else:
+                # For URLs, we need to determine the format based on the URL
+                # structure
+                if 'docs.google.com' in input_path:
+                    file_format = 'google_slides'
+                elif 'figma.com' in input_path:
+                    file_format = 'figma'
+                elif 'canva.com' in input_path:
+                    file_format = 'canva'
+                else:
+                    logger.error("Unsupported URL format: %s", input_path)
+                    return None
+                logger.info("URL format determined: %s", file_format)
+
+        prompt_checks = registry.prompt_checks(enabled_only=True)
+
+        # Identical resubmissions are served from the analysis cache
+        cache_key = None
+        if is_file:
+            if content_hash is None:
+                with span("hash"):
+                    content_hash = hash_file(input_path)
+            cache_key = analysis_cache.make_key(
+                content_hash, analysis_fingerprint(prompt_checks))
+            with span("cache_lookup"):
+                cached = analysis_cache.get(cache_key)
+            if cached is not None:
+                cached_response = cached["response"]
+                if restore_cached_slide_images(
+                        cached["processing_id"], processing_id,
+                        rendered_slide_count(cached_response)):
+                    logger.info("Serving cached analysis for %s", input_path)
+                    publish_response(cached_response, publish)
+                    return cached_response.model_copy(
+                        update={"processing_id": processing_id})
+                logger.info("Cached slide images are gone, reprocessing")
+
+        # Step 2: Checks and the stages they need, run as a DAG. The cheap
+        # gating checks come first, so a deck that can never pass is not
+        # converted, rendered or sent to the model
+        logger.info("Running checks for format: %s", file_format)
+        vision_usage = VisionUsage()
+        graph = CheckGraph(deck_steps(
+            input_path, file_format, is_file, content_hash, processing_id,
+            vision_usage, on_slide=publish_slide,
+            prompt_checks=prompt_checks))
+
+        def on_step(step, run):
+            if step.name in DeterministicCheckResult.model_fields:
+                publish("deterministic_check",
+                        {"name": step.name,
+                         "result": check_result(step.name, run)})
+            elif step.name == "slide_images":
+                publish("file_analysis",
+                        dict(file_analysis_result(file_format,
+                                                  run).model_dump(),
+                             rendered_slides=len(
+                                 run.results.get(step.name) or [])))
+
+        run = await graph.run(on_step)
+        if "analyze" not in graph.steps and run.failed_gate is None:
+            logger.error("Unsupported file format for slide image "
+                         "extraction: %s", file_format)
+            return None
+
+        deterministic_checks = DeterministicCheckResult(**{
+            name: check_result(name, run)
+            for name in DeterministicCheckResult.model_fields})
+        logger.debug("Deterministic checks result: %s", deterministic_checks)
+        file_analysis = file_analysis_result(file_format, run)
+        if "slide_images" not in graph.steps:
+            publish("file_analysis", file_analysis.model_dump())
+
+        summary = run.results.get("slide_summary",
+                                  {"slide_analyses": []})
+        slide_cache_report = (run.results["vision"][1]
+                              if "vision" in run.results else None)
         probabilistic_checks_result = ProbabilisticCheckResult(
-            title_slide_check=title_slide_check,
-            bullet_point_check=bullet_point_check,
-            image_check=image_check,
-            slide_analyses=probabilistic_checks)
+            title_slide_check=check_result("title_slide_check", run),
+            bullet_point_check=check_result("bullet_point_check", run),
+            image_check=check_result("image_check", run),
+            slide_analyses=summary["slide_analyses"])
 
-        # Step 5: Construct and validate the final response
+        # Step 3: Construct and validate the final response
         logger.info("Constructing final response")
         analysis_response = AnalysisResponse(
             processing_id=processing_id,
             deterministic_checks=deterministic_checks,
-            file_analysis=FileAnalysisResult(
-                number_of_slides=total_slides,
-                fonts_used=[],  # Placeholder, replace with actual data
-                video_present=False,  # Placeholder, replace with actual data
-                audio_present=False  # Placeholder, replace with actual data
-            ),
-            probabilistic_checks=probabilistic_checks_result
-            # Provide other required fields or make them optional
-        )
+            file_analysis=file_analysis,
+            probabilistic_checks=probabilistic_checks_result,
+            slide_cache=slide_cache_report,
+            vision_usage=vision_usage.report() or None,
+            checks=[CheckRun(**check) for check in run.check_report()],
+            skipped_stages=run.skipped_stages() or None,
+            rendered_slides=len(run.results.get("slide_images") or []))
         logger.info("Analysis response created successfully")
+
+        if cache_key is not None and is_complete_run(run, vision_usage):
+            with span("persistence"):
+                analysis_cache.put(cache_key, analysis_response,
+                                   processing_id)
+        elif cache_key is not None:
+            logger.info("Analysis of %s is incomplete, not caching it",
+                        input_path)
+
         return analysis_response
 
     except Exception as e:
-        logger.error(f"Error in process_slide_deck: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error in process_slide_deck: %s", e)
         return None
 
 
-def get_slide_image_path(processing_id: str, slide_number: int) -> str:
+def slide_image_path(processing_id: str, slide_number: int,
+                     profile: str = "thumbnail") -> str:
     """
-    Generate the path for a slide image based on the processing ID and slide number.
+    Path of a slide image for a processing ID, slide number and render
+    profile. Pure path arithmetic, safe to call on every read.
     """
-    # Create a directory for the slides if it doesn't exist
     slides_dir = os.path.join('uploads', processing_id)
-    os.makedirs(slides_dir, exist_ok=True)
+    render_profile = RENDER_PROFILES.get(profile)
+    extension = render_profile.extension if render_profile else "png"
+    if profile == "thumbnail":
+        return os.path.join(slides_dir, f"slide_{slide_number}.{extension}")
+    return os.path.join(slides_dir,
+                        f"slide_{slide_number}_{profile}.{extension}")
 
-    # Generate the path for the specific slide image
-    return os.path.join(slides_dir, f"slide_{slide_number}.png")
+
+def get_slide_image_path(processing_id: str, slide_number: int,
+                         profile: str = "thumbnail") -> str:
+    """
+    Generate the path for a slide image based on the processing ID, slide
+    number and render profile, creating its directory for writing.
+    """
+    # Create a directory for the slides if it doesn't exist
+    os.makedirs(os.path.join('uploads', processing_id), exist_ok=True)
+    return slide_image_path(processing_id, slide_number, profile)
@@ -0,0 +1,191 @@
+# app/services/thumbnail_store.py
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from app.services.slide_processor import slide_image_path
+from app.utils.render_profiles import RENDER_PROFILES, encode_rendition
+
+logger = logging.getLogger("slide_analyzer")
+
+THUMBNAIL_CACHE_MAX_MB = float(os.getenv("THUMBNAIL_CACHE_MAX_MB", "32"))
+SPRITE_COLUMNS = int(os.getenv("SPRITE_COLUMNS", "6"))
+
+# Versioned URLs change whenever the content does, so they never go stale
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header covers the given strong ETag.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ThumbnailCache:
+    """
+    In-memory LRU of small image files and their content digests.
+
+    Entries are keyed by path and revalidated against the file's size and
+    modification time, so a file replaced on disk is read again.
+    """
+
+    def __init__(self, max_size_mb: float = THUMBNAIL_CACHE_MAX_MB):
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Return (data, digest) for an image file, or None if it is missing.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        digest = content_digest(data)
+
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            if len(data) <= self.max_size_bytes:
+                self._entries[path] = (version, data, digest)
+                self._size += len(data)
+            while self._size > self.max_size_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return data, digest
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+thumbnail_cache = ThumbnailCache()
+
+
+def sprite_paths(processing_id: str, profile: str = "thumbnail"):
+    render_profile = RENDER_PROFILES[profile]
+    slides_dir = os.path.join("uploads", processing_id)
+    return (os.path.join(slides_dir, f"sprite.{render_profile.extension}"),
+            os.path.join(slides_dir, "sprite.json"))
+
+
+def build_sprite_sheet(processing_id: str, profile: str = "thumbnail",
+                       columns: int = SPRITE_COLUMNS) -> Optional[dict]:
+    """
+    Tile every slide's rendition of a deck into one image and write it,
+    with a JSON index of each slide's offsets, next to the slide images.
+
+    Returns the index, or None if the deck has no slide images.
+    """
+    images = []
+    while True:
+        path = slide_image_path(processing_id, len(images) + 1, profile)
+        if not os.path.exists(path):
+            break
+        with Image.open(path) as image:
+            images.append(image.convert("RGB"))
+    if not images:
+        return None
+
+    cell_width = max(image.width for image in images)
+    cell_height = max(image.height for image in images)
+    columns = max(1, min(columns, len(images)))
+    rows = -(-len(images) // columns)
+    sheet = Image.new("RGB", (cell_width * columns, cell_height * rows),
+                      "white")
+    slides = []
+    for index, image in enumerate(images):
+        x = (index % columns) * cell_width
+        y = (index // columns) * cell_height
+        sheet.paste(image, (x, y))
+        slides.append({"slide_number": index + 1, "x": x, "y": y,
+                       "width": image.width, "height": image.height})
+
+    # The sheet is already made of downscaled renditions; only the format
+    # and quality of the profile apply
+    render_profile = replace(RENDER_PROFILES[profile], max_bytes=None,
+                             max_edge=None, dpi=None)
+    data = encode_rendition(sheet, render_profile)
+    index = {
+        "digest": content_digest(data),
+        "width": sheet.width,
+        "height": sheet.height,
+        "columns": columns,
+        "slides": slides,
+    }
+
+    sprite_path, index_path = sprite_paths(processing_id, profile)
+    for path, content in ((sprite_path, data),
+                          (index_path, json.dumps(index).encode("utf-8"))):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                         suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    logger.info("Built sprite sheet for %s (%s slides, %s bytes)",
+                processing_id, len(images), len(data))
+    return index
+
+
+def get_sprite_sheet(processing_id: str,
+                     profile: str = "thumbnail") -> Optional[dict]:
+    """
+    Return the sprite sheet index of a deck, building the sheet on first
+    use.
+    """
+    sprite_path, index_path = sprite_paths(processing_id, profile)
+    if os.path.exists(sprite_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return build_sprite_sheet(processing_id, profile)
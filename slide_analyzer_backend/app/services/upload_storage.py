@@ -0,0 +1,100 @@
+# app/services/upload_storage.py
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+
+from app.utils.deterministic_checks import (format_check, magic_bytes_check,
+                                            size_check, SIZE_LIMIT_MB,
+                                            MAGIC_HEADER_SIZE)
+
+logger = logging.getLogger("slide_analyzer")
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+class UploadRejected(Exception):
+    """
+    Raised when an upload fails a deterministic check while it is streamed.
+    """
+
+    def __init__(self, status_code: int, message: str, check: dict):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.check = check
+
+
+async def save_upload_stream(upload,
+                             destination_path: str,
+                             size_limit_mb: float = SIZE_LIMIT_MB,
+                             chunk_size: int = UPLOAD_CHUNK_SIZE) -> dict:
+    """
+    Stream an uploaded file to disk chunk by chunk.
+
+    The file is written to a temporary file next to destination_path and
+    renamed into place only once it is complete, while a SHA-256 digest is
+    computed over the same chunks. The upload is rejected as soon as the
+    size limit is exceeded or the leading bytes do not match the format, so
+    at most one chunk is ever held in memory.
+    """
+    format_result = format_check(upload.filename or destination_path)
+    if not format_result['accepted_format']:
+        raise UploadRejected(415, format_result['message'], format_result)
+    file_type = format_result['file_type']
+
+    destination_dir = os.path.dirname(destination_path) or "."
+    os.makedirs(destination_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=destination_dir, suffix=".part")
+
+    sha256 = hashlib.sha256()
+    size_limit_bytes = size_limit_mb * 1024 * 1024
+    size_bytes = 0
+    header = b""
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+
+                if len(header) < MAGIC_HEADER_SIZE:
+                    header += chunk[:MAGIC_HEADER_SIZE - len(header)]
+                    # Wait for a full header unless the file is shorter
+                    if len(header) >= MAGIC_HEADER_SIZE:
+                        _check_magic_bytes(file_type, header)
+
+                size_bytes += len(chunk)
+                if size_bytes > size_limit_bytes:
+                    result = size_check(size_bytes / (1024 * 1024),
+                                        size_limit_mb)
+                    raise UploadRejected(413, result['message'], result)
+
+                sha256.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+
+            if len(header) < MAGIC_HEADER_SIZE:
+                _check_magic_bytes(file_type, header)
+
+        os.replace(temp_path, destination_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    logger.debug("Streamed %s bytes to %s", size_bytes, destination_path)
+    return {
+        'path': destination_path,
+        'file_type': file_type,
+        'sha256': sha256.hexdigest(),
+        'size_bytes': size_bytes,
+        'file_size_mb': size_bytes / (1024 * 1024),
+    }
+
+
+def _check_magic_bytes(file_type, header):
+    result = magic_bytes_check(file_type, header)
+    if not result['magic_bytes_match']:
+        raise UploadRejected(415, result['message'], result)
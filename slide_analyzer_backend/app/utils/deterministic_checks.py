@@ -2,9 +2,23 @@ import os
 
 # app/utils/deterministic_checks.py
 
+ALLOWED_FORMATS = ['.pdf', '.pptx', '.key']
+SIZE_LIMIT_MB = 50
+MAX_SLIDES = 30
+
+# Leading bytes each accepted format starts with. PPTX and Keynote are zip
+# packages, so they carry the zip local file header signature.
+MAGIC_BYTES = {
+    '.pdf': b'%PDF-',
+    '.pptx': b'PK\x03\x04',
+    '.key': b'PK\x03\x04',
+}
+# The PDF spec allows the header to appear anywhere in the first 1024 bytes
+MAGIC_HEADER_SIZE = 1024
+
 
 def format_check(file_path):
-    allowed_formats = ['.pdf', '.pptx']
+    allowed_formats = ALLOWED_FORMATS
     _, ext = os.path.splitext(file_path)
     accepted_format = ext.lower() in allowed_formats
     result = {
@@ -15,7 +29,23 @@ def format_check(file_path):
     return result
 
 
-def size_check(file_size_mb, size_limit_mb=50):
+def magic_bytes_check(file_type, header):
+    magic = MAGIC_BYTES.get(file_type)
+    if magic is None:
+        magic_bytes_match = False
+    elif file_type == '.pdf':
+        magic_bytes_match = magic in header[:MAGIC_HEADER_SIZE]
+    else:
+        magic_bytes_match = header.startswith(magic)
+    result = {
+        "magic_bytes_match": magic_bytes_match,
+        "file_type": file_type,
+        "message": "File contents match the format." if magic_bytes_match else "File contents do not match the format."
+    }
+    return result
+
+
+def size_check(file_size_mb, size_limit_mb=SIZE_LIMIT_MB):
     size_within_limit = file_size_mb <= size_limit_mb
     result = {
         "size_within_limit": size_within_limit,
@@ -25,7 +55,7 @@ def size_check(file_size_mb, size_limit_mb=50):
     return result
 
 
-def slide_count_check(slide_count, max_slides=30):
+def slide_count_check(slide_count, max_slides=MAX_SLIDES):
     slide_count_within_limit = slide_count <= max_slides
     result = {
         "slide_count_within_limit": slide_count_within_limit,
@@ -0,0 +1,71 @@
+# app/utils/image_hashing.py
+
+import hashlib
+import io
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8  # 8x8 bits -> 64-bit hashes
+
+
+def _load_grayscale(image_data, size):
+    image = Image.open(io.BytesIO(image_data))
+    # draft() lets JPEG decoding skip straight to a reduced scale
+    image.draft("L", (size[0] * 4, size[1] * 4))
+    image = image.convert("L").resize(size, Image.Resampling.LANCZOS)
+    return np.asarray(image, dtype=np.float32)
+
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.flatten()).tobytes(), "big")
+
+
+def dhash(image_data, hash_size=HASH_SIZE):
+    """
+    Difference hash: one bit per horizontally adjacent pixel pair of a
+    (hash_size + 1) x hash_size grayscale thumbnail.
+    """
+    pixels = _load_grayscale(image_data, (hash_size + 1, hash_size))
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def _dct_matrix(n):
+    k = np.arange(n)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+
+def phash(image_data, hash_size=HASH_SIZE, highfreq_factor=4):
+    """
+    Perceptual hash: sign of the lowest DCT frequencies against their median.
+    """
+    size = hash_size * highfreq_factor
+    pixels = _load_grayscale(image_data, (size, size))
+    dct = _dct_matrix(size)
+    low_freq = (dct @ pixels @ dct.T)[:hash_size, :hash_size]
+    return _bits_to_int(low_freq > np.median(low_freq))
+
+
+def exact_hash(image_data):
+    """
+    The first 64 bits of the image's SHA-256: equal only for slides
+    rendered to the same bytes.
+    """
+    return int.from_bytes(hashlib.sha256(image_data).digest()[:8], "big")
+
+
+HASH_FUNCTIONS = {
+    "exact": exact_hash,
+    "dhash": dhash,
+    "phash": phash,
+}
+
+
+def hamming_distances(hashes, value):
+    """
+    Hamming distance between value and every entry of a uint64 array.
+    """
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
@@ -0,0 +1,300 @@
+# app/utils/keynote_package.py
+
+import posixpath
+import zipfile
+from xml.etree import ElementTree as ET
+
+# Message types of the Keynote and text archives that are read, from the
+# type registry of the IWA format
+KN_SLIDE_ARCHIVE = 5
+TSWP_CHARACTER_STYLE = 2021
+TSWP_PARAGRAPH_STYLE = 2022
+STYLE_ARCHIVES = {TSWP_CHARACTER_STYLE, TSWP_PARAGRAPH_STYLE}
+
+# Protobuf field numbers: ArchiveInfo.message_infos, MessageInfo.type and
+# .length, <style>.char_properties and CharacterStyleProperties.font_name
+ARCHIVE_INFO_MESSAGES = 2
+MESSAGE_INFO_TYPE = 1
+MESSAGE_INFO_LENGTH = 3
+STYLE_CHAR_PROPERTIES = 11
+CHAR_PROPERTIES_FONT_NAME = 5
+
+KEY = "{http://developer.apple.com/namespaces/keynote2}"
+SF = "{http://developer.apple.com/namespaces/sf}"
+SFA = "{http://developer.apple.com/namespaces/sfa}"
+
+VIDEO_EXTENSIONS = {'.mov', '.m4v', '.mp4', '.avi'}
+AUDIO_EXTENSIONS = {'.m4a', '.mp3', '.aif', '.aiff', '.wav', '.caf'}
+
+
+class KeynoteError(Exception):
+    pass
+
+
+def read_varint(data, pos: int):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise KeynoteError("Truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def snappy_decompress(data: bytes) -> bytes:
+    """
+    Decompress one raw snappy block (no framing or checksums), as stored in
+    each IWA chunk.
+    """
+    expected, pos = read_varint(data, 0)
+    out = bytearray()
+    end = len(data)
+    while pos < end:
+        tag = data[pos]
+        pos += 1
+        kind = tag & 3
+        if kind == 0:
+            size = tag >> 2
+            if size >= 60:
+                extra = size - 59
+                size = int.from_bytes(data[pos:pos + extra], "little")
+                pos += extra
+            size += 1
+            out += data[pos:pos + size]
+            pos += size
+            continue
+        if kind == 1:
+            size = 4 + ((tag >> 2) & 7)
+            offset = ((tag >> 5) << 8) | data[pos]
+            pos += 1
+        elif kind == 2:
+            size = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 2], "little")
+            pos += 2
+        else:
+            size = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 4], "little")
+            pos += 4
+        if not 0 < offset <= len(out):
+            raise KeynoteError("Corrupt snappy block")
+        start = len(out) - offset
+        if offset >= size:
+            out += out[start:start + size]
+        else:
+            # An overlapping copy repeats the last `offset` bytes
+            out += (out[start:] * (size // offset + 1))[:size]
+    if len(out) != expected:
+        raise KeynoteError("Corrupt snappy block")
+    return bytes(out)
+
+
+def iwa_chunks(stream):
+    """
+    Decompressed chunks of an .iwa stream, one at a time. Each chunk is a
+    type byte of 0, a 3-byte little-endian length and a snappy block that
+    decompresses on its own.
+    """
+    while True:
+        header = stream.read(4)
+        if not header:
+            return
+        if len(header) < 4 or header[0] != 0:
+            raise KeynoteError("Unsupported IWA chunk header")
+        size = int.from_bytes(header[1:], "little")
+        block = stream.read(size)
+        if len(block) < size:
+            raise KeynoteError("Truncated IWA chunk")
+        yield snappy_decompress(block)
+
+
+class _ChunkReader:
+    """
+    Reads the archive stream that runs on across decompressed chunks,
+    holding only the current chunk. Skipped bytes are never copied.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._chunk = b""
+        self._pos = 0
+
+    def _fill(self) -> bool:
+        while self._pos >= len(self._chunk):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return False
+            self._chunk, self._pos = chunk, 0
+        return True
+
+    def at_end(self) -> bool:
+        return not self._fill()
+
+    def read(self, size: int) -> bytes:
+        parts = []
+        while size:
+            if not self._fill():
+                raise KeynoteError("Truncated IWA archive")
+            part = self._chunk[self._pos:self._pos + size]
+            self._pos += len(part)
+            size -= len(part)
+            parts.append(part)
+        return b"".join(parts)
+
+    def skip(self, size: int):
+        while size:
+            if not self._fill():
+                raise KeynoteError("Truncated IWA archive")
+            step = min(size, len(self._chunk) - self._pos)
+            self._pos += step
+            size -= step
+
+    def read_varint(self) -> int:
+        value = 0
+        shift = 0
+        while True:
+            byte = self.read(1)[0]
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+
+def iter_fields(data: bytes):
+    """
+    (field number, value) pairs of a protobuf message; varints come back
+    as ints and everything else as bytes.
+    """
+    pos = 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = read_varint(data, pos)
+        elif wire_type == 2:
+            size, pos = read_varint(data, pos)
+            value = data[pos:pos + size]
+            pos += size
+        elif wire_type == 1 or wire_type == 5:
+            size = 8 if wire_type == 1 else 4
+            value = data[pos:pos + size]
+            pos += size
+        else:
+            raise KeynoteError(f"Unsupported protobuf wire type {wire_type}")
+        yield number, value
+
+
+def iwa_messages(stream, wanted_types):
+    """
+    (type, payload) of every message in an .iwa stream. Payloads are read
+    only for `wanted_types` and are None otherwise.
+    """
+    reader = _ChunkReader(iwa_chunks(stream))
+    while not reader.at_end():
+        info = reader.read(reader.read_varint())
+        for number, message_info in iter_fields(info):
+            if number != ARCHIVE_INFO_MESSAGES:
+                continue
+            fields = dict(iter_fields(message_info))
+            message_type = fields.get(MESSAGE_INFO_TYPE)
+            length = fields.get(MESSAGE_INFO_LENGTH, 0)
+            if message_type in wanted_types:
+                yield message_type, reader.read(length)
+            else:
+                reader.skip(length)
+                yield message_type, None
+
+
+def style_font(payload: bytes):
+    for number, value in iter_fields(payload):
+        if number != STYLE_CHAR_PROPERTIES:
+            continue
+        for field, font_name in iter_fields(value):
+            if field == CHAR_PROPERTIES_FONT_NAME:
+                return font_name.decode("utf-8")
+    return None
+
+
+def media_members(names) -> dict:
+    video = sorted(name for name in names
+                   if posixpath.splitext(name)[1].lower() in VIDEO_EXTENSIONS)
+    audio = sorted(name for name in names
+                   if posixpath.splitext(name)[1].lower() in AUDIO_EXTENSIONS)
+    return {'video_present': bool(video), 'audio_present': bool(audio),
+            'media_files': video + audio}
+
+
+def analyze_iwa(archive: zipfile.ZipFile) -> dict:
+    """
+    Keynote 6 and later: Index/*.iwa members of snappy-compressed protobuf
+    archives. Every slide is a KN.SlideArchive; those of the theme's
+    template slides live in TemplateSlide members and are not counted.
+    Fonts are the ones the deck's character and paragraph styles name.
+    """
+    slides = 0
+    fonts = set()
+    for name in archive.namelist():
+        if not (name.startswith("Index/") and name.endswith(".iwa")):
+            continue
+        template = posixpath.basename(name).startswith("TemplateSlide")
+        with archive.open(name) as stream:
+            for message_type, payload in iwa_messages(stream,
+                                                      STYLE_ARCHIVES):
+                if message_type == KN_SLIDE_ARCHIVE and not template:
+                    slides += 1
+                elif payload is not None:
+                    font = style_font(payload)
+                    if font:
+                        fonts.add(font)
+    return {'number_of_slides': slides, 'fonts_used': sorted(fonts),
+            **media_members([name for name in archive.namelist()
+                             if name.startswith("Data/")])}
+
+
+def analyze_apxl(archive: zipfile.ZipFile) -> dict:
+    """
+    Keynote '09 and earlier: a single index.apxl XML document, streamed.
+    Slides are the key:slide elements of the slide list and fonts the
+    sf:fontName values of its styles.
+    """
+    slides = 0
+    fonts = set()
+    path = []
+    with archive.open("index.apxl") as stream:
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                path.append(elem.tag)
+                continue
+            path.pop()
+            if elem.tag == KEY + "slide" and path[-1:] == [KEY + "slide-list"]:
+                slides += 1
+            elif elem.tag == SF + "string" and path[-1:] == [SF + "fontName"]:
+                font = elem.get(SFA + "string")
+                if font:
+                    fonts.add(font)
+            elem.clear()
+    return {'number_of_slides': slides, 'fonts_used': sorted(fonts),
+            **media_members(archive.namelist())}
+
+
+def analyze_keynote_package(file_path: str) -> dict:
+    """
+    Slide count, fonts and media of a Keynote file without extracting it:
+    members are streamed from the zip and IWA chunks decompressed one at a
+    time, so memory stays bounded by the largest chunk rather than the
+    package. The result has analyze_pptx's keys plus `media_files`.
+    """
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            names = archive.namelist()
+            if any(name.startswith("Index/") and name.endswith(".iwa")
+                   for name in names):
+                return analyze_iwa(archive)
+            if "index.apxl" in names:
+                return analyze_apxl(archive)
+    except zipfile.BadZipFile:
+        raise KeynoteError("File is not a valid Keynote package.")
+    raise KeynoteError("Unsupported Keynote file structure.")
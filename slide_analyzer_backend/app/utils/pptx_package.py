@@ -0,0 +1,269 @@
+# app/utils/pptx_package.py
+
+import os
+import posixpath
+import zipfile
+from itertools import repeat
+from xml.etree import ElementTree as ET
+
+# Slides handed to a worker at a time; each task reopens the package
+PPTX_SLIDES_PER_TASK = int(os.getenv("PPTX_SLIDES_PER_TASK", "25"))
+
+P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+RELS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+REL_TYPES = ("http://schemas.openxmlformats.org/officeDocument/2006/"
+             "relationships/")
+
+OFFICE_DOCUMENT = REL_TYPES + "officeDocument"
+SLIDE_LAYOUT = REL_TYPES + "slideLayout"
+SLIDE_MASTER = REL_TYPES + "slideMaster"
+THEME = REL_TYPES + "theme"
+
+# Paths below a top-level shape of the slide's shape tree
+RUN_PATH = [P + "txBody", A + "p", A + "r"]
+RUN_FONT_PATH = RUN_PATH + [A + "rPr", A + "latin"]
+SP_PLACEHOLDER_PATH = [P + "nvSpPr", P + "nvPr", P + "ph"]
+PIC_PLACEHOLDER_PATH = [P + "nvPicPr", P + "nvPr", P + "ph"]
+VIDEO_PATH = [P + "nvPicPr", P + "nvPr", A + "videoFile"]
+AUDIO_PATH = [P + "nvPicPr", P + "nvPr", A + "audioFile"]
+SHAPE_TREE_PATH = [P + "sld", P + "cSld", P + "spTree"]
+
+TITLE_PLACEHOLDER_TYPES = {"title", "ctrTitle"}
+
+
+def read_rels(archive: zipfile.ZipFile, part_name: str) -> list:
+    """
+    (type, target part name, id) of a part's internal relationships.
+    """
+    directory, name = posixpath.split(part_name)
+    rels_name = posixpath.join(directory, "_rels", f"{name}.rels")
+    try:
+        stream = archive.open(rels_name)
+    except KeyError:
+        return []
+    rels = []
+    with stream:
+        for _, elem in ET.iterparse(stream):
+            if elem.tag != RELS + "Relationship":
+                continue
+            if elem.get("TargetMode") == "External":
+                continue
+            target = elem.get("Target")
+            if target.startswith("/"):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(directory,
+                                                           target))
+            rels.append((elem.get("Type"), target, elem.get("Id")))
+    return rels
+
+
+def related_part(archive, part_name, rel_type):
+    for type_, target, _ in read_rels(archive, part_name):
+        if type_ == rel_type:
+            return target
+    return None
+
+
+def slide_parts(archive: zipfile.ZipFile) -> list:
+    """
+    Slide part names in presentation order, as python-pptx lists them.
+    """
+    presentation = related_part(archive, "", OFFICE_DOCUMENT)
+    targets = {rel_id: target for _, target, rel_id
+               in read_rels(archive, presentation)}
+    slides = []
+    with archive.open(presentation) as stream:
+        for _, elem in ET.iterparse(stream):
+            if elem.tag == P + "sldId":
+                slides.append(targets[elem.get(R + "id")])
+            elif elem.tag == P + "sldIdLst":
+                break
+    return slides
+
+
+def _first_typeface(stream, paths) -> dict:
+    """
+    The typeface of the first a:latin found at each of several element
+    paths, keyed by path name.
+    """
+    found = {}
+    path = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            path.append(elem.tag)
+            continue
+        for name, wanted in paths.items():
+            if name not in found and path[-len(wanted):] == wanted:
+                found[name] = elem.get("typeface")
+        path.pop()
+        if len(found) == len(paths):
+            break
+    return found
+
+
+def master_fonts(archive: zipfile.ZipFile, master: str) -> dict:
+    """
+    Theme font names of a slide master and the default font of each of its
+    text styles, with theme references resolved.
+    """
+    theme = related_part(archive, master, THEME)
+    fonts = {}
+    if theme is not None:
+        with archive.open(theme) as stream:
+            found = _first_typeface(stream, {
+                "+mj-lt": [A + "majorFont", A + "latin"],
+                "+mn-lt": [A + "minorFont", A + "latin"],
+            })
+        fonts.update({ref: name for ref, name in found.items() if name})
+
+    with archive.open(master) as stream:
+        found = _first_typeface(stream, {
+            style: [P + "txStyles", P + f"{style}Style", A + "lvl1pPr",
+                    A + "defRPr", A + "latin"]
+            for style in ("title", "body", "other")
+        })
+    styles = {style: fonts.get(name, name)
+              for style, name in found.items() if name}
+    return {"theme": fonts, "styles": styles}
+
+
+def scan_slide(archive: zipfile.ZipFile, part_name: str) -> dict:
+    """
+    Fonts and media of one slide from a single pass over its XML.
+
+    Like analyze_pptx, only top-level shapes are looked at: run fonts of
+    text shapes, and video or audio links of pictures that are not
+    placeholders. Text styles that runs without a font of their own
+    inherit from the master ("title", "body", "other") are reported too.
+    """
+    fonts = set()
+    inherited = set()
+    video_present = False
+    audio_present = False
+    path = []
+    shape = None
+
+    with archive.open(part_name) as stream:
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                path.append(elem.tag)
+                if len(path) == 4 and path[:3] == SHAPE_TREE_PATH:
+                    shape = {"tag": elem.tag, "placeholder": None,
+                             "video": False, "audio": False,
+                             "runs_without_font": False, "run_font": False}
+                continue
+
+            if shape is not None and len(path) > 4:
+                inner = path[4:]
+                if shape["tag"] == P + "sp":
+                    if inner == RUN_FONT_PATH:
+                        typeface = elem.get("typeface")
+                        if typeface:
+                            fonts.add(typeface)
+                            shape["run_font"] = True
+                    elif inner == RUN_PATH:
+                        if not shape["run_font"]:
+                            shape["runs_without_font"] = True
+                        shape["run_font"] = False
+                    elif inner == SP_PLACEHOLDER_PATH:
+                        shape["placeholder"] = elem.get("type", "body")
+                elif shape["tag"] == P + "pic":
+                    if inner == PIC_PLACEHOLDER_PATH:
+                        shape["placeholder"] = elem.get("type", "body")
+                    elif inner == VIDEO_PATH:
+                        shape["video"] = True
+                    elif inner == AUDIO_PATH:
+                        shape["audio"] = True
+
+            if len(path) == 4 and shape is not None:
+                if shape["tag"] == P + "pic" and shape["placeholder"] is None:
+                    video_present = video_present or shape["video"]
+                    audio_present = audio_present or shape["audio"]
+                if shape["runs_without_font"]:
+                    placeholder = shape["placeholder"]
+                    if placeholder in TITLE_PLACEHOLDER_TYPES:
+                        inherited.add("title")
+                    elif placeholder is not None:
+                        inherited.add("body")
+                    else:
+                        inherited.add("other")
+                shape = None
+                elem.clear()
+            path.pop()
+
+    return {"fonts": fonts, "inherited": inherited,
+            "video_present": video_present, "audio_present": audio_present}
+
+
+def scan_slides(file_path: str, part_names: list,
+                resolve_theme_fonts: bool = True) -> dict:
+    """
+    Scan a range of slides. Top-level so it can run in a worker process.
+    """
+    fonts = set()
+    video_present = False
+    audio_present = False
+    masters = {}
+    with zipfile.ZipFile(file_path) as archive:
+        for part_name in part_names:
+            slide = scan_slide(archive, part_name)
+            video_present = video_present or slide["video_present"]
+            audio_present = audio_present or slide["audio_present"]
+            if not resolve_theme_fonts:
+                fonts.update(slide["fonts"])
+                continue
+
+            layout = related_part(archive, part_name, SLIDE_LAYOUT)
+            master = layout and related_part(archive, layout, SLIDE_MASTER)
+            if master not in masters:
+                masters[master] = (master_fonts(archive, master) if master
+                                   else {"theme": {}, "styles": {}})
+            theme = masters[master]["theme"]
+            styles = masters[master]["styles"]
+            fonts.update(theme.get(name, name) for name in slide["fonts"])
+            fonts.update(styles[style] for style in slide["inherited"]
+                         if style in styles)
+    return {"fonts": fonts, "video_present": video_present,
+            "audio_present": audio_present}
+
+
+def analyze_pptx_package(file_path: str, resolve_theme_fonts: bool = True,
+                         executor=None,
+                         slides_per_task: int = PPTX_SLIDES_PER_TASK) -> dict:
+    """
+    analyze_pptx without building python-pptx's object model: the package
+    zip is read directly and each slide's XML streamed once with iterparse.
+    Media parts are never loaded.
+
+    With resolve_theme_fonts, theme font references such as "+mn-lt" are
+    replaced by the theme's font names and text that sets no font reports
+    the font it inherits from the master's text styles; without it the
+    result is the same as analyze_pptx's. Slide ranges are spread over
+    `executor` when one is given.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        slides = slide_parts(archive)
+
+    chunks = [slides[start:start + slides_per_task]
+              for start in range(0, len(slides), slides_per_task)]
+    if executor is None or len(chunks) < 2:
+        results = [scan_slides(file_path, chunk, resolve_theme_fonts)
+                   for chunk in chunks]
+    else:
+        # Workers keep the working directory they were started in
+        results = list(executor.map(scan_slides,
+                                    repeat(os.path.abspath(file_path)),
+                                    chunks, repeat(resolve_theme_fonts)))
+
+    fonts = set()
+    for result in results:
+        fonts.update(result["fonts"])
+    return {
+        'number_of_slides': len(slides),
+        'fonts_used': list(fonts),
+        'video_present': any(result["video_present"] for result in results),
+        'audio_present': any(result["audio_present"] for result in results),
+    }
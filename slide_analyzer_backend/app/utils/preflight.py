@@ -0,0 +1,117 @@
+# app/utils/preflight.py
+
+import logging
+import os
+import zipfile
+from xml.etree import ElementTree as ET
+
+from app.utils.deterministic_checks import (MAGIC_HEADER_SIZE, MAX_SLIDES,
+                                            SIZE_LIMIT_MB, format_check,
+                                            magic_bytes_check, size_check,
+                                            slide_count_check)
+from app.utils.file_analyzers import analyze_pdf_metadata, pdf_page_count
+from app.utils.keynote_package import KeynoteError, analyze_keynote_package
+from app.utils.pptx_package import analyze_pptx_package, slide_parts
+
+logger = logging.getLogger("slide_analyzer")
+
+# Preflight accepts decks past SIZE_LIMIT_MB so it can report them as too
+# large; beyond this the upload itself is refused
+PREFLIGHT_SIZE_LIMIT_MB = float(os.getenv("PREFLIGHT_SIZE_LIMIT_MB", "500"))
+
+# What reading a damaged or mislabeled deck raises. PyMuPDF's errors are
+# RuntimeErrors.
+UNREADABLE_DECK_ERRORS = (zipfile.BadZipFile, KeyError, ET.ParseError,
+                          KeynoteError, RuntimeError, ValueError)
+
+
+def count_slides(file_path: str, file_type: str) -> int:
+    """
+    Slide count of a deck file from its headers: the page tree root PyMuPDF
+    finds through the cross-reference table, or the slide list of a PPTX's
+    ppt/presentation.xml, read from the zip's central directory without
+    touching slide XML or media. Keynote keeps no slide list outside its
+    IWA archives, so those are streamed.
+    """
+    file_type = "." + file_type.lower().lstrip(".")
+    if file_type == '.pdf':
+        return pdf_page_count(file_path)
+    if file_type == '.pptx':
+        with zipfile.ZipFile(file_path) as archive:
+            return len(slide_parts(archive))
+    if file_type == '.key':
+        return analyze_keynote_package(file_path)['number_of_slides']
+    raise ValueError(f"Cannot count the slides of {file_type} files")
+
+
+def read_deck(file_path: str, file_type: str,
+              max_slides: int = MAX_SLIDES) -> dict:
+    """
+    The slide count and, for a deck within `max_slides`, its fonts and
+    media, all without rendering. A deck past the limit fails whatever its
+    fonts are, so they are not read.
+    """
+    file_type = "." + file_type.lower().lstrip(".")
+    if file_type == '.key':
+        analysis = analyze_keynote_package(file_path)
+        if analysis['number_of_slides'] > max_slides:
+            return {'number_of_slides': analysis['number_of_slides']}
+        return {key: analysis[key] for key in (
+            'number_of_slides', 'fonts_used', 'video_present',
+            'audio_present')}
+
+    number_of_slides = count_slides(file_path, file_type)
+    if number_of_slides > max_slides:
+        return {'number_of_slides': number_of_slides}
+    if file_type == '.pdf':
+        return analyze_pdf_metadata(file_path)
+    analysis = analyze_pptx_package(file_path)
+    return dict(analysis, fonts_used=sorted(analysis['fonts_used']))
+
+
+def preflight_deck(file_path: str, filename: str = None,
+                   max_slides: int = MAX_SLIDES,
+                   size_limit_mb: float = SIZE_LIMIT_MB) -> dict:
+    """
+    format_check, size_check and slide_count_check of a deck file, with
+    its fonts and media, computed the way the pipeline computes them but
+    from the file's headers: nothing is rendered, converted or sent to the
+    model. `filename` is the name the deck was uploaded under, if the file
+    was stored under another. The keys follow PreflightResponse.
+    """
+    format_result = format_check(filename or file_path)
+    if format_result['accepted_format']:
+        with open(file_path, "rb") as f:
+            magic = magic_bytes_check(format_result['file_type'],
+                                      f.read(MAGIC_HEADER_SIZE))
+        if not magic['magic_bytes_match']:
+            format_result = dict(format_result, accepted_format=False,
+                                 message=magic['message'])
+    result = {
+        'format_check': format_result,
+        'size_check': size_check(os.path.getsize(file_path) / (1024 * 1024),
+                                 size_limit_mb),
+        'slide_count_check': None,
+        'file_analysis': None,
+        'message': None,
+    }
+
+    if format_result['accepted_format']:
+        try:
+            deck = read_deck(file_path, format_result['file_type'],
+                             max_slides)
+        except UNREADABLE_DECK_ERRORS as e:
+            logger.info("Preflight could not read %s: %s", file_path, e)
+            result['message'] = "The slides could not be read from the file."
+        else:
+            result['slide_count_check'] = slide_count_check(
+                deck['number_of_slides'], max_slides)
+            if 'fonts_used' in deck:
+                result['file_analysis'] = deck
+
+    slide_count = result['slide_count_check']
+    result['passed'] = (format_result['accepted_format']
+                        and result['size_check']['size_within_limit']
+                        and slide_count is not None
+                        and slide_count['slide_count_within_limit'])
+    return result
@@ -1,71 +1,77 @@
 # app/utils/gpt4_vision.py
 
+import asyncio
 import base64
-from openai import OpenAI
+from email.utils import parsedate_to_datetime
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError
 import os
 import logging
 import json
+import random
 import re
+import time
 
+from app.metrics import (MODEL_CALLS, MODEL_CALLS_IN_FLIGHT, MODEL_TOKENS,
+                         span)
 
-def get_openai_client():
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
-    return OpenAI(api_key=api_key)
-
+logger = logging.getLogger("slide_analyzer")
 
-def encode_image(image_path):
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+VISION_MODEL = "gpt-4o-mini"
 
+# Maximum number of vision requests in flight for a single deck
+VISION_CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "8"))
+VISION_MAX_RETRIES = int(os.getenv("VISION_MAX_RETRIES", "4"))
+VISION_BACKOFF_BASE = float(os.getenv("VISION_BACKOFF_BASE", "1.0"))
+VISION_BACKOFF_MAX = float(os.getenv("VISION_BACKOFF_MAX", "30.0"))
+# Timeout for a single HTTP request to the model API
+VISION_REQUEST_TIMEOUT = float(os.getenv("VISION_REQUEST_TIMEOUT", "60"))
+# Total time budget for one slide, retries included
+VISION_SLIDE_TIMEOUT = float(os.getenv("VISION_SLIDE_TIMEOUT", "180"))
+# Slides packed into one request; 1 sends every slide on its own
+VISION_BATCH_SIZE = int(os.getenv("VISION_BATCH_SIZE", "1"))
+# Completion tokens allowed per slide in a request
+VISION_MAX_TOKENS_PER_SLIDE = 500
 
-async def gpt4_vision_analysis(image_data, prompt):
-    """
-    Helper function to use GPT-4o-mini for image analysis.
+SLIDE_ANALYSIS_PROMPT = """
+    Analyze slide number {slide_number} of a presentation and provide the following information:
+    1. Is this a title slide? (true/false)
+    2. How many bullet points are present?
+    3. Are there any images or graphics? If so, how many?
+    4. Does the slide adhere to best practices for presentations? (minimal text, visual emphasis)
+    5. Any suggestions for improvement?
+    Please analyze the slide and provide a JSON response without any code fences or additional text, using the following schema:
+    {{
+      "is_title_slide": true or false,
+      "bullet_points": integer,
+      "images": integer,
+      "adheres_to_best_practices": true or false,
+      "suggestions": string
+    }}
     """
-    base64_image = base64.b64encode(image_data).decode('utf-8')
-
-    client = get_openai_client()
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=500
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        logging.error(f"Error in GPT-4o-mini analysis: {e}")
-        return ""
-
-
-async def analyze_slide_image(image_data, slide_number):
-    """
-    Analyze a single slide using GPT-4o-mini.
+# Used when the structural fields were already answered from the text layer
+SUBJECTIVE_ANALYSIS_PROMPT = """
+    Review slide number {slide_number} of a presentation.
+    1. Does the slide adhere to best practices for presentations? (minimal text, visual emphasis)
+    2. Any suggestions for improvement?
+    Please provide a JSON response without any code fences or additional text, using the following schema:
+    {{
+      "adheres_to_best_practices": true or false,
+      "suggestions": string
+    }}
     """
-    prompt = f"""
-    Analyze slide number {slide_number} of a presentation and provide the following information:
+
+BATCH_SLIDE_ANALYSIS_PROMPT = """
+    The following images are slides {slide_numbers} of a presentation, in that order, each preceded by its slide number.
+    For each slide provide the following information:
     1. Is this a title slide? (true/false)
     2. How many bullet points are present?
     3. Are there any images or graphics? If so, how many?
     4. Does the slide adhere to best practices for presentations? (minimal text, visual emphasis)
     5. Any suggestions for improvement?
-    Please analyze the slide and provide a JSON response without any code fences or additional text, using the following schema:
+    Please provide a JSON array with one object per slide, without any code fences or additional text, using the following schema for each object:
     {{
+      "slide_number": integer,
       "is_title_slide": true or false,
       "bullet_points": integer,
       "images": integer,
@@ -73,16 +79,402 @@ async def analyze_slide_image(image_data, slide_number):
       "suggestions": string
     }}
     """
-    response_text = await gpt4_vision_analysis(image_data, prompt)
 
+BATCH_SUBJECTIVE_ANALYSIS_PROMPT = """
+    The following images are slides {slide_numbers} of a presentation, in that order, each preceded by its slide number.
+    For each slide:
+    1. Does the slide adhere to best practices for presentations? (minimal text, visual emphasis)
+    2. Any suggestions for improvement?
+    Please provide a JSON array with one object per slide, without any code fences or additional text, using the following schema for each object:
+    {{
+      "slide_number": integer,
+      "adheres_to_best_practices": true or false,
+      "suggestions": string
+    }}
+    """
+
+# Admin-defined checks; {instructions} is filled in by prompt_check_templates
+PROMPT_CHECK_PROMPT = """
+    Review slide number {slide_number} of a presentation against this requirement:
+    {instructions}
+    Please provide a JSON response without any code fences or additional text, using the following schema:
+    {{
+      "passed": true or false,
+      "reason": string
+    }}
+    """
+
+BATCH_PROMPT_CHECK_PROMPT = """
+    The following images are slides {slide_numbers} of a presentation, in that order, each preceded by its slide number.
+    Review each slide against this requirement:
+    {instructions}
+    Please provide a JSON array with one object per slide, without any code fences or additional text, using the following schema for each object:
+    {{
+      "slide_number": integer,
+      "passed": true or false,
+      "reason": string
+    }}
+    """
+
+# Keys an answer to each template must have to be used; a batch entry
+# missing one is retried on its own
+SLIDE_ANALYSIS_KEYS = ('is_title_slide', 'bullet_points', 'images',
+                       'adheres_to_best_practices', 'suggestions')
+SUBJECTIVE_ANALYSIS_KEYS = ('adheres_to_best_practices', 'suggestions')
+PROMPT_CHECK_KEYS = ('passed', 'reason')
+
+
+def prompt_check_templates(instructions: str) -> tuple:
+    """
+    Single-slide and batch prompt templates asking whether each slide
+    meets `instructions`.
+    """
+    escaped = instructions.replace("{", "{{").replace("}", "}}")
+    return (PROMPT_CHECK_PROMPT.replace("{instructions}", escaped),
+            BATCH_PROMPT_CHECK_PROMPT.replace("{instructions}", escaped))
+
+
+_client = None
+
+
+def get_openai_client():
+    """
+    Return the process-wide async client, creating it on first use.
+
+    The SDK's own retries are disabled because gpt4_vision_analysis does its
+    own backoff. OPENAI_BASE_URL can point the client at a local stub server.
+    """
+    global _client
+    if _client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "OPENAI_API_KEY not found in environment variables")
+        _client = AsyncOpenAI(api_key=api_key,
+                              base_url=os.getenv("OPENAI_BASE_URL") or None,
+                              timeout=VISION_REQUEST_TIMEOUT,
+                              max_retries=0)
+    return _client
+
+
+async def close_openai_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def encode_image(image_path):
+    with open(image_path, "rb") as image_file:
+        return base64.b64encode(image_file.read()).decode('utf-8')
+
+
+def is_retryable(error):
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, APIConnectionError)
+
+
+def retry_delay(error, attempt):
+    """
+    Seconds to wait before retrying, honouring Retry-After when present.
+    """
+    headers = {}
+    if isinstance(error, APIStatusError):
+        headers = error.response.headers
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return min(float(retry_after_ms) / 1000, VISION_BACKOFF_MAX)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return min(float(retry_after), VISION_BACKOFF_MAX)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after).timestamp()
+                return min(max(retry_at - time.time(), 0), VISION_BACKOFF_MAX)
+            except (TypeError, ValueError):
+                pass
+
+    delay = min(VISION_BACKOFF_BASE * 2 ** attempt, VISION_BACKOFF_MAX)
+    # Full jitter keeps concurrent slides from retrying in lockstep
+    return random.uniform(0, delay)
+
+
+class VisionUsage:
+    """
+    Tokens and wall-clock time spent on vision requests, per mode
+    ("single" or "batched"), so batch sizes can be tuned, and the slides
+    the model gave no usable answer for.
+    """
+
+    def __init__(self):
+        self.modes = {}
+        self.failures = 0
+
+    def record_failure(self, slides=1):
+        self.failures += slides
+
+    def record(self, mode, slides, seconds, usage=None):
+        stats = self.modes.setdefault(mode, {
+            "requests": 0, "slides": 0, "prompt_tokens": 0,
+            "completion_tokens": 0, "seconds": 0.0})
+        stats["requests"] += 1
+        stats["slides"] += slides
+        stats["seconds"] += seconds
+        if usage is not None:
+            stats["prompt_tokens"] += usage.prompt_tokens or 0
+            stats["completion_tokens"] += usage.completion_tokens or 0
+
+    def report(self) -> list:
+        reports = []
+        for mode, stats in self.modes.items():
+            slides = stats["slides"] or 1
+            reports.append(dict(
+                stats, mode=mode,
+                seconds=round(stats["seconds"], 3),
+                tokens_per_slide=round(
+                    (stats["prompt_tokens"] + stats["completion_tokens"])
+                    / slides, 1),
+                seconds_per_slide=round(stats["seconds"] / slides, 3)))
+        return reports
+
+
+def image_content(image_data, media_type="image/png"):
+    base64_image = base64.b64encode(image_data).decode('utf-8')
+    return {
+        "type": "image_url",
+        "image_url": {"url": f"data:{media_type};base64,{base64_image}"}
+    }
+
+
+async def vision_request(content, max_tokens=VISION_MAX_TOKENS_PER_SLIDE):
+    """
+    Send one chat completion with the given message content.
+
+    Rate-limit (429), server (5xx) and connection errors are retried with
+    exponential backoff. Returns the response text, "" on failure, and the
+    token usage if the API reported it.
+    """
+    client = get_openai_client()
+
+    for attempt in range(VISION_MAX_RETRIES + 1):
+        try:
+            with span("model_call"), MODEL_CALLS_IN_FLIGHT.track():
+                response = await client.chat.completions.create(
+                    model=VISION_MODEL,
+                    messages=[{"role": "user", "content": content}],
+                    max_tokens=max_tokens
+                )
+            MODEL_CALLS.inc(outcome="ok")
+            if response.usage is not None:
+                MODEL_TOKENS.inc(response.usage.prompt_tokens or 0,
+                                 kind="prompt")
+                MODEL_TOKENS.inc(response.usage.completion_tokens or 0,
+                                 kind="completion")
+            return (response.choices[0].message.content.strip(),
+                    response.usage)
+        except Exception as e:
+            if not is_retryable(e) or attempt == VISION_MAX_RETRIES:
+                MODEL_CALLS.inc(outcome="error")
+                logger.error("Error in GPT-4o-mini analysis: %s", e)
+                return "", None
+            MODEL_CALLS.inc(outcome="retry")
+            delay = retry_delay(e, attempt)
+            logger.warning("GPT-4o-mini request failed (%s), retrying in "
+                           "%.1fs", e, delay)
+            await asyncio.sleep(delay)
+    return "", None
+
+
+async def gpt4_vision_analysis(image_data, prompt, media_type="image/png"):
+    """
+    Helper function to use GPT-4o-mini for image analysis.
+    """
+    text, _ = await vision_request([{"type": "text", "text": prompt},
+                                    image_content(image_data, media_type)])
+    return text
+
+
+def parse_json_response(response_text):
     # Remove code fences if present
     cleaned_response = re.sub(
         r'^```[^\n]*\n|```$', '', response_text.strip(), flags=re.MULTILINE)
+    return json.loads(cleaned_response)
+
+
+async def analyze_slide_image(image_data, slide_number,
+                              media_type="image/png",
+                              prompt_template=SLIDE_ANALYSIS_PROMPT,
+                              usage: VisionUsage = None):
+    """
+    Analyze a single slide using GPT-4o-mini.
+    """
+    prompt = prompt_template.format(slide_number=slide_number)
+    started = time.monotonic()
+    response_text, response_usage = await vision_request(
+        [{"type": "text", "text": prompt},
+         image_content(image_data, media_type)])
+    if usage is not None:
+        usage.record("single", 1, time.monotonic() - started, response_usage)
 
     try:
-        analysis = json.loads(cleaned_response)
+        analysis = parse_json_response(response_text)
     except json.JSONDecodeError:
-        logging.error(
-            f"Failed to parse GPT response for slide {slide_number}.")
+        logger.error("Failed to parse GPT response for slide %s.",
+                     slide_number)
         analysis = {}
+    if not isinstance(analysis, dict):
+        logger.error("GPT response for slide %s is not a JSON object.",
+                     slide_number)
+        analysis = {}
+    if not analysis and usage is not None:
+        usage.record_failure()
     return analysis
+
+
+async def analyze_slide_batch(slide_images, slide_numbers,
+                              media_type="image/png",
+                              prompt_template=BATCH_SLIDE_ANALYSIS_PROMPT,
+                              usage: VisionUsage = None,
+                              required_keys=SLIDE_ANALYSIS_KEYS) -> dict:
+    """
+    Analyze several slides in one request.
+
+    Returns {slide_number: analysis} for the slides the model answered
+    with a JSON object holding every one of `required_keys`; missing,
+    malformed or incomplete entries are left out for the caller to retry
+    one by one.
+    """
+    prompt = prompt_template.format(
+        slide_numbers=", ".join(str(n) for n in slide_numbers))
+    content = [{"type": "text", "text": prompt}]
+    for image_data, slide_number in zip(slide_images, slide_numbers):
+        content.append({"type": "text", "text": f"Slide {slide_number}:"})
+        content.append(image_content(image_data, media_type))
+
+    started = time.monotonic()
+    response_text, response_usage = await vision_request(
+        content, max_tokens=VISION_MAX_TOKENS_PER_SLIDE * len(slide_images))
+    if usage is not None:
+        usage.record("batched", len(slide_images),
+                     time.monotonic() - started, response_usage)
+
+    try:
+        items = parse_json_response(response_text)
+    except json.JSONDecodeError:
+        logger.error("Failed to parse GPT response for slides %s.",
+                     slide_numbers)
+        return {}
+    if isinstance(items, dict):
+        items = items.get("slides", [items])
+    if not isinstance(items, list):
+        return {}
+
+    analyses = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            slide_number = int(item.pop("slide_number", None))
+        except (TypeError, ValueError):
+            continue
+        if slide_number not in slide_numbers:
+            continue
+        if not all(key in item for key in required_keys):
+            logger.warning("Batch answer for slide %s is incomplete.",
+                           slide_number)
+            continue
+        analyses[slide_number] = item
+    return analyses
+
+
+async def analyze_slide_images(slide_images, concurrency=VISION_CONCURRENCY,
+                               slide_numbers=None, media_type="image/png",
+                               on_result=None,
+                               prompt_template=SLIDE_ANALYSIS_PROMPT,
+                               batch_size=None,
+                               batch_prompt_template=
+                               BATCH_SLIDE_ANALYSIS_PROMPT,
+                               required_keys=SLIDE_ANALYSIS_KEYS,
+                               usage: VisionUsage = None):
+    """
+    Analyze all slides of a deck concurrently.
+
+    At most `concurrency` requests are in flight at once and each slide gets
+    VISION_SLIDE_TIMEOUT seconds. Results are returned in input order; a
+    slide that times out gets an empty analysis. slide_numbers defaults to
+    1..N and only needs passing when analyzing a subset of a deck.
+    on_result(slide_number, analysis) is called as each slide finishes.
+    prompt_template selects which questions are asked.
+
+    With batch_size (default VISION_BATCH_SIZE) above 1, slides are packed
+    into requests of that many images using batch_prompt_template; slides
+    a batch fails to answer with every one of `required_keys` are retried
+    one by one. Token usage and time
+    are recorded into `usage` when given.
+    """
+    if slide_numbers is None:
+        slide_numbers = range(1, len(slide_images) + 1)
+    slide_numbers = list(slide_numbers)
+    batch_size = VISION_BATCH_SIZE if batch_size is None else batch_size
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+
+    def finish(slide_number, analysis):
+        results[slide_number] = analysis
+        if on_result is not None:
+            on_result(slide_number, analysis)
+
+    async def analyze(image_data, slide_number):
+        async with semaphore:
+            try:
+                analysis = await asyncio.wait_for(
+                    analyze_slide_image(image_data, slide_number,
+                                        media_type, prompt_template, usage),
+                    VISION_SLIDE_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.error("Analysis for slide %s timed out.", slide_number)
+                analysis = {}
+                if usage is not None:
+                    usage.record_failure()
+        finish(slide_number, analysis)
+
+    async def analyze_batch(batch):
+        numbers = [slide_number for _, slide_number in batch]
+        async with semaphore:
+            try:
+                analyses = await asyncio.wait_for(
+                    analyze_slide_batch([image for image, _ in batch],
+                                        numbers, media_type,
+                                        batch_prompt_template, usage,
+                                        required_keys),
+                    VISION_SLIDE_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.error("Analysis for slides %s timed out.", numbers)
+                analyses = {}
+        for slide_number, analysis in analyses.items():
+            finish(slide_number, analysis)
+        missing = [(image_data, slide_number)
+                   for image_data, slide_number in batch
+                   if slide_number not in analyses]
+        if missing:
+            logger.warning("Batch left slides %s unanswered, falling back "
+                           "to per-slide requests", [n for _, n in missing])
+            await asyncio.gather(*(analyze(image_data, slide_number)
+                                   for image_data, slide_number in missing))
+
+    slides = list(zip(slide_images, slide_numbers))
+    if batch_size > 1:
+        await asyncio.gather(*(
+            analyze_batch(slides[start:start + batch_size])
+            for start in range(0, len(slides), batch_size)))
+    else:
+        await asyncio.gather(*(analyze(image_data, slide_number)
+                               for image_data, slide_number in slides))
+    return [results[slide_number] for slide_number in slide_numbers]
@@ -0,0 +1,157 @@
+# app/utils/render_profiles.py
+
+import io
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, asdict, replace
+from typing import Optional
+
+from PIL import Image
+
+# Lowest quality the byte-budget search will go to before downscaling
+MIN_QUALITY = 40
+DOWNSCALE_STEP = 0.85
+
+FORMAT_EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp", "PNG": "png"}
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """
+    How one rendition of a slide is sized and encoded.
+
+    Size is given either as max_edge (longest side in pixels) or dpi. When
+    max_bytes is set, quality and then size are reduced until the encoded
+    image fits.
+    """
+    name: str
+    format: str = "JPEG"
+    max_edge: Optional[int] = None
+    dpi: Optional[int] = None
+    quality: int = 85
+    max_bytes: Optional[int] = None
+    enabled: bool = True
+
+    @property
+    def extension(self) -> str:
+        return FORMAT_EXTENSIONS[self.format]
+
+    @property
+    def media_type(self) -> str:
+        return f"image/{self.format.lower()}"
+
+    def target_size(self, page_width_pt: float, page_height_pt: float):
+        """
+        Pixel size of this rendition for a page measured in PDF points.
+        """
+        scale = (self.dpi or 72) / 72
+        width, height = page_width_pt * scale, page_height_pt * scale
+        if self.max_edge:
+            scale = self.max_edge / max(page_width_pt, page_height_pt)
+            width, height = page_width_pt * scale, page_height_pt * scale
+        return max(1, round(width)), max(1, round(height))
+
+
+DEFAULT_RENDER_PROFILES = {
+    # Sized for the vision model's input, which is downscaled server-side
+    # anyway; JPEG keeps the base64 payload small.
+    "model": RenderProfile("model", format="JPEG", max_edge=1024,
+                           quality=80, max_bytes=350 * 1024),
+    "thumbnail": RenderProfile("thumbnail", format="WEBP", max_edge=480,
+                               quality=70, max_bytes=60 * 1024),
+    "preview": RenderProfile("preview", format="PNG", dpi=150,
+                             enabled=False),
+}
+
+
+def load_render_profiles() -> dict:
+    """
+    Default profiles with overrides from the RENDER_PROFILES environment
+    variable, e.g. '{"preview": {"enabled": true}, "model": {"quality": 70}}'.
+    """
+    profiles = dict(DEFAULT_RENDER_PROFILES)
+    overrides = json.loads(os.getenv("RENDER_PROFILES", "{}"))
+    for name, fields in overrides.items():
+        base = profiles.get(name, RenderProfile(name))
+        fields = dict(fields)
+        if "format" in fields:
+            fields["format"] = fields["format"].upper()
+        profiles[name] = replace(base, **fields)
+    return {name: profile for name, profile in profiles.items()
+            if profile.enabled}
+
+
+RENDER_PROFILES = load_render_profiles()
+
+
+def profiles_fingerprint(profiles) -> dict:
+    return {name: asdict(profile) for name, profile in profiles.items()}
+
+
+def source_dpi(profiles, page_width_pt, page_height_pt) -> float:
+    """
+    Smallest DPI at which a single rasterization covers every profile.
+    """
+    longest_edge_pt = max(page_width_pt, page_height_pt)
+    dpi = 72
+    for profile in profiles.values():
+        width, height = profile.target_size(page_width_pt, page_height_pt)
+        dpi = max(dpi, max(width, height) * 72 / longest_edge_pt)
+    return dpi
+
+
+def encode_rendition(image: Image.Image, profile: RenderProfile,
+                     size=None) -> bytes:
+    """
+    Encode an image for a profile, resizing it to `size` first and
+    honouring the profile's byte budget.
+    """
+    if size and size != image.size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+
+    quality = profile.quality
+    while True:
+        buffer = io.BytesIO()
+        if profile.format == "PNG":
+            image.save(buffer, format="PNG", optimize=True)
+        else:
+            image.save(buffer, format=profile.format, quality=quality)
+        data = buffer.getvalue()
+
+        if not profile.max_bytes or len(data) <= profile.max_bytes:
+            return data
+        if profile.format != "PNG" and quality > MIN_QUALITY:
+            quality = max(MIN_QUALITY, quality - 10)
+            continue
+        width, height = image.size
+        if min(width, height) <= 64:
+            return data
+        image = image.resize((int(width * DOWNSCALE_STEP),
+                              int(height * DOWNSCALE_STEP)),
+                             Image.Resampling.LANCZOS)
+        quality = profile.quality
+
+
+def render_page_profiles(page, profiles=None, timings=None) -> dict:
+    """
+    Rasterize a PyMuPDF page once and encode it for every profile. Seconds
+    spent on each step go into `timings` ("rasterize", "encode") if given.
+    """
+    profiles = RENDER_PROFILES if profiles is None else profiles
+    started = time.perf_counter()
+    width_pt, height_pt = page.rect.width, page.rect.height
+    dpi = math.ceil(source_dpi(profiles, width_pt, height_pt))
+    pix = page.get_pixmap(dpi=dpi, alpha=False)
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    rasterized = time.perf_counter()
+    renditions = {
+        name: encode_rendition(image, profile,
+                               profile.target_size(width_pt, height_pt))
+        for name, profile in profiles.items()
+    }
+    if timings is not None:
+        timings["rasterize"] = rasterized - started
+        timings["encode"] = time.perf_counter() - rasterized
+    return renditions
@@ -0,0 +1,243 @@
+# app/utils/structural_classifier.py
+
+import os
+import re
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
+
+# Slides classified at or above this confidence skip the vision model's
+# structural questions
+STRUCTURAL_CONFIDENCE_THRESHOLD = float(
+    os.getenv("STRUCTURAL_CONFIDENCE_THRESHOLD", "0.75"))
+# "local" answers best practices/suggestions with the heuristics below,
+# "vision" still asks the model for them with the reduced subjective prompt
+STRUCTURAL_SUBJECTIVE_CHECKS = os.getenv("STRUCTURAL_SUBJECTIVE_CHECKS",
+                                         "local")
+# Bumped whenever the heuristics change, to invalidate cached analyses
+CLASSIFIER_VERSION = 1
+
+# Heuristic best-practice limits for a single slide
+MAX_WORDS_PER_SLIDE = 50
+MAX_BULLETS_PER_SLIDE = 6
+# Text of at most this many words with no bullets reads as a title
+TITLE_MAX_WORDS = 20
+# An image covering this share of the slide probably carries text the text
+# layer cannot see, e.g. a slide exported as a picture
+FULL_SLIDE_IMAGE_RATIO = 0.6
+# Beyond this many vector paths a page most likely holds a chart or diagram
+MAX_VECTOR_PATHS = 40
+
+# Bullet glyphs, including the private-use Symbol/Wingdings code points
+# PowerPoint exports bullets as
+BULLET_PATTERN = re.compile(
+    r"^\s*(?:[\u2022\u00b7\u25aa\u25ab\u2023\u25e6\u25cf\u25cb\u25a0"
+    r"\u25a1\u27a2\u27a4\u25ba\u25b6\u2713\u2714\-\u2013\u2014*]"
+    r"|[\uf06e\uf076\uf0a7\uf0a8\uf0b7\uf0d8\uf0fc]"
+    r"|\(?\d{1,2}[.)](?=\s|$)|[a-zA-Z][.)](?=\s))")
+
+TITLE_PLACEHOLDERS = {PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE,
+                      PP_PLACEHOLDER.VERTICAL_TITLE}
+BODY_PLACEHOLDERS = {PP_PLACEHOLDER.BODY, PP_PLACEHOLDER.OBJECT,
+                     PP_PLACEHOLDER.VERTICAL_BODY,
+                     PP_PLACEHOLDER.VERTICAL_OBJECT}
+IGNORED_PLACEHOLDERS = {PP_PLACEHOLDER.DATE, PP_PLACEHOLDER.FOOTER,
+                        PP_PLACEHOLDER.HEADER, PP_PLACEHOLDER.SLIDE_NUMBER}
+
+
+def best_practice_heuristics(word_count, bullet_points, images):
+    """
+    Local stand-in for the model's subjective fields: minimal text and
+    some visual emphasis.
+    """
+    suggestions = []
+    if word_count > MAX_WORDS_PER_SLIDE:
+        suggestions.append(
+            f"Reduce the text on this slide ({word_count} words).")
+    if bullet_points > MAX_BULLETS_PER_SLIDE:
+        suggestions.append(
+            f"Use fewer bullet points ({bullet_points}); split the slide or "
+            "summarize.")
+    if images == 0 and word_count > TITLE_MAX_WORDS:
+        suggestions.append("Consider adding a visual to support the text.")
+    return {
+        'adheres_to_best_practices': not suggestions,
+        'suggestions': " ".join(suggestions) or "No changes needed.",
+    }
+
+
+def structure_result(slide_number, is_title_slide, bullet_points, images,
+                     word_count, confidence):
+    result = {
+        'slide_number': slide_number,
+        'is_title_slide': is_title_slide,
+        'bullet_points': bullet_points,
+        'images': images,
+        'word_count': word_count,
+        'confidence': round(max(0.0, min(confidence, 1.0)), 2),
+    }
+    result.update(best_practice_heuristics(word_count, bullet_points, images))
+    return result
+
+
+def is_bullet(text):
+    return bool(BULLET_PATTERN.match(text))
+
+
+def classify_pdf_page(page) -> dict:
+    """
+    Classify a PyMuPDF page from its text layer, image blocks and vector
+    paths.
+
+    Confidence is low when the page likely holds content the text layer
+    does not describe: no text at all, a near full-page image, or a chart.
+    """
+    page_area = abs(page.rect) or 1
+    text_lines = []
+    image_count = 0
+    largest_image_ratio = 0.0
+    for block in page.get_text("dict")["blocks"]:
+        if block["type"] == 1:
+            image_count += 1
+            x0, y0, x1, y1 = block["bbox"]
+            largest_image_ratio = max(largest_image_ratio,
+                                      (x1 - x0) * (y1 - y0) / page_area)
+            continue
+        for line in block["lines"]:
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                sizes = [span["size"] for span in line["spans"]
+                         if span["text"].strip()]
+                text_lines.append((text, max(sizes)))
+
+    words = sum(len(BULLET_PATTERN.sub("", text).split())
+                for text, _ in text_lines)
+    # A bullet glyph in its own span is extracted as a line of its own
+    bullet_points = sum(1 for text, _ in text_lines if is_bullet(text))
+    vector_paths = len(page.get_drawings())
+
+    is_title = (bullet_points == 0 and 0 < words <= TITLE_MAX_WORDS
+                and len(text_lines) <= 4 and image_count <= 1)
+
+    confidence = 1.0
+    if not text_lines and not image_count:
+        confidence = 0.0
+    elif largest_image_ratio >= FULL_SLIDE_IMAGE_RATIO:
+        confidence = 0.2
+    elif vector_paths > MAX_VECTOR_PATHS:
+        confidence = 0.5
+    elif is_title and page.number > 0:
+        # Title or section divider; the model tells them apart better
+        confidence = 0.6
+    elif bullet_points == 0 and len(text_lines) >= 3:
+        # Lists whose bullets are drawn rather than typed look like this
+        confidence = 0.7
+
+    return structure_result(page.number + 1, is_title, bullet_points,
+                            image_count, words, confidence)
+
+
+def _iter_shapes(shapes):
+    for shape in shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            yield from _iter_shapes(shape.shapes)
+        else:
+            yield shape
+
+
+def _paragraph_has_bullet(paragraph, in_body):
+    p_pr = paragraph._p.pPr
+    if p_pr is not None:
+        if p_pr.xpath("./a:buNone"):
+            return False
+        if p_pr.xpath("./a:buChar|./a:buAutoNum"):
+            return True
+    # Body placeholders inherit bullets from the layout
+    return in_body
+
+
+def classify_pptx_slide(slide, slide_number, slide_area) -> dict:
+    """
+    Classify a python-pptx slide from its placeholders, text frames and
+    picture shapes.
+    """
+    words = 0
+    bullet_points = 0
+    images = 0
+    has_title = False
+    has_subtitle = False
+    has_body_text = False
+    largest_image_ratio = 0.0
+    confidence = 0.95
+
+    for shape in _iter_shapes(slide.shapes):
+        placeholder_type = None
+        if shape.is_placeholder:
+            placeholder_type = shape.placeholder_format.type
+            if placeholder_type in IGNORED_PLACEHOLDERS:
+                continue
+
+        if shape.shape_type == MSO_SHAPE_TYPE.PICTURE or (
+                placeholder_type == PP_PLACEHOLDER.PICTURE
+                and hasattr(shape, "image")):
+            if shape._element.xpath('./p:nvPicPr/p:nvPr/a:videoFile'
+                                    '|./p:nvPicPr/p:nvPr/a:audioFile'):
+                continue
+            images += 1
+            if shape.width and shape.height:
+                largest_image_ratio = max(
+                    largest_image_ratio,
+                    shape.width * shape.height / slide_area)
+        elif getattr(shape, "has_chart", False):
+            images += 1
+        elif shape.shape_type in (MSO_SHAPE_TYPE.DIAGRAM,
+                                  MSO_SHAPE_TYPE.EMBEDDED_OLE_OBJECT):
+            # SmartArt and embedded objects: the model decides what counts
+            images += 1
+            confidence = min(confidence, 0.5)
+
+        if not shape.has_text_frame:
+            continue
+        in_body = placeholder_type in BODY_PLACEHOLDERS
+        for paragraph in shape.text_frame.paragraphs:
+            text = "".join(run.text for run in paragraph.runs).strip()
+            if not text:
+                continue
+            words += len(text.split())
+            if placeholder_type in TITLE_PLACEHOLDERS:
+                has_title = True
+            elif placeholder_type == PP_PLACEHOLDER.SUBTITLE:
+                has_subtitle = True
+            else:
+                has_body_text = True
+                if _paragraph_has_bullet(paragraph, in_body):
+                    bullet_points += 1
+
+    is_title = ((has_title or has_subtitle) and not has_body_text
+                and bullet_points == 0 and words <= TITLE_MAX_WORDS)
+
+    if not words and not images:
+        confidence = 0.0
+    elif largest_image_ratio >= FULL_SLIDE_IMAGE_RATIO:
+        confidence = 0.2
+    elif is_title and not has_subtitle and slide_number > 1:
+        confidence = min(confidence, 0.6)
+
+    return structure_result(slide_number, is_title, bullet_points, images,
+                            words, confidence)
+
+
+def classify_pptx(file_path) -> list:
+    """
+    Classify every slide of a PPTX deck that is exported to PDF, i.e.
+    skipping hidden slides, so results line up with the rendered pages.
+    """
+    prs = Presentation(file_path)
+    slide_area = (prs.slide_width * prs.slide_height) or 1
+    structures = []
+    for slide in prs.slides:
+        if slide._element.get("show") == "0":
+            continue
+        structures.append(classify_pptx_slide(slide, len(structures) + 1,
+                                              slide_area))
+    return structures
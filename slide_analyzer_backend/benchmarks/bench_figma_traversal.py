@@ -0,0 +1,134 @@
+# benchmarks/bench_figma_traversal.py
+"""
+Time and peak memory of summarizing a large Figma file: the streaming
+traversal against loading the whole JSON and walking it recursively, as
+analyze_figma used to.
+
+    python -m benchmarks.bench_figma_traversal --mb 300 --depth 12
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from app.services.remote_decks import summarize_figma_file
+
+
+def write_figma_document(path, target_mb=300, depth=12, seed=0):
+    """
+    Write a synthetic /v1/files response of about target_mb, one slide
+    frame at a time so the generator itself stays small. Each frame holds
+    a chain of nested groups `depth` deep with styled text at every level.
+    """
+    rng = random.Random(seed)
+    target_bytes = target_mb * 1024 * 1024
+    fonts = ["Inter", "Roboto", "Source Sans Pro", "Playfair Display"]
+    frames = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"name": "Synthetic", "version": "1", "document": '
+                '{"id": "0:0", "type": "DOCUMENT", "children": ['
+                '{"id": "0:1", "type": "CANVAS", "name": "Slides", '
+                '"children": [')
+        while f.tell() < target_bytes:
+            frames += 1
+            if frames > 1:
+                f.write(", ")
+            f.write(f'{{"id": "1:{frames}", "type": "FRAME", '
+                    f'"name": "Slide {frames}", "children": [')
+            for level in range(depth):
+                text = {
+                    "id": f"{frames}:{level}:t",
+                    "type": "TEXT",
+                    "characters": " ".join(
+                        rng.choice(["lorem", "ipsum", "dolor", "sit"])
+                        for _ in range(40)),
+                    "style": {"fontFamily": rng.choice(fonts),
+                              "fontSize": 24},
+                    "absoluteBoundingBox": {"x": 0, "y": 0, "width": 100,
+                                            "height": 40},
+                    "fills": [{"type": "SOLID", "color": {
+                        "r": rng.random(), "g": rng.random(),
+                        "b": rng.random(), "a": 1}}],
+                }
+                f.write(json.dumps(text))
+                f.write(f', {{"id": "{frames}:{level}", "type": "GROUP", '
+                        '"children": [')
+            f.write("]}" * depth + "]")
+            if frames % 10 == 0:
+                f.write(', "interactions": [{"actions": [{"type": '
+                        '"UPDATE_MEDIA_RUNTIME", "mediaAction": '
+                        '"TOGGLE_PLAY_PAUSE"}]}]')
+            f.write("}")
+        f.write("]}]}}")
+    return frames
+
+
+def summarize_loaded(path):
+    """
+    The previous approach: json.load, then a recursive walk.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    slides = []
+    fonts = set()
+
+    def traverse_node(node):
+        if node['type'] == 'CANVAS' and not slides:
+            slides.extend(node.get('children', []))
+        if 'style' in node and 'fontFamily' in node['style']:
+            fonts.add(node['style']['fontFamily'])
+        for child in node.get('children', []):
+            traverse_node(child)
+
+    traverse_node(data['document'])
+    return len(slides), sorted(fonts)
+
+
+def run(method, path):
+    sys.setrecursionlimit(10000)
+    started = time.perf_counter()
+    if method == "streaming":
+        summary = summarize_figma_file(path)
+        result = summary["number_of_slides"], summary["fonts_used"]
+    else:
+        result = summarize_loaded(path)
+    elapsed = time.perf_counter() - started
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result, elapsed, peak_rss_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=float, default=300)
+    parser.add_argument("--depth", type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "figma.json")
+        frames = write_figma_document(path, args.mb, args.depth)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{size_mb:.0f} MB document, {frames} slide frames, "
+              f"nesting depth {args.depth}")
+        print(f"{'method':>10} {'seconds':>9} {'MB/s':>8} "
+              f"{'peak RSS MB':>12}")
+        context = multiprocessing.get_context("spawn")
+        results = {}
+        for method in ("streaming", "json.load"):
+            # A fresh process per method so peak RSS is its own
+            with context.Pool(1) as pool:
+                result, elapsed, peak = pool.apply(run, (method, path))
+            results[method] = result
+            print(f"{method:>10} {elapsed:>9.2f} {size_mb / elapsed:>8.1f} "
+                  f"{peak:>12.0f}")
+        if results["streaming"] != results["json.load"]:
+            print("Results differ:", results)
+
+
+if __name__ == "__main__":
+    main()
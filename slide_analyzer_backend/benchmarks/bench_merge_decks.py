@@ -0,0 +1,114 @@
+# benchmarks/bench_merge_decks.py
+"""
+Merge time, output size and peak memory of building the master deck as
+decks are approved one by one: the incremental PyMuPDF engine against a
+full rebuild on every approval, with PyPDF2/pypdf (the previous
+implementation) and with PyMuPDF.
+
+    python -m benchmarks.bench_merge_decks --decks 30 --pages 15
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import fitz
+
+from app.services.merge_decks import merge_approved_decks
+from benchmarks.synthetic_decks import make_template_deck, make_template_image
+
+
+def pypdf_merger():
+    try:
+        from PyPDF2 import PdfMerger
+        return PdfMerger
+    except ImportError:
+        pass
+    try:
+        from pypdf import PdfWriter
+        return PdfWriter
+    except ImportError:
+        return None
+
+
+def rebuild_pypdf(decks, output_path):
+    merger = pypdf_merger()()
+    for path in decks:
+        merger.append(path)
+    merger.write(output_path)
+    merger.close()
+
+
+def rebuild_pymupdf(decks, output_path):
+    master = fitz.open()
+    for path in decks:
+        with fitz.open(path) as source:
+            master.insert_pdf(source)
+    master.save(output_path, garbage=4, deflate=True)
+    master.close()
+
+
+def run(method, source_decks, work_dir):
+    """
+    Approve the decks one at a time, updating the master after each.
+    """
+    approved_dir = os.path.join(work_dir, "approved")
+    os.makedirs(approved_dir)
+    output_path = os.path.join(work_dir, "master_deck.pdf")
+    approved = []
+    started = time.perf_counter()
+    for path in source_decks:
+        target = os.path.join(approved_dir, os.path.basename(path))
+        shutil.copyfile(path, target)
+        approved.append(target)
+        if method == "incremental":
+            merge_approved_decks(output_path, approved_dir, order=[])
+        elif method == "rebuild-pymupdf":
+            rebuild_pymupdf(approved, output_path)
+        else:
+            rebuild_pypdf(approved, output_path)
+    elapsed = time.perf_counter() - started
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return elapsed, os.path.getsize(output_path), peak_rss_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--decks", type=int, default=30)
+    parser.add_argument("--pages", type=int, default=15)
+    args = parser.parse_args()
+
+    methods = ["incremental", "rebuild-pymupdf"]
+    if pypdf_merger() is not None:
+        methods.append("rebuild-pypdf")
+    else:
+        print("PyPDF2/pypdf not installed, skipping the previous "
+              "implementation")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template_image = make_template_image()
+        decks = [make_template_deck(os.path.join(tmp, f"deck{i:03}.pdf"),
+                                    args.pages, i, template_image)
+                 for i in range(args.decks)]
+        source_size = sum(os.path.getsize(path) for path in decks)
+        print(f"{args.decks} decks x {args.pages} pages, "
+              f"{source_size / 1e6:.1f} MB of sources")
+        print(f"{'method':>16} {'seconds':>9} {'size MB':>9} "
+              f"{'peak RSS MB':>12}")
+        context = multiprocessing.get_context("spawn")
+        for method in methods:
+            work_dir = tempfile.mkdtemp(dir=tmp)
+            # A fresh process per method so peak RSS is its own
+            with context.Pool(1) as pool:
+                elapsed, size, peak = pool.apply(run, (method, decks,
+                                                       work_dir))
+            print(f"{method:>16} {elapsed:>9.2f} {size / 1e6:>9.2f} "
+                  f"{peak:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end cost of process_slide_deck on synthetic PDF and PPTX decks of
+each content mix, stage by stage: latency, slides per second and peak RSS
+of the process and its render workers. The vision API is a local stub
+that answers deterministically after a fixed latency.
+
+Results are compared against benchmarks/baselines.json and the run exits
+with status 1 when a stage is slower or larger than its baseline by more
+than the tolerance. Baselines are machine specific; record them with
+--update-baselines on the machine that runs the check.
+
+    python -m benchmarks.bench_pipeline --slides 30 --formats pdf pptx
+    python -m benchmarks.bench_pipeline --update-baselines
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.synthetic_decks import DECK_MIXES, make_deck
+from tests.stub_openai_server import StubOpenAIServer
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+# Absolute slack on top of the relative tolerances, so stages that take a
+# few milliseconds or megabytes do not fail on noise
+SECONDS_SLACK = 0.05
+RSS_SLACK_MB = 16
+
+
+class StubVisionServer(StubOpenAIServer):
+    """
+    Answers every slide with an analysis derived from a hash of the
+    request, so repeated runs see identical results.
+    """
+
+    def respond(self, body):
+        digest = hashlib.sha256(json.dumps(body.get("messages"),
+                                           sort_keys=True).encode()).digest()
+        self.analysis = {
+            "is_title_slide": digest[0] % 8 == 0,
+            "bullet_points": digest[1] % 7,
+            "images": digest[2] % 3,
+            "adheres_to_best_practices": digest[3] % 2 == 0,
+            "suggestions": "None.",
+        }
+        return super().respond(body)
+
+
+def _processes():
+    """
+    This process and its descendants (render workers, soffice).
+    """
+    pids = [os.getpid()]
+    for pid in pids:
+        for children in glob.glob(f"/proc/{pid}/task/*/children"):
+            try:
+                with open(children) as f:
+                    pids.extend(int(child) for child in f.read().split())
+            except OSError:
+                pass
+    return pids
+
+
+def reset_peak_rss():
+    # Writing 5 to clear_refs resets the kernel's peak RSS (VmHWM)
+    for pid in _processes():
+        try:
+            with open(f"/proc/{pid}/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+
+
+def peak_rss_mb() -> float:
+    """
+    Sum of the peak RSS of this process and its descendants since the
+    last reset_peak_rss; without /proc, this process's lifetime peak.
+    """
+    total_kb = 0
+    for pid in _processes():
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            pass
+    if not total_kb:
+        total_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return total_kb / 1024
+
+
+async def run_stages(path, file_format):
+    from app.services import slide_processor
+    from app.services.analysis_cache import hash_file
+    from app.services.pptx_converter import (SOFFICE_BINARY,
+                                             convert_pptx_to_pdf)
+    from app.services.render_pool import (RENDER_WORKERS, render_pdf,
+                                          get_render_executor)
+    from app.utils.file_analyzers import render_pdf_page_range
+    from app.utils.pptx_package import analyze_pptx_package
+    from app.utils.structural_classifier import classify_pptx
+
+    stages = []
+
+    async def stage(name, awaitable):
+        reset_peak_rss()
+        started = time.perf_counter()
+        result = await awaitable
+        stages.append({"stage": name,
+                       "seconds": time.perf_counter() - started,
+                       "peak_rss_mb": peak_rss_mb()})
+        return result
+
+    executor = get_render_executor()
+    if executor is not None:
+        # Start the workers and import PyMuPDF in them before measuring
+        warm_pdf = make_deck("warm.pdf", "pdf", "text", slides=1)
+        await asyncio.gather(*(
+            asyncio.wrap_future(executor.submit(render_pdf_page_range,
+                                                os.path.abspath(warm_pdf),
+                                                0, 1))
+            for _ in range(RENDER_WORKERS)))
+
+    content_hash = await stage("hash", asyncio.to_thread(hash_file, path))
+    pdf_path = path
+    if file_format == "pptx":
+        await stage("analyze", asyncio.to_thread(
+            analyze_pptx_package, path, True, executor))
+        await stage("classify", asyncio.to_thread(classify_pptx, path))
+        if shutil.which(SOFFICE_BINARY) is None:
+            return stages, "soffice not found, PPTX stops after analysis"
+        pdf_path = await stage("convert",
+                               convert_pptx_to_pdf(path, content_hash))
+
+    pages = await stage("render", render_pdf(pdf_path, executor=executor))
+    await stage("vision", slide_processor.analyze_slides_with_cache(
+        [page['images']['model'] for page in pages],
+        [page['structure'] for page in pages]))
+
+    # Nothing cached from the stages above may serve the full run
+    shutil.rmtree("cache", ignore_errors=True)
+    slide_processor._slide_cache = None
+    await stage("end_to_end", slide_processor.process_slide_deck(
+        path, "bench", file_format))
+    return stages, None
+
+
+def run_deck(path, file_format, workdir, vision_url):
+    """
+    Run one deck's stages in this (fresh) process, inside `workdir`.
+    """
+    os.chdir(workdir)
+    os.environ["OPENAI_BASE_URL"] = vision_url
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    logging.getLogger("slide_analyzer").setLevel(logging.WARNING)
+
+    from app.services.pptx_converter import converter_pool
+    from app.services.render_pool import shutdown_render_pool
+    from app.utils.probabilistic_checks import close_openai_client
+
+    async def main():
+        try:
+            return await run_stages(path, file_format)
+        finally:
+            await close_openai_client()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        converter_pool.shutdown()
+        shutdown_render_pool()
+
+
+def regressions(results, baselines, time_tolerance, rss_tolerance):
+    found = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        seconds_limit = max(baseline["seconds"] * (1 + time_tolerance),
+                            baseline["seconds"] + SECONDS_SLACK)
+        rss_limit = max(baseline["peak_rss_mb"] * (1 + rss_tolerance),
+                        baseline["peak_rss_mb"] + RSS_SLACK_MB)
+        if result["seconds"] > seconds_limit:
+            found.append(f"{key}: {result['seconds']:.3f}s, baseline "
+                         f"{baseline['seconds']:.3f}s")
+        if result["peak_rss_mb"] > rss_limit:
+            found.append(f"{key}: {result['peak_rss_mb']:.0f} MB peak RSS, "
+                         f"baseline {baseline['peak_rss_mb']:.0f} MB")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--slides", type=int, default=30)
+    parser.add_argument("--formats", nargs="+", default=["pdf", "pptx"],
+                        choices=["pdf", "pptx"])
+    parser.add_argument("--mixes", nargs="+", default=DECK_MIXES,
+                        choices=DECK_MIXES)
+    parser.add_argument("--vision-latency", type=float, default=0.2,
+                        help="seconds the stub takes to answer a request")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--time-tolerance", type=float, default=0.3)
+    parser.add_argument("--rss-tolerance", type=float, default=0.2)
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubVisionServer(delay=args.vision_latency) as vision:
+        print(f"{args.slides} slides per deck, {os.cpu_count()} CPUs, "
+              f"vision latency {args.vision_latency}s")
+        print(f"{'deck':>14} {'stage':>10} {'seconds':>9} {'slides/s':>9} "
+              f"{'peak RSS MB':>12}")
+        for file_format in args.formats:
+            for mix in args.mixes:
+                deck = f"{file_format}-{mix}"
+                workdir = os.path.join(tmp, deck)
+                os.makedirs(workdir)
+                path = make_deck(os.path.join(workdir, f"deck.{file_format}"),
+                                 file_format, mix, args.slides)
+                # A fresh process per deck so peak RSS and caches are its
+                # own; not a Pool, whose daemonic workers cannot start the
+                # render pool
+                with ProcessPoolExecutor(1, mp_context=context) as runner:
+                    stages, note = runner.submit(
+                        run_deck, path, file_format, workdir,
+                        vision.base_url).result()
+                for result in stages:
+                    results[f"{deck}/{result['stage']}"] = result
+                    print(f"{deck:>14} {result['stage']:>10} "
+                          f"{result['seconds']:>9.3f} "
+                          f"{args.slides / result['seconds']:>9.1f} "
+                          f"{result['peak_rss_mb']:>12.0f}")
+                if note:
+                    print(f"{deck:>14} {note}")
+
+    measured = {key: {"seconds": round(result["seconds"], 3),
+                      "peak_rss_mb": round(result["peak_rss_mb"], 1)}
+                for key, result in results.items()}
+    if args.update_baselines:
+        with open(args.baselines, "w") as f:
+            json.dump(measured, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Wrote {len(measured)} baselines to {args.baselines}")
+        return
+
+    if not os.path.exists(args.baselines):
+        print(f"No baselines at {args.baselines}; record them with "
+              "--update-baselines")
+        return
+    with open(args.baselines) as f:
+        baselines = json.load(f)
+    found = regressions(measured, baselines, args.time_tolerance,
+                        args.rss_tolerance)
+    if found:
+        print("Regressions past the baselines:")
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"Within {args.time_tolerance:.0%} time and "
+          f"{args.rss_tolerance:.0%} RSS of the baselines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_pptx_analyzer.py
+"""
+Time to extract fonts and media flags from an image-heavy PPTX deck:
+python-pptx's object model (analyze_pptx) against streaming the package
+XML (analyze_pptx_package), sequentially and over a process pool.
+
+    python -m benchmarks.bench_pptx_analyzer --slides 100 --workers 2 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.utils.file_analyzers import analyze_pptx
+from app.utils.pptx_package import analyze_pptx_package, PPTX_SLIDES_PER_TASK
+from benchmarks.synthetic_decks import make_pptx_deck
+
+
+def timed(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return dict(result, fonts_used=sorted(result['fonts_used'])), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--slides", type=int, default=100)
+    parser.add_argument("--images-per-slide", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[2, os.cpu_count() or 1])
+    parser.add_argument("--slides-per-task", type=int,
+                        default=PPTX_SLIDES_PER_TASK)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_pptx_deck(os.path.join(tmp, "deck.pptx"), args.slides,
+                              images_per_slide=args.images_per_slide)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{args.slides} slides, {size_mb:.0f} MB, "
+              f"{os.cpu_count()} CPUs")
+
+        baseline, baseline_time = timed(lambda: analyze_pptx(path))
+        runs = [("analyze_pptx", baseline, baseline_time)]
+        runs.append(("package", *timed(
+            lambda: analyze_pptx_package(path, False))))
+        for workers in sorted(set(args.workers)):
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                # Warm the workers so process start-up is not measured
+                analyze_pptx_package(path, False, executor, 1)
+                runs.append((f"package x{workers}", *timed(
+                    lambda: analyze_pptx_package(
+                        path, False, executor, args.slides_per_task))))
+
+        print(f"{'analyzer':>14} {'seconds':>9} {'slides/s':>10} "
+              f"{'speedup':>8} {'same':>5}")
+        for name, result, elapsed in runs:
+            print(f"{name:>14} {elapsed:>9.3f} "
+                  f"{args.slides / elapsed:>10.0f} "
+                  f"{baseline_time / elapsed:>8.1f} "
+                  f"{'yes' if result == baseline else 'NO':>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_render_pool.py
+"""
+Pages per second of render_pdf against render pool size (0 = no pool,
+render in a thread).
+
+    python -m benchmarks.bench_render_pool --pages 120 --workers 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services.render_pool import render_pdf, RENDER_PAGES_PER_TASK
+from app.utils.file_analyzers import render_pdf_page_range
+from benchmarks.synthetic_decks import make_pdf_deck
+
+
+def warm_worker(pdf_path, barrier):
+    """
+    Render one page, then hold this worker until every other worker has
+    done the same, so no two warm-up tasks land on one worker.
+    """
+    render_pdf_page_range(pdf_path, 0, 1)
+    barrier.wait(timeout=120)
+
+
+def bench(pdf_path, pages, workers, pages_per_task):
+    if workers == 0:
+        started = time.perf_counter()
+        asyncio.run(render_pdf(pdf_path, executor=None))
+        return pages / (time.perf_counter() - started)
+
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager, ProcessPoolExecutor(
+            max_workers=workers, mp_context=context) as executor:
+        # The pool starts workers on demand; warm every one of them so
+        # process start-up and imports are not measured
+        barrier = manager.Barrier(workers)
+        for future in [executor.submit(warm_worker, pdf_path, barrier)
+                       for _ in range(workers)]:
+            future.result()
+        started = time.perf_counter()
+        asyncio.run(render_pdf(pdf_path, executor=executor,
+                               pages_per_task=pages_per_task))
+        return pages / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=120)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--pages-per-task", type=int,
+                        default=RENDER_PAGES_PER_TASK)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf_deck(os.path.join(tmp, "deck.pdf"), args.pages)
+        print(f"{args.pages} pages, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'pages/s':>10}")
+        for workers in sorted(set(args.workers)):
+            rate = bench(pdf_path, args.pages, workers, args.pages_per_task)
+            print(f"{workers:>8} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# benchmarks/synthetic_decks.py
+
+import random
+
+import fitz
+
+SLIDE_WIDTH = 960
+SLIDE_HEIGHT = 540
+
+
+def make_pdf_deck(path, pages=100, seed=0):
+    """
+    Write a synthetic PDF deck: a title bar, a few bullet lines and a
+    block of coloured shapes per page, so rendering cost resembles a real
+    text-and-graphics slide.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        page = doc.new_page(width=SLIDE_WIDTH, height=SLIDE_HEIGHT)
+        page.draw_rect(fitz.Rect(0, 0, SLIDE_WIDTH, 80), fill=(0.1, 0.2, 0.5))
+        page.insert_text((40, 55), f"Slide {number}", fontsize=32,
+                         color=(1, 1, 1))
+        for line in range(rng.randint(2, 6)):
+            page.insert_text((60, 140 + 40 * line),
+                             f"• Point {line + 1} about topic {number}",
+                             fontsize=20)
+        for _ in range(rng.randint(3, 12)):
+            x, y = rng.uniform(520, 880), rng.uniform(120, 460)
+            page.draw_circle((x, y), rng.uniform(10, 60),
+                             fill=(rng.random(), rng.random(), rng.random()))
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def make_text_pdf_deck(path, pages=100, seed=0):
+    """
+    Write a text-heavy PDF deck: a title and a dozen lines of body text in
+    a few fonts per page, and nothing else.
+    """
+    rng = random.Random(seed)
+    words = ["revenue", "growth", "quarterly", "customers", "pipeline",
+             "retention", "margin", "roadmap", "hiring", "launch"]
+    fonts = ["helv", "tiro", "cour"]
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        page = doc.new_page(width=SLIDE_WIDTH, height=SLIDE_HEIGHT)
+        page.insert_text((40, 60), f"Section {number}", fontsize=32,
+                         fontname="hebo")
+        for line in range(12):
+            text = " ".join(rng.choice(words) for _ in range(12))
+            page.insert_text((50, 110 + 34 * line), text, fontsize=18,
+                             fontname=rng.choice(fonts))
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def make_image_pdf_deck(path, pages=100, seed=0, image_size=(1280, 720)):
+    """
+    Write an image-heavy PDF deck: a full-bleed photo-like picture, different
+    on every page, under a short caption.
+    """
+    import io
+    from PIL import Image
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        # Noise at a lower resolution, scaled up, keeps some structure and
+        # does not compress away
+        image = Image.effect_noise((image_size[0] // 4, image_size[1] // 4),
+                                   rng.uniform(40, 90))
+        image = image.convert("RGB").resize(image_size)
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=85)
+        page = doc.new_page(width=SLIDE_WIDTH, height=SLIDE_HEIGHT)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+        page.insert_text((40, SLIDE_HEIGHT - 30), f"Photo {number}",
+                         fontsize=24, color=(1, 1, 1))
+    doc.save(str(path), deflate=True)
+    doc.close()
+    return str(path)
+
+
+def make_template_image(width=1280, height=720, seed=0):
+    """
+    PNG stand-in for a conference template background: noisy enough that
+    it does not compress away, so duplicate copies show in file sizes.
+    """
+    import io
+    from PIL import Image
+
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width // 8, height // 8))
+    image.putdata([(rng.randrange(256), rng.randrange(256), 200)
+                   for _ in range(image.width * image.height)])
+    image = image.resize((width, height))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_template_deck(path, pages=10, seed=0, template_image=None):
+    """
+    Write a deck whose pages all sit on the same template background, as
+    decks made from a shared conference template do.
+    """
+    template_image = template_image or make_template_image()
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        page = doc.new_page(width=SLIDE_WIDTH, height=SLIDE_HEIGHT)
+        page.insert_image(page.rect, stream=template_image)
+        page.insert_text((40, 55), f"Deck {seed} slide {number}",
+                         fontsize=32)
+    doc.save(str(path), garbage=4, deflate=True)
+    doc.close()
+    return str(path)
+
+
+PPTX_FONTS = ["Arial", "Georgia", "Verdana", "+mn-lt", "+mj-lt"]
+
+
+def make_pptx_deck(path, slides=100, seed=0, images_per_slide=4,
+                   image_size=(800, 450), background=None):
+    """
+    Write a synthetic PPTX deck mixing title and bullet slides with
+    explicit and theme fonts, pictures, tables, grouped text, and the odd
+    video and audio clip, so the package looks like an image-heavy talk.
+    `background` (image bytes) is placed behind every slide, as a template
+    would be.
+    """
+    import io
+
+    from lxml import etree
+    from PIL import Image
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+
+    rng = random.Random(seed)
+    prs = Presentation()
+
+    def make_image():
+        # Noise defeats both JPEG compression and python-pptx's image
+        # deduplication, so every picture is its own sizeable part
+        image = Image.effect_noise(image_size, rng.uniform(40, 90))
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, "JPEG", quality=85)
+        return buffer.getvalue()
+
+    images = [make_image(), make_image()]
+
+    def add_runs(text_frame, lines):
+        for line in range(lines):
+            paragraph = (text_frame.paragraphs[0] if line == 0
+                         else text_frame.add_paragraph())
+            for part in range(rng.randint(1, 3)):
+                run = paragraph.add_run()
+                run.text = f"Point {line + 1}.{part + 1} "
+                if rng.random() < 0.5:
+                    run.font.name = rng.choice(PPTX_FONTS)
+                    run.font.size = Pt(rng.choice([18, 20, 24]))
+
+    for number in range(1, slides + 1):
+        layout = prs.slide_layouts[0 if number == 1 else 1]
+        slide = prs.slides.add_slide(layout)
+        if background is not None:
+            slide.shapes.add_picture(io.BytesIO(background), 0, 0,
+                                     prs.slide_width, prs.slide_height)
+        slide.shapes.title.text = f"Slide {number}"
+        if number > 1:
+            add_runs(slide.placeholders[1].text_frame, rng.randint(2, 6))
+        for _ in range(images_per_slide):
+            slide.shapes.add_picture(
+                io.BytesIO(make_image()),
+                Inches(rng.uniform(0, 7)), Inches(rng.uniform(2, 5)),
+                width=Inches(2))
+        if number % 7 == 0:
+            table = slide.shapes.add_table(2, 2, Inches(1), Inches(5),
+                                           Inches(4), Inches(1)).table
+            table.cell(0, 0).text = "Table text"
+        if number % 5 == 0:
+            group = slide.shapes.add_group_shape()
+            box = group.shapes.add_textbox(Inches(6), Inches(1), Inches(2),
+                                           Inches(1))
+            add_runs(box.text_frame, 1)
+        if number % 10 == 0:
+            box = slide.shapes.add_textbox(Inches(1), Inches(6.5),
+                                           Inches(6), Inches(0.5))
+            add_runs(box.text_frame, 1)
+        if number % 25 == 0:
+            slide.shapes.add_movie(io.BytesIO(b"\x00" * 2048), Inches(5),
+                                   Inches(1), Inches(3), Inches(2),
+                                   mime_type="video/mp4",
+                                   poster_frame_image=io.BytesIO(images[0]))
+        if number % 40 == 0:
+            # python-pptx has no audio API; mark a picture as an audio clip
+            picture = slide.shapes.add_picture(io.BytesIO(images[1]),
+                                               Inches(1), Inches(1),
+                                               width=Inches(1))
+            nv_pr = picture._element.nvPicPr.nvPr
+            audio = etree.SubElement(
+                nv_pr, "{http://schemas.openxmlformats.org/drawingml/"
+                "2006/main}audioFile")
+            audio.set("{http://schemas.openxmlformats.org/officeDocument/"
+                      "2006/relationships}link", "rIdAudio")
+    prs.save(str(path))
+    return str(path)
+
+
+# Content mixes the benchmarks generate decks in
+DECK_MIXES = ["text", "image", "template"]
+
+
+def make_deck(path, file_format, mix, slides=30, seed=0):
+    """
+    Write a `file_format` ("pdf" or "pptx") deck of one of DECK_MIXES.
+    """
+    if file_format == "pdf":
+        if mix == "text":
+            return make_text_pdf_deck(path, slides, seed)
+        if mix == "image":
+            return make_image_pdf_deck(path, slides, seed)
+        if mix == "template":
+            return make_template_deck(path, slides, seed)
+    elif file_format == "pptx":
+        if mix == "text":
+            return make_pptx_deck(path, slides, seed, images_per_slide=0)
+        if mix == "image":
+            return make_pptx_deck(path, slides, seed, images_per_slide=4)
+        if mix == "template":
+            return make_pptx_deck(path, slides, seed, images_per_slide=0,
+                                  background=make_template_image(seed=seed))
+    raise ValueError(f"No {mix} deck generator for {file_format}")
@@ -0,0 +1,27 @@
+# tests/conftest.py
+
+import pytest
+
+from app.services import slide_processor
+from tests.deck_fixtures import ANALYSIS
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(slide_processor, "_slide_cache", None)
+    return tmp_path
+
+
+@pytest.fixture
+def vision_calls(monkeypatch):
+    calls = []
+
+    async def fake_analyze_slide_images(slide_images, slide_numbers=None,
+                                        **kwargs):
+        calls.extend(slide_numbers)
+        return [dict(ANALYSIS) for _ in slide_images]
+
+    monkeypatch.setattr(slide_processor, "analyze_slide_images",
+                        fake_analyze_slide_images)
+    return calls
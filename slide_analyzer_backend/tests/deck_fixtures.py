@@ -0,0 +1,66 @@
+# tests/deck_fixtures.py
+
+import fitz
+from pptx import Presentation
+
+from app.models.schemas import AnalysisResponse
+
+ANALYSIS = {
+    "is_title_slide": True,
+    "bullet_points": 2,
+    "images": 0,
+    "adheres_to_best_practices": True,
+    "suggestions": "None.",
+}
+
+
+def make_pdf(path, pages=3):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page(width=960, height=540)
+        page.insert_text((72, 100), f"Slide {number + 1}", fontname="helv",
+                         fontsize=36)
+        page.draw_rect(fitz.Rect(72, 200, 72 + 100 * (number + 1), 300),
+                       fill=(0.1 * number, 0.2, 0.6))
+    doc.save(str(path))
+    doc.close()
+
+
+def make_pptx(path, slides=3, hidden=()):
+    """
+    A PPTX deck of title-only slides on the default template, whose theme
+    fonts are Calibri. Slides numbered in `hidden` are hidden.
+    """
+    prs = Presentation()
+    for number in range(1, slides + 1):
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = f"Slide {number}"
+        if number in hidden:
+            slide._element.set("show", "0")
+    prs.save(str(path))
+    return str(path)
+
+
+def make_response(processing_id="original"):
+    return AnalysisResponse.model_validate({
+        "processing_id": processing_id,
+        "deterministic_checks": {
+            "format_check": {"accepted_format": True, "file_type": ".pdf",
+                             "message": "Format is acceptable."},
+            "size_check": {"size_within_limit": True, "file_size_mb": 1.0,
+                           "message": "File size is within limits."},
+            "slide_count_check": {"slide_count_within_limit": True,
+                                  "slide_count": 2,
+                                  "message": "Slide count is within limits."},
+        },
+        "file_analysis": {"number_of_slides": 2, "fonts_used": [],
+                          "video_present": False, "audio_present": False},
+        "probabilistic_checks": {
+            "title_slide_check": {"has_title_slide": True, "message": ""},
+            "bullet_point_check": {"has_few_bullet_points": True,
+                                   "message": ""},
+            "image_check": {"has_images": False, "image_count": 0,
+                            "message": ""},
+            "slide_analyses": [],
+        },
+    })
@@ -0,0 +1,177 @@
+# tests/keynote_fixtures.py
+
+import random
+import zipfile
+
+from app.utils.keynote_package import (KN_SLIDE_ARCHIVE, TSWP_CHARACTER_STYLE,
+                                       TSWP_PARAGRAPH_STYLE)
+
+# Uncompressed bytes per IWA chunk; small so archives span chunks
+CHUNK_SIZE = 4096
+KN_DOCUMENT_ARCHIVE = 1
+TSWP_STORAGE_ARCHIVE = 2001
+
+
+def varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def field(number: int, value) -> bytes:
+    if isinstance(value, int):
+        return varint(number << 3) + varint(value)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return varint(number << 3 | 2) + varint(len(value)) + value
+
+
+def snappy_compress(data: bytes) -> bytes:
+    """
+    Greedy snappy encoder emitting literals and both short and long copies,
+    overlapping ones included, so the decoder sees every element kind it
+    will meet in real files.
+    """
+    out = bytearray(varint(len(data)))
+
+    def literal(chunk):
+        if not chunk:
+            return
+        size = len(chunk) - 1
+        if size < 60:
+            out.append(size << 2)
+        else:
+            width = (size.bit_length() + 7) // 8
+            out.append((59 + width) << 2)
+            out.extend(size.to_bytes(width, "little"))
+        out.extend(chunk)
+
+    table = {}
+    pos = literal_start = 0
+    while pos + 4 <= len(data):
+        key = data[pos:pos + 4]
+        candidate = table.get(key)
+        table[key] = pos
+        if candidate is None or pos - candidate > 0xFFFF:
+            pos += 1
+            continue
+        length = 4
+        while (pos + length < len(data) and length < 64
+               and data[candidate + length] == data[pos + length]):
+            length += 1
+        literal(data[literal_start:pos])
+        offset = pos - candidate
+        if length <= 11 and offset < 2048:
+            out.append(1 | (length - 4) << 2 | (offset >> 8) << 5)
+            out.append(offset & 0xFF)
+        else:
+            out.append(2 | (length - 1) << 2)
+            out.extend(offset.to_bytes(2, "little"))
+        pos += length
+        literal_start = pos
+    literal(data[literal_start:])
+    return bytes(out)
+
+
+def iwa(archives, chunk_size: int = CHUNK_SIZE) -> bytes:
+    """
+    An .iwa stream of archives given as (identifier, [(type, payload)]).
+    """
+    stream = bytearray()
+    for identifier, messages in archives:
+        info = field(1, identifier) + b"".join(
+            field(2, field(1, message_type) + field(3, len(payload)))
+            for message_type, payload in messages)
+        stream += varint(len(info)) + info
+        for _, payload in messages:
+            stream += payload
+    out = bytearray()
+    for start in range(0, len(stream), chunk_size):
+        block = snappy_compress(bytes(stream[start:start + chunk_size]))
+        out += b"\x00" + len(block).to_bytes(3, "little") + block
+    return bytes(out)
+
+
+def text_storage(rng, words=200) -> bytes:
+    text = " ".join(rng.choice(["Revenue", "grew", "in", "every", "region",
+                                "this", "quarter"]) for _ in range(words))
+    return field(3, text)
+
+
+def style(font_name: str) -> bytes:
+    # StyleArchive super, then char_properties with a size and a font name
+    return field(1, field(1, "style")) + field(11, field(3, 0)
+                                               + field(5, font_name))
+
+
+def make_keynote_package(path, slides=5, fonts=("Helvetica Neue", "Avenir"),
+                         media=("Data/clip-12.mov",), filler_mb=0, seed=0):
+    """
+    A Keynote 6+ style package: Document, stylesheet, one Slide-N member
+    per slide and a template slide, each with text storages between the
+    archives that matter. filler_mb adds a large message to a slide.
+    """
+    rng = random.Random(seed)
+    styles = [(TSWP_PARAGRAPH_STYLE if n % 2 else TSWP_CHARACTER_STYLE,
+               style(font)) for n, font in enumerate(fonts)]
+    styles.append((TSWP_CHARACTER_STYLE, field(1, field(1, "no font"))))
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("Index/Document.iwa", iwa([
+            (1, [(KN_DOCUMENT_ARCHIVE, text_storage(rng))])]))
+        archive.writestr("Index/DocumentStylesheet.iwa", iwa([
+            (2 + n, [message]) for n, message in enumerate(styles)]))
+        archive.writestr("Index/TemplateSlide-1.iwa", iwa([
+            (100, [(KN_SLIDE_ARCHIVE, text_storage(rng, 20))])]))
+        for number in range(1, slides + 1):
+            messages = [(TSWP_STORAGE_ARCHIVE, text_storage(rng)),
+                        (KN_SLIDE_ARCHIVE, field(1, f"slide {number}"))]
+            if number == 1 and filler_mb:
+                messages.insert(0, (TSWP_STORAGE_ARCHIVE, b"\x01" * int(
+                    filler_mb * 1024 * 1024)))
+            archive.writestr(f"Index/Slide-{1000 + number}.iwa", iwa([
+                (1000 + number, messages),
+                (2000 + number, [(TSWP_STORAGE_ARCHIVE, text_storage(rng))]),
+            ]))
+        archive.writestr("Index/Metadata.iwa", iwa([(3, [(11006, b"")])]))
+        for name in media:
+            archive.writestr(name, b"\x00" * 64)
+        archive.writestr("Data/image-3.jpg", b"\xff\xd8\xff")
+        archive.writestr("preview.jpg", b"\xff\xd8\xff")
+    return str(path)
+
+
+APXL = """<?xml version="1.0" encoding="UTF-8"?>
+<key:presentation xmlns:key="http://developer.apple.com/namespaces/keynote2"
+    xmlns:sf="http://developer.apple.com/namespaces/sf"
+    xmlns:sfa="http://developer.apple.com/namespaces/sfa">
+  <key:theme-list><key:theme><key:master-slides>
+    <key:master-slide sfa:ID="m1"/>
+  </key:master-slides>
+  <key:stylesheet>{styles}</key:stylesheet></key:theme></key:theme-list>
+  <key:slide-list>{slides}</key:slide-list>
+</key:presentation>
+"""
+
+
+def make_apxl_package(path, slides=4, fonts=("Gill Sans", "Baskerville"),
+                      media=("audio.m4a",)):
+    """
+    A Keynote '09 package holding index.apxl and its media at the root.
+    """
+    styles = "".join(
+        f'<sf:characterstyle><sf:property-map><sf:fontName>'
+        f'<sf:string sfa:string="{font}"/></sf:fontName>'
+        f'</sf:property-map></sf:characterstyle>' for font in fonts)
+    slide_xml = "".join(
+        f'<key:slide sfa:ID="s{n}"><key:master-ref sfa:IDREF="m1"/>'
+        f'<key:page><sf:layers/></key:page></key:slide>'
+        for n in range(slides))
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("index.apxl", APXL.format(styles=styles,
+                                                   slides=slide_xml))
+        for name in media:
+            archive.writestr(name, b"\x00" * 64)
+    return str(path)
@@ -0,0 +1,108 @@
+# tests/stub_openai_server.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANALYSIS = {
+    "is_title_slide": False,
+    "bullet_points": 3,
+    "images": 1,
+    "adheres_to_best_practices": True,
+    "suggestions": "None.",
+}
+
+
+class StubOpenAIServer:
+    """
+    Minimal local stand-in for the chat completions endpoint.
+
+    Each request pops the next scripted (status, headers) failure, if any,
+    and otherwise answers with `analysis` as the message content after
+    `delay` seconds. Request count and peak concurrency are recorded.
+    """
+
+    def __init__(self, analysis=None, delay=0.0, failures=None):
+        self.analysis = analysis or DEFAULT_ANALYSIS
+        self.delay = delay
+        self.failures = list(failures or [])
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                           self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, body):
+        """
+        Build the completion payload; override to vary content per request.
+        """
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant",
+                            "content": json.dumps(self.analysis)},
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20,
+                      "total_tokens": 120},
+        }
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.requests.append(body)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight,
+                                             stub.in_flight)
+                    failure = stub.failures.pop(0) if stub.failures else None
+                try:
+                    time.sleep(stub.delay)
+                    if failure is not None:
+                        status, headers = failure
+                        payload = {"error": {"message": "stub failure",
+                                             "type": "stub"}}
+                    else:
+                        status, headers = 200, {}
+                        payload = stub.respond(body)
+                    data = json.dumps(payload).encode("utf-8")
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
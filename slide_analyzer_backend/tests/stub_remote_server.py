@@ -0,0 +1,149 @@
+# tests/stub_remote_server.py
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import fitz
+
+
+def make_pdf_bytes(pages: int, label: str = "Slide") -> bytes:
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        page = doc.new_page(width=720, height=405)
+        page.insert_text((72, 72), f"{label} {number}", fontsize=28)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class StubRemoteServer:
+    """
+    Local stand-in for the Google discovery service, the Slides API and
+    export, and the Figma files and images API.
+
+    Every response carries an ETag and matching If-None-Match requests get
+    a 304. Requests are recorded as (path, headers) along with the peak
+    number in flight.
+    """
+
+    def __init__(self, slides=3, revision="rev1", delay=0.0):
+        self.revision = revision
+        self.slides = slides
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                           self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def paths(self, prefix=""):
+        return [path for path, _ in self.requests if path.startswith(prefix)]
+
+    def route(self, path, query):
+        """
+        Return (content_type, body) for a path, or None for a 404.
+        """
+        if path == "/discovery/slides/v1":
+            return "application/json", json.dumps({
+                "rootUrl": f"{self.base_url}/",
+                "servicePath": "",
+                "resources": {"presentations": {"methods": {"get": {
+                    "path": "v1/presentations/{+presentationId}"}}}},
+            }).encode()
+        if path.startswith("/v1/presentations/"):
+            return "application/json", json.dumps({
+                "presentationId": path.rsplit("/", 1)[1],
+                "revisionId": self.revision,
+                "slides": [{"pageElements": [{"shape": {"text": {
+                    "textElements": [{"textRun": {
+                        "style": {"fontFamily": "Roboto"}}}]}}}]}
+                    for _ in range(self.slides)],
+            }).encode()
+        if path.startswith("/presentation/") and path.endswith("/export/pdf"):
+            return "application/pdf", make_pdf_bytes(self.slides,
+                                                     self.revision)
+        if path.startswith("/v1/files/"):
+            frames = [{"id": f"1:{n}", "type": "FRAME",
+                       "children": [{"type": "TEXT",
+                                     "style": {"fontFamily": "Inter"}}]}
+                      for n in range(1, self.slides + 1)]
+            return "application/json", json.dumps({
+                "version": self.revision,
+                "document": {"type": "DOCUMENT", "children": [
+                    {"type": "CANVAS", "name": "Slides",
+                     "children": frames}]},
+            }).encode()
+        if path.startswith("/v1/images/"):
+            ids = query["ids"][0].split(",")
+            return "application/json", json.dumps({
+                "err": None,
+                "images": {frame_id: f"{self.base_url}/render/{frame_id}"
+                           for frame_id in ids},
+            }).encode()
+        if path.startswith("/render/"):
+            return "application/pdf", make_pdf_bytes(1, path)
+        return None
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                with stub._lock:
+                    stub.requests.append((url.path, dict(self.headers)))
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight,
+                                             stub.in_flight)
+                try:
+                    time.sleep(stub.delay)
+                    routed = stub.route(url.path, parse_qs(url.query))
+                    if routed is None:
+                        self.send_response(404)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    content_type, body = routed
+                    etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
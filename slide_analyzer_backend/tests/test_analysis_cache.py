@@ -0,0 +1,48 @@
+# tests/test_analysis_cache.py
+
+import os
+import time
+
+from app.services.analysis_cache import AnalysisCache, config_fingerprint
+from tests.deck_fixtures import make_response
+
+
+def test_hit_after_put_and_miss_on_config_change(tmp_path):
+    cache = AnalysisCache(cache_dir=str(tmp_path))
+    key = cache.make_key("abc", config_fingerprint({"max_slides": 30}))
+
+    assert cache.get(key) is None
+    cache.put(key, make_response(), "original")
+    entry = cache.get(key)
+
+    assert entry["processing_id"] == "original"
+    assert entry["response"] == make_response()
+    other_key = cache.make_key("abc", config_fingerprint({"max_slides": 20}))
+    assert cache.get(other_key) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = AnalysisCache(cache_dir=str(tmp_path))
+    cache.put("first", make_response(), "first")
+    entry_size = os.path.getsize(tmp_path / "first.json")
+    cache.max_size_bytes = entry_size * 2.5
+
+    old = time.time() - 60
+    os.utime(tmp_path / "first.json", (old, old))
+    cache.put("second", make_response(), "second")
+    os.utime(tmp_path / "second.json", (old + 1, old + 1))
+    cache.get("first")
+    cache.put("third", make_response(), "third")
+
+    assert sorted(os.listdir(tmp_path)) == ["first.json", "third.json"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = AnalysisCache(cache_dir=str(tmp_path), max_age_days=0)
+    cache.put("key", make_response(), "original")
+
+    assert cache.get("key") is None
+    assert not (tmp_path / "key.json").exists()
@@ -1,11 +1,288 @@
 # tests/test_app.py
 
+import json
+import os
+import zipfile
+
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.routers import slide_analysis
+from app.services import slide_processor
+from app.services.job_queue import job_queue
+from tests.deck_fixtures import ANALYSIS, make_pdf
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(slide_processor, "_slide_cache", None)
+
+    async def fake_analyze_slide_images(slide_images, slide_numbers=None,
+                                        on_result=None, **kwargs):
+        analyses = []
+        for slide_number in slide_numbers:
+            analyses.append(dict(ANALYSIS))
+            if on_result is not None:
+                on_result(slide_number, analyses[-1])
+        return analyses
+
+    monkeypatch.setattr(slide_processor, "analyze_slide_images",
+                        fake_analyze_slide_images)
+    with TestClient(app) as client:
+        yield client
+
+
+def read_events(response):
+    events = []
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            events.append({"event": line[len("event: "):]})
+        elif line.startswith("data: "):
+            events[-1]["data"] = json.loads(line[len("data: "):])
+    return events
+
+
+def test_process_slide_deck(client, tmp_path):
+    make_pdf(tmp_path / "deck.pdf", pages=2)
+
+    with open(tmp_path / "deck.pdf", "rb") as f:
+        response = client.post("/api/process-slide-deck",
+                               data={"deck_format": "pdf"},
+                               files={"file": ("deck.pdf", f,
+                                               "application/pdf")})
+    assert response.status_code == 202
+    processing_id = response.json()["processing_id"]
+
+    with client.stream("GET", f"/api/jobs/{processing_id}/events") as stream:
+        events = read_events(stream)
+
+    names = [event["event"] for event in events]
+    assert names.count("deterministic_check") == 3
+    assert names.count("slide_analysis") == 2
+    assert names[-1] == "done"
+    assert events[-2]["data"]["status"] == "completed"
+
+    status = client.get(f"/api/jobs/{processing_id}").json()
+    assert status["slides_done"] == 2
+    assert status["total_slides"] == 2
+
+    result = client.get(f"/api/jobs/{processing_id}/result").json()
+    assert result["processing_id"] == processing_id
+    assert [slide["image_url"].split("?v=")[0]
+            for slide in result["slides"]] == [
+        f"/api/slide-thumbnails/{processing_id}/1",
+        f"/api/slide-thumbnails/{processing_id}/2",
+    ]
+
+
+def process_deck(client, tmp_path, pages=2):
+    make_pdf(tmp_path / "deck.pdf", pages=pages)
+    with open(tmp_path / "deck.pdf", "rb") as f:
+        response = client.post("/api/process-slide-deck",
+                               data={"deck_format": "pdf"},
+                               files={"file": ("deck.pdf", f,
+                                               "application/pdf")})
+    processing_id = response.json()["processing_id"]
+    with client.stream("GET", f"/api/jobs/{processing_id}/events") as stream:
+        read_events(stream)
+    return client.get(f"/api/jobs/{processing_id}/result").json()
+
+
+def test_versioned_thumbnails_are_immutable(client, tmp_path):
+    result = process_deck(client, tmp_path)
+    url = result["slides"][0]["image_url"]
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    digest = etag.strip('"')
+    assert url.endswith(f"?v={digest}")
+
+    unversioned = client.get(url.split("?")[0])
+    assert unversioned.headers["cache-control"] == "no-cache"
+
+    revalidated = client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+def test_sprite_sheet_offsets(client, tmp_path):
+    result = process_deck(client, tmp_path, pages=3)
+    processing_id = result["processing_id"]
+
+    sprite = client.get(f"/api/slide-sprites/{processing_id}").json()
+    assert [slide["slide_number"] for slide in sprite["slides"]] == [1, 2, 3]
+    assert sprite["slides"][1]["x"] == sprite["slides"][0]["width"]
+
+    image = client.get(sprite["image_url"])
+    assert image.status_code == 200
+    assert "immutable" in image.headers["cache-control"]
+    assert client.get("/api/slide-sprites/missing").status_code == 404
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/jobs/missing").status_code == 404
+
+
+def test_same_filename_uploads_do_not_collide(client, tmp_path):
+    first = process_deck(client, tmp_path, pages=2)
+    second = process_deck(client, tmp_path, pages=3)
+
+    uploads = sorted(path.name for path in (tmp_path / "uploads").iterdir()
+                     if path.suffix == ".pdf")
+    assert uploads == sorted([f"{first['processing_id']}.pdf",
+                              f"{second['processing_id']}.pdf"])
+
+    # The registry answers once the in-memory job is gone
+    job_queue.jobs.pop(first["processing_id"])
+    status = client.get(f"/api/jobs/{first['processing_id']}").json()
+    assert status["status"] == "completed"
+    assert status["slides_done"] == 2
+    result = client.get(f"/api/jobs/{first['processing_id']}/result").json()
+    assert result["slides"] == first["slides"]
+
+    # Legacy endpoint serves the latest completed deck
+    assert client.get("/api/slide-images/3").status_code == 200
+
+
+def test_preflight(client, tmp_path, monkeypatch):
+    make_pdf(tmp_path / "deck.pdf", pages=2)
+
+    with open(tmp_path / "deck.pdf", "rb") as f:
+        response = client.post("/api/preflight", files={
+            "file": ("deck.pdf", f, "application/pdf")})
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["passed"]
+    assert result["slide_count_check"]["slide_count"] == 2
+    assert result["file_analysis"]["fonts_used"] == ["Helvetica"]
+    # Nothing is kept or queued
+    assert os.listdir(tmp_path / "uploads" / "preflight") == []
+    assert client.get("/api/admin/summary").json()[
+        "total_submissions"] == 0
+
+    unsupported = client.post("/api/preflight", files={
+        "file": ("notes.txt", b"notes", "text/plain")}).json()
+    assert not unsupported["passed"]
+    assert not unsupported["format_check"]["accepted_format"]
+    assert unsupported["size_check"] is None
+
+    monkeypatch.setattr(slide_analysis, "PREFLIGHT_SIZE_LIMIT_MB", 0.001)
+    with open(tmp_path / "deck.pdf", "rb") as f:
+        too_large = client.post("/api/preflight", files={
+            "file": ("deck.pdf", f, "application/pdf")}).json()
+    assert too_large["format_check"]["accepted_format"]
+    assert not too_large["size_check"]["size_within_limit"]
+
+
+def test_admin_endpoints(client, tmp_path):
+    result = process_deck(client, tmp_path)
+
+    summary = client.get("/api/admin/summary").json()
+    assert summary["total_submissions"] == 1
+    assert summary["status_counts"]["completed"] == 1
+
+    [submission] = client.get("/api/admin/submissions/").json()
+    assert submission["id"] == result["processing_id"]
+    assert submission["filename"] == "deck.pdf"
+    assert submission["status"] == "completed"
+
+    failures = client.get("/api/admin/check-failures").json()
+    for check_name, count in failures.items():
+        failing = client.get(f"/api/admin/check-failures/{check_name}").json()
+        assert len(failing) == count
+
+
+def test_admin_prompt_checks(client):
+    agenda = {"prompt": "The slide lists an agenda.", "scope": "any_slide"}
+    assert client.put("/api/admin/prompt-checks/has_agenda",
+                      json=agenda).status_code == 200
+    response = client.put("/api/admin/prompt-checks/on_brand", json={
+        "prompt": "Brand colors.", "depends_on": ["has_agenda"]})
+    assert response.json()["scope"] == "every_slide"
+
+    names = [check["name"]
+             for check in client.get("/api/admin/prompt-checks").json()]
+    assert sorted(names) == ["has_agenda", "on_brand"]
+
+    unknown = client.put("/api/admin/prompt-checks/broken", json={
+        "prompt": "x", "depends_on": ["missing"]})
+    assert unknown.status_code == 422
+    cycle = client.put("/api/admin/prompt-checks/has_agenda", json={
+        **agenda, "depends_on": ["on_brand"]})
+    assert cycle.status_code == 422
+    assert client.put("/api/admin/prompt-checks/Bad-Name",
+                      json=agenda).status_code == 422
+
+    assert client.delete(
+        "/api/admin/prompt-checks/has_agenda").status_code == 409
+    assert client.delete(
+        "/api/admin/prompt-checks/on_brand").status_code == 204
+    assert client.delete(
+        "/api/admin/prompt-checks/on_brand").status_code == 404
+
+
+def test_metrics_endpoint(client, tmp_path):
+    process_deck(client, tmp_path)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    assert 'slide_analyzer_decks_total{format="pdf",outcome="completed"}' \
+        in " ".join(lines)
+    assert any(line.startswith(
+        'slide_analyzer_stage_seconds_count{stage="render"}')
+        for line in lines)
+    assert "slide_analyzer_queue_depth 0" in lines
+    assert any(line.startswith(
+        'slide_analyzer_cache_lookups_total{cache="slide",result="miss"}')
+        for line in lines)
+
+
+def test_bulk_ingest_archive_and_urls(client, tmp_path):
+    make_pdf(tmp_path / "one.pdf", pages=2)
+    make_pdf(tmp_path / "two.pdf", pages=3)
+    with zipfile.ZipFile(tmp_path / "decks.zip", "w") as archive:
+        archive.write(tmp_path / "one.pdf", "speakers/one.pdf")
+        archive.write(tmp_path / "two.pdf", "two.pdf")
+        archive.writestr("notes.txt", "not a deck")
+        archive.writestr("__MACOSX/._two.pdf", "resource fork")
+
+    with open(tmp_path / "decks.zip", "rb") as f:
+        response = client.post("/api/bulk-ingest",
+                               data={"urls": "not-a-url"},
+                               files={"file": ("decks.zip", f,
+                                               "application/zip")})
+    assert response.status_code == 202
+    batch = response.json()
+    assert [deck["source"] for deck in batch["decks"]] == [
+        "speakers/one.pdf", "two.pdf", "notes.txt", "not-a-url"]
+    assert not (tmp_path / "uploads" / f"{batch['batch_id']}.zip").exists()
+
+    for deck in batch["decks"]:
+        if deck["status"] != "failed":
+            with client.stream(
+                    "GET", f"/api/jobs/{deck['processing_id']}/events") as s:
+                read_events(s)
 
-client = TestClient(app)
+    status = client.get(f"/api/bulk-ingest/{batch['batch_id']}").json()
+    assert status["total_decks"] == 4
+    assert status["status_counts"] == {"completed": 2, "failed": 2}
+    assert status["total_slides"] == status["slides_done"] == 5
+    errors = {deck["source"]: deck["error"] for deck in status["decks"]}
+    assert errors["notes.txt"] == "Unsupported file format."
 
 
-def test_process_slide_deck():
-    # Implement test cases for the process_slide_deck endpoint
-    pass
+def test_bulk_ingest_rejects_bad_input(client, tmp_path):
+    assert client.post("/api/bulk-ingest").status_code == 400
+    response = client.post("/api/bulk-ingest",
+                           files={"file": ("decks.zip", b"not a zip",
+                                           "application/zip")})
+    assert response.status_code == 415
+    assert client.get("/api/bulk-ingest/missing").status_code == 404
@@ -0,0 +1,204 @@
+# tests/test_check_engine.py
+
+import asyncio
+
+import fitz
+import pytest
+
+from app.services import check_engine, slide_processor
+from app.services.check_engine import (CHEAP, IO, MODEL, RENDER, CheckGraph,
+                                       CheckGraphError, Step)
+from app.services.registry import registry
+from tests.deck_fixtures import ANALYSIS, make_pdf
+
+
+def test_independent_steps_run_concurrently():
+    async def run():
+        events = {"a": asyncio.Event(), "b": asyncio.Event()}
+
+        async def step(name, other):
+            events[name].set()
+            await asyncio.wait_for(events[other].wait(), 1)
+            return name
+
+        graph = CheckGraph([
+            Step("a", lambda results: step("a", "b"), cost=IO),
+            Step("b", lambda results: step("b", "a"), cost=IO),
+            Step("both", lambda results: results["a"] + results["b"],
+                 depends_on=("a", "b")),
+        ])
+        return await graph.run()
+
+    run = asyncio.run(run())
+
+    assert run.results["both"] == "ab"
+
+
+def test_failed_gate_skips_expensive_steps():
+    ran = []
+
+    def step(name, result=None):
+        def run(results):
+            ran.append(name)
+            return result
+        return run
+
+    graph = CheckGraph([
+        Step("format_check", step("format_check", False), gate=True,
+             passed=bool),
+        Step("size_check", step("size_check", True), gate=True,
+             passed=bool),
+        Step("analyze", step("analyze"), depends_on=("format_check",),
+             cost=IO),
+        Step("render", step("render"), cost=RENDER),
+        Step("vision", step("vision"), depends_on=("render",), cost=MODEL),
+        Step("title_check", step("title_check", True),
+             depends_on=("vision",), passed=bool),
+        Step("independent", step("independent")),
+    ])
+    run = asyncio.run(graph.run())
+
+    assert sorted(ran) == ["format_check", "independent", "size_check"]
+    assert run.skipped_stages() == ["analyze", "render", "vision"]
+    assert run.skip_reasons["analyze"] == "format_check failed"
+    assert run.skip_reasons["title_check"] == "vision was skipped"
+    assert [(check["name"], check["status"])
+            for check in run.check_report()] == [
+        ("format_check", "failed"), ("size_check", "passed"),
+        ("title_check", "skipped")]
+
+
+def test_cost_classes_bound_concurrency(monkeypatch):
+    monkeypatch.setitem(check_engine.COST_CONCURRENCY, MODEL, 1)
+    running = []
+    peak = []
+
+    async def model_call(results):
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    graph = CheckGraph([Step(f"prompt_{n}", model_call, cost=MODEL)
+                        for n in range(3)])
+    asyncio.run(graph.run())
+
+    assert max(peak) == 1
+
+
+def test_invalid_graphs_are_rejected():
+    def noop(results):
+        return None
+
+    with pytest.raises(CheckGraphError, match="unknown step"):
+        CheckGraph([Step("a", noop, depends_on=("missing",))])
+    with pytest.raises(CheckGraphError, match="cycle"):
+        CheckGraph([Step("a", noop, depends_on=("b",)),
+                    Step("b", noop, depends_on=("a",))])
+    with pytest.raises(CheckGraphError, match="Duplicate"):
+        CheckGraph([Step("a", noop), Step("a", noop)])
+    with pytest.raises(CheckGraphError, match="cannot gate"):
+        CheckGraph([Step("a", noop, cost=MODEL, gate=True, passed=bool)])
+    # A gate that needs an expensive step would wait for itself
+    with pytest.raises(CheckGraphError, match="cycle"):
+        CheckGraph([Step("render", noop, cost=RENDER),
+                    Step("gate", noop, depends_on=("render",), cost=CHEAP,
+                         gate=True, passed=bool)])
+
+
+def test_errors_cancel_the_other_steps():
+    cancelled = []
+
+    async def slow(results):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    def broken(results):
+        raise RuntimeError("broken")
+
+    graph = CheckGraph([Step("slow", slow, cost=IO), Step("broken", broken)])
+    with pytest.raises(RuntimeError):
+        asyncio.run(graph.run())
+
+    assert cancelled == [True]
+
+
+def test_too_many_slides_are_never_rendered(workdir, vision_calls,
+                                            monkeypatch):
+    doc = fitz.open()
+    for _ in range(31):
+        doc.new_page()
+    doc.save(str(workdir / "deck.pdf"))
+    rendered = []
+    monkeypatch.setattr(slide_processor, "render_pdf",
+                        lambda *args: rendered.append(args))
+
+    result = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-1", "pdf"))
+
+    assert rendered == [] and vision_calls == []
+    check = result.deterministic_checks.slide_count_check
+    assert not check.slide_count_within_limit
+    assert check.slide_count == 31
+    assert result.file_analysis.number_of_slides == 31
+    statuses = {check.name: check.status for check in result.checks}
+    assert statuses["format_check"] == "passed"
+    assert statuses["slide_count_check"] == "failed"
+    assert statuses["title_slide_check"] == "skipped"
+    assert "slide_images" in result.skipped_stages
+    assert slide_processor.rendered_slide_count(result) == 0
+    assert not (workdir / "uploads" / "job-1").exists()
+
+
+def test_unsupported_format_fails_its_check(workdir, vision_calls):
+    (workdir / "notes.txt").write_text("not a deck")
+
+    result = asyncio.run(slide_processor.process_slide_deck(
+        "notes.txt", "job-1", "txt"))
+
+    assert not result.deterministic_checks.format_check.accepted_format
+    assert result.probabilistic_checks.image_check.message == (
+        "Skipped because format_check failed.")
+    assert vision_calls == []
+
+
+def test_prompt_checks_run_beside_the_slide_analysis(workdir, monkeypatch):
+    make_pdf(workdir / "deck.pdf", pages=3)
+    registry.put_prompt_check("has_agenda", "The slide lists an agenda.",
+                              "any_slide", [])
+    registry.put_prompt_check("on_brand", "The slide uses {brand} colors.",
+                              "every_slide", ["title_slide_check"])
+    prompts = []
+
+    async def fake_analyze_slide_images(slide_images, slide_numbers=None,
+                                        prompt_template=None, **kwargs):
+        if "requirement" not in (prompt_template or ""):
+            return [dict(ANALYSIS) for _ in slide_images]
+        prompts.append(prompt_template.format(slide_number=1))
+        return [{"passed": number == 2, "reason": f"slide {number}"}
+                for number in range(1, len(slide_images) + 1)]
+
+    monkeypatch.setattr(slide_processor, "analyze_slide_images",
+                        fake_analyze_slide_images)
+    result = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-1", "pdf"))
+
+    checks = {check.name: check for check in result.checks}
+    assert checks["has_agenda"].status == "passed"
+    assert checks["has_agenda"].message == "Met on slide 2: slide 2"
+    assert checks["on_brand"].status == "failed"
+    assert checks["on_brand"].message.startswith("Not met on slides 1, 3.")
+    assert checks["on_brand"].cost == "model"
+    # Braces in an admin prompt are not format fields
+    assert any("{brand}" in prompt for prompt in prompts)
+
+    # Changing a prompt check invalidates cached analyses
+    registry.put_prompt_check("has_agenda", "The slide lists an agenda.",
+                              "every_slide", [])
+    again = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-2", "pdf"))
+    checks = {check.name: check for check in again.checks}
+    assert checks["has_agenda"].status == "failed"
@@ -0,0 +1,98 @@
+# tests/test_keynote_package.py
+
+import asyncio
+import random
+import tracemalloc
+import zipfile
+
+import pytest
+
+from app.services import slide_processor
+from app.utils.keynote_package import (KeynoteError, analyze_keynote_package,
+                                       snappy_decompress)
+from tests.keynote_fixtures import (make_apxl_package, make_keynote_package,
+                                    snappy_compress)
+from tests.deck_fixtures import make_pdf
+
+
+def test_snappy_round_trip():
+    rng = random.Random(0)
+    data = (bytes(rng.randrange(256) for _ in range(5000))
+            + b"ab" * 3000 + b"slide " * 500 + b"\x00" * 70000)
+
+    assert snappy_decompress(snappy_compress(data)) == data
+    assert snappy_decompress(snappy_compress(b"")) == b""
+
+
+def test_iwa_package(tmp_path):
+    path = make_keynote_package(tmp_path / "deck.key", slides=7,
+                                media=("Data/clip-12.mov", "Data/intro.m4a"))
+
+    analysis = analyze_keynote_package(path)
+
+    # The template slide is not one of the deck's slides
+    assert analysis['number_of_slides'] == 7
+    assert analysis['fonts_used'] == ["Avenir", "Helvetica Neue"]
+    assert analysis['video_present'] and analysis['audio_present']
+    assert analysis['media_files'] == ["Data/clip-12.mov", "Data/intro.m4a"]
+
+
+def test_legacy_apxl_package(tmp_path):
+    path = make_apxl_package(tmp_path / "deck.key", slides=4)
+
+    analysis = analyze_keynote_package(path)
+
+    assert analysis['number_of_slides'] == 4
+    assert analysis['fonts_used'] == ["Baskerville", "Gill Sans"]
+    assert not analysis['video_present']
+    assert analysis['audio_present']
+
+
+def test_memory_is_bounded_by_chunk_size(tmp_path):
+    # An 8 MB message on the first slide, snappy-compressed to little
+    path = make_keynote_package(tmp_path / "deck.key", slides=3, filler_mb=8)
+
+    tracemalloc.start()
+    try:
+        analysis = analyze_keynote_package(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert analysis['number_of_slides'] == 3
+    assert peak < 1024 * 1024
+
+
+def test_unsupported_packages_are_rejected(tmp_path):
+    not_zip = tmp_path / "notes.key"
+    not_zip.write_bytes(b"not a zip")
+    empty = tmp_path / "empty.key"
+    with zipfile.ZipFile(empty, "w") as archive:
+        archive.writestr("readme.txt", "hello")
+
+    with pytest.raises(KeynoteError, match="not a valid"):
+        analyze_keynote_package(str(not_zip))
+    with pytest.raises(KeynoteError, match="Unsupported"):
+        analyze_keynote_package(str(empty))
+
+
+def test_process_keynote_deck(workdir, vision_calls, monkeypatch):
+    make_keynote_package(workdir / "deck.key", slides=3)
+    conversions = []
+
+    async def fake_convert(input_path, content_hash):
+        conversions.append(input_path)
+        pdf_path = str(workdir / f"{content_hash}.pdf")
+        make_pdf(pdf_path, pages=3)
+        return pdf_path
+
+    monkeypatch.setattr(slide_processor, "convert_pptx_to_pdf",
+                        fake_convert)
+    result = asyncio.run(slide_processor.process_slide_deck(
+        "deck.key", "job-1", "key"))
+
+    assert conversions == ["deck.key"]
+    assert result.file_analysis.number_of_slides == 3
+    assert result.file_analysis.fonts_used == ["Avenir", "Helvetica Neue"]
+    assert result.file_analysis.video_present
+    assert len(result.probabilistic_checks.slide_analyses) == 3
@@ -0,0 +1,107 @@
+# tests/test_logging_config.py
+
+import asyncio
+import json
+import logging
+import threading
+from logging.handlers import QueueHandler
+
+import pytest
+
+from app import logging_config
+from app.logging_config import (bind_processing_id, setup_logging,
+                                shutdown_logging)
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    log_path = tmp_path / "app.log"
+    monkeypatch.setattr(logging_config, "LOG_FILE", str(log_path))
+    monkeypatch.setattr(logging_config, "LOG_LEVEL", "DEBUG")
+    monkeypatch.setattr(logging_config, "LOG_MAX_MESSAGE_CHARS", 100)
+    # The app module installs the pipeline on import; pytest's capture
+    # handlers would format records on the test's thread
+    shutdown_logging()
+    monkeypatch.setattr(logging.getLogger("slide_analyzer"), "handlers", [])
+    yield log_path
+    shutdown_logging()
+
+
+def read_records(log_path):
+    shutdown_logging()
+    with open(log_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_installed_once_per_process(log_file):
+    logger = setup_logging()
+    setup_logging()
+
+    queue_handlers = [handler for handler in logger.handlers
+                      if isinstance(handler, QueueHandler)]
+    assert len(queue_handlers) == 1
+
+
+def test_records_are_json_with_processing_id(log_file):
+    logger = setup_logging()
+
+    async def process(processing_id):
+        with bind_processing_id(processing_id):
+            await asyncio.sleep(0)
+            logger.info("Processing %s", processing_id)
+
+    async def run():
+        await asyncio.gather(process("job-1"), process("job-2"))
+
+    asyncio.run(run())
+    logger.warning("No job", extra={"slides": 3})
+    try:
+        raise ValueError("bad deck")
+    except ValueError:
+        logger.exception("Failed")
+
+    records = read_records(log_file)
+
+    assert {(record["message"], record["processing_id"])
+            for record in records[:2]} == {("Processing job-1", "job-1"),
+                                           ("Processing job-2", "job-2")}
+    assert records[2]["level"] == "WARNING"
+    assert records[2]["slides"] == 3
+    assert "processing_id" not in records[2]
+    assert "ValueError: bad deck" in records[3]["exception"]
+
+
+def test_messages_are_formatted_off_the_caller_thread(log_file):
+    formatted_in = []
+
+    class Payload:
+        def __str__(self):
+            formatted_in.append(threading.current_thread())
+            return "x" * 1000
+
+    logger = setup_logging()
+    logger.info("Result: %s", Payload())
+    logger.debug("Slides: %s", Payload())
+
+    [info, debug] = read_records(log_file)
+
+    assert threading.current_thread() not in formatted_in
+    assert len(formatted_in) == 2
+    assert info["message"] == ("Result: " + "x" * 92
+                               + "... [908 more characters]")
+    assert debug["level"] == "DEBUG"
+
+
+def test_disabled_levels_are_not_formatted(log_file, monkeypatch):
+    monkeypatch.setattr(logging_config, "LOG_LEVEL", "INFO")
+    formatted = []
+
+    class Payload:
+        def __str__(self):
+            formatted.append(True)
+            return "payload"
+
+    setup_logging().debug("Slides: %s", Payload())
+    read_records(log_file)
+
+    assert formatted == []
@@ -0,0 +1,109 @@
+# tests/test_merge_decks.py
+
+import fitz
+
+from app.services import merge_decks
+from app.services.merge_decks import MasterDeck, merge_approved_decks
+from benchmarks.synthetic_decks import make_template_deck, make_template_image
+
+
+def page_texts(path):
+    with fitz.open(str(path)) as doc:
+        return [page.get_text().strip() for page in doc]
+
+
+def make_decks(directory, seeds, pages=2):
+    directory.mkdir(exist_ok=True)
+    template_image = make_template_image(320, 180)
+    for seed in seeds:
+        make_template_deck(directory / f"deck{seed}.pdf", pages, seed,
+                           template_image)
+
+
+def test_new_decks_are_appended_incrementally(tmp_path, monkeypatch):
+    monkeypatch.setattr(merge_decks, "MASTER_DECK_COMPACT_GROWTH", 100)
+    decks_dir = tmp_path / "approved"
+    output = tmp_path / "master.pdf"
+    make_decks(decks_dir, [1, 2])
+    merge_approved_decks(str(output), str(decks_dir), order=[])
+    before = output.read_bytes()
+
+    make_decks(decks_dir, [3])
+    summary = merge_approved_decks(str(output), str(decks_dir), order=[])
+
+    assert summary["added"] == ["deck3"]
+    assert summary["pages"] == 6
+    # An incremental save only appends to the existing file
+    assert output.read_bytes().startswith(before)
+    assert page_texts(output)[-1] == "Deck 3 slide 2"
+
+
+def test_running_order_and_resubmission(tmp_path):
+    decks_dir = tmp_path / "approved"
+    output = tmp_path / "master.pdf"
+    make_decks(decks_dir, [1, 2, 3], pages=1)
+
+    merge_approved_decks(str(output), str(decks_dir),
+                         order=["deck3", "deck1"])
+    assert page_texts(output) == ["Deck 3 slide 1", "Deck 1 slide 1",
+                                  "Deck 2 slide 1"]
+
+    # A changed deck replaces its pages in place
+    make_template_deck(decks_dir / "deck1.pdf", 2, 9,
+                       make_template_image(320, 180))
+    summary = merge_approved_decks(str(output), str(decks_dir),
+                                   order=["deck3", "deck1"])
+    assert summary["added"] == ["deck1"]
+    assert page_texts(output) == ["Deck 3 slide 1", "Deck 9 slide 1",
+                                  "Deck 9 slide 2", "Deck 2 slide 1"]
+
+    (decks_dir / "deck3.pdf").unlink()
+    merge_approved_decks(str(output), str(decks_dir), order=["deck1"])
+    assert page_texts(output) == ["Deck 9 slide 1", "Deck 9 slide 2",
+                                  "Deck 2 slide 1"]
+
+
+def test_master_without_manifest_is_rebuilt(tmp_path):
+    decks_dir = tmp_path / "approved"
+    output = tmp_path / "master.pdf"
+    make_decks(decks_dir, [1, 2], pages=1)
+    merge_approved_decks(str(output), str(decks_dir), order=[])
+
+    (tmp_path / "master.json").write_text("{not json")
+    (decks_dir / "deck1.pdf").unlink()
+    summary = merge_approved_decks(str(output), str(decks_dir), order=[])
+    assert summary["pages"] == 1
+    assert page_texts(output) == ["Deck 2 slide 1"]
+
+    (tmp_path / "master.json").unlink()
+    assert MasterDeck(str(output)).deck_ids == []
+    assert not output.exists()
+
+
+def test_rebuilding_an_empty_master_removes_it(tmp_path):
+    decks_dir = tmp_path / "approved"
+    output = tmp_path / "master.pdf"
+    make_decks(decks_dir, [1], pages=1)
+    merge_approved_decks(str(output), str(decks_dir), order=[])
+
+    master = MasterDeck(str(output))
+    master.manifest["decks"] = []
+    master.rebuild()
+
+    assert not output.exists()
+    assert MasterDeck(str(output)).manifest["compacted_size"] == 0
+
+
+def test_compaction_deduplicates_template_images(tmp_path):
+    decks_dir = tmp_path / "approved"
+    make_decks(decks_dir, [1, 2, 3, 4])
+    master = MasterDeck(str(tmp_path / "master.pdf"))
+    for seed in [1, 2, 3, 4]:
+        master.add(str(decks_dir / f"deck{seed}.pdf"))
+
+    master.compact(force=True)
+
+    with fitz.open(str(tmp_path / "master.pdf")) as doc:
+        image_xrefs = {image[0] for page in doc
+                       for image in page.get_images()}
+    assert len(image_xrefs) == 1
@@ -0,0 +1,84 @@
+# tests/test_metrics.py
+
+import asyncio
+
+import pytest
+
+from app.metrics import MetricsRegistry, span, stage_timings, timed
+from app.services import slide_processor
+from tests.deck_fixtures import make_pdf
+
+
+def test_registry_renders_exposition_format():
+    registry = MetricsRegistry()
+    decks = registry.counter("decks_total", "Decks", labels=("format",))
+    in_flight = registry.gauge("in_flight", "Requests in flight")
+    seconds = registry.histogram("stage_seconds", "Stages",
+                                 labels=("stage",), buckets=(0.1, 1.0))
+    registry.collector(lambda: [("queue_depth", "gauge", "Queued",
+                                 [({}, 3)])])
+
+    decks.inc(format="pdf")
+    decks.inc(2, format='p"x')
+    with in_flight.track():
+        in_flight.inc()
+    seconds.observe(0.05, stage="render")
+    seconds.observe(0.5, stage="render")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE decks_total counter" in lines
+    assert 'decks_total{format="pdf"} 1' in lines
+    assert 'decks_total{format="p\\"x"} 2' in lines
+    assert "in_flight 1" in lines
+    # Buckets are cumulative and end with +Inf
+    assert 'stage_seconds_bucket{stage="render",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="render",le="1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="render",le="+Inf"} 2' in lines
+    assert 'stage_seconds_sum{stage="render"} 0.55' in lines
+    assert 'stage_seconds_count{stage="render"} 2' in lines
+    assert "queue_depth 3" in lines
+
+    with pytest.raises(ValueError):
+        decks.inc(stage="render")
+    with pytest.raises(ValueError):
+        registry.counter("decks_total", "Again")
+
+
+def test_stage_timings_collect_spans_of_tasks_and_threads():
+    def work():
+        with span("in_thread"):
+            pass
+
+    async def run():
+        with stage_timings() as timings:
+            await asyncio.gather(timed("task", asyncio.sleep(0)),
+                                 timed("task", asyncio.sleep(0)),
+                                 asyncio.to_thread(work))
+        with span("outside"):
+            pass
+        return timings
+
+    timings = asyncio.run(run())
+    counts = {entry["stage"]: entry["count"] for entry in timings.report()}
+
+    assert counts == {"task": 2, "in_thread": 1}
+
+
+def test_process_slide_deck_reports_timings(workdir, vision_calls):
+    make_pdf(workdir / "deck.pdf", pages=2)
+
+    result = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-1", "pdf", include_timings=True))
+
+    stages = {timing.stage: timing for timing in result.timings}
+    for stage in ("format_detection", "hash", "cache_lookup", "render",
+                  "vision", "persistence", "deck"):
+        assert stage in stages
+    assert stages["rasterize"].count == 2
+    assert stages["deck"].seconds >= stages["render"].seconds
+
+    # Off by default, and not stored with the cached result
+    cached = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-2", "pdf"))
+    assert cached.timings is None
@@ -0,0 +1,117 @@
+# tests/test_pptx_converter.py
+
+import asyncio
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+from app.services import pptx_converter
+from app.services.pptx_converter import (OfficeConverterPool,
+                                         ConversionError, convert_pptx_to_pdf,
+                                         evict_pdf_cache)
+
+# Stands in for `soffice --convert-to pdf --outdir DIR INPUT`
+FAKE_SOFFICE = """#!{python}
+import os, sys, time
+args = sys.argv[1:]
+with open({calls!r}, "a") as f:
+    f.write("call\\n")
+if os.environ.get("FAKE_SOFFICE_SLEEP"):
+    time.sleep(float(os.environ["FAKE_SOFFICE_SLEEP"]))
+out_dir = args[args.index("--outdir") + 1]
+name = os.path.splitext(os.path.basename(args[-1]))[0] + ".pdf"
+with open(os.path.join(out_dir, name), "wb") as f:
+    f.write(b"%PDF-1.7 fake")
+"""
+
+
+@pytest.fixture
+def fake_soffice(tmp_path, monkeypatch):
+    calls = tmp_path / "calls.txt"
+    script = tmp_path / "soffice"
+    script.write_text(FAKE_SOFFICE.format(python=sys.executable,
+                                          calls=str(calls)))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(pptx_converter, "SOFFICE_BINARY", str(script))
+    # The default mode needs no UNO bindings
+    monkeypatch.setattr(pptx_converter, "uno", None)
+    return calls
+
+
+def test_conversions_are_cached_by_content_hash(tmp_path, fake_soffice):
+    pptx_path = tmp_path / "deck.pptx"
+    pptx_path.write_bytes(b"PK\x03\x04")
+    cache_dir = str(tmp_path / "cache")
+
+    async def run():
+        pool = OfficeConverterPool(workers=2, timeout=30)
+        try:
+            return await asyncio.gather(*(
+                convert_pptx_to_pdf(str(pptx_path), "abc", pool, cache_dir)
+                for _ in range(3)))
+        finally:
+            pool.shutdown()
+
+    paths = asyncio.run(run())
+
+    assert paths == [os.path.join(cache_dir, "abc.pdf")] * 3
+    assert open(paths[0], "rb").read().startswith(b"%PDF")
+    assert fake_soffice.read_text().count("call") == 1
+    assert pptx_converter._conversion_locks == {}
+
+
+def test_conversion_timeout_is_reported(tmp_path, fake_soffice,
+                                        monkeypatch):
+    monkeypatch.setenv("FAKE_SOFFICE_SLEEP", "5")
+    pptx_path = tmp_path / "deck.pptx"
+    pptx_path.write_bytes(b"PK\x03\x04")
+
+    async def run():
+        pool = OfficeConverterPool(workers=1, timeout=0.5)
+        try:
+            await convert_pptx_to_pdf(str(pptx_path), "slow", pool,
+                                      str(tmp_path / "cache"))
+        finally:
+            pool.shutdown()
+
+    with pytest.raises(ConversionError):
+        asyncio.run(run())
+    assert not (tmp_path / "cache" / "slow.pdf").exists()
+
+
+def test_missing_uno_bindings_fail_loudly(tmp_path, monkeypatch):
+    monkeypatch.setattr(pptx_converter, "uno", None)
+    pptx_path = tmp_path / "deck.pptx"
+    pptx_path.write_bytes(b"PK\x03\x04")
+
+    async def run():
+        pool = OfficeConverterPool(workers=1, mode="uno")
+        try:
+            await convert_pptx_to_pdf(str(pptx_path), "abc", pool,
+                                      str(tmp_path / "cache"))
+        finally:
+            pool.shutdown()
+
+    with pytest.raises(ConversionError, match="python3-uno"):
+        asyncio.run(run())
+    assert pptx_converter._conversion_locks == {}
+
+
+def test_pdf_cache_evicts_old_and_least_recently_used(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    now = time.time()
+    for name, used, written in [("expired", now, now - 40 * 86400),
+                                ("stale", now - 3600, now - 3600),
+                                ("recent", now, now - 3600)]:
+        path = cache_dir / f"{name}.pdf"
+        path.write_bytes(b"%PDF" + b"0" * 1024 * 1024)
+        os.utime(path, (used, written))
+    (cache_dir / "busy.part.pdf").write_bytes(b"%PDF")
+
+    evict_pdf_cache(str(cache_dir), max_size_mb=1.5, max_age_days=30)
+
+    assert sorted(os.listdir(cache_dir)) == ["busy.part.pdf", "recent.pdf"]
@@ -0,0 +1,51 @@
+# tests/test_pptx_package.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pptx import Presentation
+
+from app.utils.file_analyzers import analyze_pptx
+from app.utils.pptx_package import analyze_pptx_package
+from benchmarks.synthetic_decks import make_pptx_deck
+
+
+def normalized(analysis):
+    return dict(analysis, fonts_used=sorted(analysis['fonts_used']))
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("corpus")
+    decks = [make_pptx_deck(directory / f"deck{seed}.pptx", slides, seed,
+                            images_per_slide=1, image_size=(64, 36))
+             for seed, slides in ((0, 50), (1, 12), (2, 3))]
+    empty = directory / "empty.pptx"
+    Presentation().save(str(empty))
+    return decks + [str(empty)]
+
+
+def test_matches_analyze_pptx_on_corpus(corpus):
+    for path in corpus:
+        assert (normalized(analyze_pptx_package(path, False))
+                == normalized(analyze_pptx(path)))
+
+
+def test_theme_fonts_are_resolved(corpus):
+    raw = analyze_pptx_package(corpus[0], resolve_theme_fonts=False)
+    resolved = analyze_pptx_package(corpus[0])
+
+    assert {"+mn-lt", "+mj-lt"} <= set(raw['fonts_used'])
+    # The default template's theme uses Calibri for headings and body,
+    # which text without a font of its own inherits as well
+    assert sorted(resolved['fonts_used']) == sorted(
+        (set(raw['fonts_used']) - {"+mn-lt", "+mj-lt"}) | {"Calibri"})
+    assert resolved['video_present'] and resolved['audio_present']
+
+
+def test_sharded_over_executor(corpus):
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        sharded = analyze_pptx_package(corpus[0], executor=executor,
+                                       slides_per_task=7)
+    assert normalized(sharded) == normalized(analyze_pptx_package(corpus[0]))
+    assert sharded['number_of_slides'] == 50
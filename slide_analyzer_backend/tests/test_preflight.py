@@ -0,0 +1,119 @@
+# tests/test_preflight.py
+
+import random
+
+import fitz
+
+from app.utils import preflight
+from app.utils.preflight import count_slides, preflight_deck
+from tests.deck_fixtures import make_pdf, make_pptx
+from tests.keynote_fixtures import make_keynote_package
+
+
+def test_pdf_within_limits(tmp_path):
+    make_pdf(tmp_path / "deck.pdf", pages=3)
+
+    result = preflight_deck(str(tmp_path / "deck.pdf"))
+
+    assert result['passed']
+    assert result['format_check']['accepted_format']
+    assert result['size_check']['size_within_limit']
+    assert result['slide_count_check']['slide_count'] == 3
+    assert result['file_analysis'] == {
+        'number_of_slides': 3, 'fonts_used': ['Helvetica'],
+        'video_present': False, 'audio_present': False}
+
+
+def test_too_many_slides_skips_fonts_and_media(tmp_path, monkeypatch):
+    doc = fitz.open()
+    for _ in range(45):
+        doc.new_page()
+    doc.save(str(tmp_path / "deck.pdf"))
+    monkeypatch.setattr(preflight, "analyze_pdf_metadata", None)
+
+    result = preflight_deck(str(tmp_path / "deck.pdf"))
+
+    assert not result['passed']
+    assert result['slide_count_check'] == {
+        'slide_count_within_limit': False, 'slide_count': 45,
+        'message': "Too many slides."}
+    assert result['file_analysis'] is None
+
+
+def test_pptx_count_reads_only_the_slide_list(tmp_path, monkeypatch):
+    path = make_pptx(tmp_path / "deck.pptx", slides=40)
+    monkeypatch.setattr(preflight, "analyze_pptx_package", None)
+
+    assert count_slides(path, "pptx") == 40
+    result = preflight_deck(path)
+    assert result['slide_count_check']['slide_count'] == 40
+    assert not result['passed']
+
+    small = make_pptx(tmp_path / "small.pptx", slides=5)
+    monkeypatch.undo()
+    result = preflight_deck(small)
+    assert result['passed']
+    assert result['file_analysis']['number_of_slides'] == 5
+    assert "Calibri" in result['file_analysis']['fonts_used']
+
+
+def test_keynote(tmp_path):
+    make_keynote_package(tmp_path / "deck.key", slides=4)
+
+    result = preflight_deck(str(tmp_path / "deck.key"))
+
+    assert result['passed']
+    assert result['file_analysis']['number_of_slides'] == 4
+    assert result['file_analysis']['fonts_used'] == ["Avenir",
+                                                     "Helvetica Neue"]
+
+
+def test_rejected_decks(tmp_path):
+    (tmp_path / "notes.txt").write_text("not a deck")
+    (tmp_path / "fake.pdf").write_bytes(b"PK\x03\x04 a zip, not a PDF")
+    (tmp_path / "broken.pptx").write_bytes(b"PK\x03\x04 truncated")
+    make_pdf(tmp_path / "upload.tmp", pages=2)
+
+    unsupported = preflight_deck(str(tmp_path / "notes.txt"))
+    assert not unsupported['format_check']['accepted_format']
+    assert unsupported['slide_count_check'] is None
+
+    mislabeled = preflight_deck(str(tmp_path / "fake.pdf"))
+    assert mislabeled['format_check']['message'] == (
+        "File contents do not match the format.")
+
+    broken = preflight_deck(str(tmp_path / "broken.pptx"))
+    assert not broken['passed']
+    assert broken['slide_count_check'] is None
+    assert broken['message'] == "The slides could not be read from the file."
+
+    # Stored under another name: the uploaded name decides the format
+    renamed = preflight_deck(str(tmp_path / "upload.tmp"), "deck.pdf")
+    assert renamed['passed']
+
+    oversized = preflight_deck(str(tmp_path / "upload.tmp"), "deck.pdf",
+                               size_limit_mb=0.0001)
+    assert not oversized['size_check']['size_within_limit']
+    assert not oversized['passed']
+
+
+def test_large_pdf_is_read_from_its_headers(tmp_path, monkeypatch):
+    # Over the size limit too, with incompressible attachments
+    rng = random.Random(0)
+    doc = fitz.open()
+    for number in range(45):
+        doc.new_page()
+        doc.embfile_add(f"video{number}.bin", rng.randbytes(1536 * 1024))
+    doc.save(str(tmp_path / "deck.pdf"))
+
+    def not_read(*args, **kwargs):
+        raise AssertionError("Preflight read past the PDF's headers")
+
+    # No page is loaded or rendered and no attachment read
+    monkeypatch.setattr(fitz.Document, "load_page", not_read)
+    monkeypatch.setattr(fitz.Document, "embfile_get", not_read)
+    monkeypatch.setattr(preflight, "analyze_pdf_metadata", not_read)
+    result = preflight_deck(str(tmp_path / "deck.pdf"))
+
+    assert result['slide_count_check']['slide_count'] == 45
+    assert not result['size_check']['size_within_limit']
@@ -0,0 +1,143 @@
+# tests/test_probabilistic_checks.py
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.utils import probabilistic_checks
+from tests.stub_openai_server import StubOpenAIServer, DEFAULT_ANALYSIS
+
+
+@pytest.fixture
+def stub_env(monkeypatch):
+    def configure(stub):
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setenv("OPENAI_BASE_URL", stub.base_url)
+        monkeypatch.setattr(probabilistic_checks, "VISION_BACKOFF_BASE", 0.01)
+    return configure
+
+
+def run_analysis(slide_images, **kwargs):
+    async def run():
+        try:
+            return await probabilistic_checks.analyze_slide_images(
+                slide_images, **kwargs)
+        finally:
+            await probabilistic_checks.close_openai_client()
+    return asyncio.run(run())
+
+
+def test_slides_are_analyzed_concurrently(stub_env):
+    with StubOpenAIServer(delay=0.2) as stub:
+        stub_env(stub)
+        started = time.monotonic()
+        analyses = run_analysis([b"png"] * 8, concurrency=4)
+        elapsed = time.monotonic() - started
+
+    assert analyses == [DEFAULT_ANALYSIS] * 8
+    assert stub.max_in_flight == 4
+    # Two waves of four, not eight sequential requests
+    assert elapsed < 1.2
+
+
+def test_rate_limits_and_server_errors_are_retried(stub_env):
+    failures = [(429, {"Retry-After": "0"}), (503, {})]
+    with StubOpenAIServer(failures=failures) as stub:
+        stub_env(stub)
+        analyses = run_analysis([b"png"])
+
+    assert analyses == [DEFAULT_ANALYSIS]
+    assert len(stub.requests) == 3
+
+
+def test_slide_timeout_yields_empty_analysis(stub_env, monkeypatch):
+    monkeypatch.setattr(probabilistic_checks, "VISION_SLIDE_TIMEOUT", 0.1)
+    with StubOpenAIServer(delay=0.5) as stub:
+        stub_env(stub)
+        analyses = run_analysis([b"png"])
+
+    assert analyses == [{}]
+
+
+class BatchStubServer(StubOpenAIServer):
+    """
+    Answers batched requests with a JSON array keyed by slide number, or
+    with unparseable text when `malformed` is set. Slides in `incomplete`
+    are answered without their suggestions.
+    """
+
+    def __init__(self, malformed=False, incomplete=(), **kwargs):
+        super().__init__(**kwargs)
+        self.malformed = malformed
+        self.incomplete = incomplete
+
+    def respond(self, body):
+        payload = super().respond(body)
+        content = body["messages"][0]["content"]
+        labels = [part["text"] for part in content[1:]
+                  if part["type"] == "text"]
+        if labels:
+            message = payload["choices"][0]["message"]
+            if self.malformed:
+                message["content"] = "Sorry, I cannot help with that."
+            else:
+                items = [dict(DEFAULT_ANALYSIS,
+                              slide_number=int(label.split()[1].rstrip(":")))
+                         for label in labels]
+                for item in items:
+                    if item["slide_number"] in self.incomplete:
+                        del item["suggestions"]
+                message["content"] = json.dumps(items)
+        return payload
+
+
+def test_batched_requests_pack_several_slides(stub_env):
+    usage = probabilistic_checks.VisionUsage()
+    with BatchStubServer() as stub:
+        stub_env(stub)
+        analyses = run_analysis([b"png"] * 5, batch_size=2, usage=usage)
+
+    assert analyses == [DEFAULT_ANALYSIS] * 5
+    assert len(stub.requests) == 3
+    [report] = usage.report()
+    assert report["mode"] == "batched"
+    assert report["slides"] == 5
+    assert report["tokens_per_slide"] == 3 * 120 / 5
+
+
+def test_malformed_batch_falls_back_to_single_slides(stub_env):
+    usage = probabilistic_checks.VisionUsage()
+    with BatchStubServer(malformed=True) as stub:
+        stub_env(stub)
+        analyses = run_analysis([b"png"] * 3, batch_size=3, usage=usage)
+
+    # The stub answers single-slide requests with a plain object
+    assert analyses == [DEFAULT_ANALYSIS] * 3
+    assert len(stub.requests) == 4
+    modes = {report["mode"]: report for report in usage.report()}
+    assert modes["batched"]["requests"] == 1
+    assert modes["single"]["slides"] == 3
+
+
+def test_incomplete_batch_entries_are_retried(stub_env):
+    usage = probabilistic_checks.VisionUsage()
+    with BatchStubServer(incomplete=(2,)) as stub:
+        stub_env(stub)
+        analyses = run_analysis([b"png"] * 3, batch_size=3, usage=usage)
+
+    assert analyses == [DEFAULT_ANALYSIS] * 3
+    assert len(stub.requests) == 2
+    modes = {report["mode"]: report for report in usage.report()}
+    assert modes["single"]["slides"] == 1
+
+
+def test_non_object_answer_is_an_empty_analysis(stub_env):
+    usage = probabilistic_checks.VisionUsage()
+    with StubOpenAIServer(analysis=["not", "an", "object"]) as stub:
+        stub_env(stub)
+        analyses = run_analysis([b"png"], usage=usage)
+
+    assert analyses == [{}]
+    assert usage.failures == 1
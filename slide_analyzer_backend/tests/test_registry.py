@@ -0,0 +1,227 @@
+# tests/test_registry.py
+
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+
+from app.services.job_queue import QUEUED, RUNNING, COMPLETED, FAILED
+from app.services.registry import Registry
+from tests.deck_fixtures import make_response
+
+
+def make_registry(tmp_path):
+    registry = Registry(str(tmp_path / "registry.db"))
+    registry.create_submission("job-1", "uploads/job-1.pdf",
+                               original_filename="slides.pdf",
+                               content_hash="abc", size_bytes=1024)
+    return registry
+
+
+def test_status_transitions_are_conditional(tmp_path):
+    registry = make_registry(tmp_path)
+
+    assert registry.get("job-1")["status"] == QUEUED
+    assert registry.start("job-1")
+    assert not registry.start("job-1")
+    assert registry.get("job-1")["status"] == RUNNING
+    assert registry.fail("job-1", "boom")
+    assert not registry.complete("job-1", make_response("job-1"))
+    assert registry.get("job-1")["status"] == FAILED
+    assert registry.get("job-1")["error"] == "boom"
+
+
+def test_only_one_worker_claims_a_submission(tmp_path):
+    make_registry(tmp_path)
+    claims = []
+
+    def claim():
+        # A registry per thread stands in for separate uvicorn workers
+        claims.append(Registry(str(tmp_path / "registry.db")).start("job-1"))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert claims.count(True) == 1
+
+
+def test_submissions_of_exited_workers_are_failed(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.create_submission("job-2", "uploads/job-2.pdf")
+    registry.start("job-2")
+    registry.create_submission("job-3", "uploads/job-3.pdf")
+    registry.create_submission("job-4", "uploads/job-4.pdf")
+    registry.start("job-4")
+    registry.complete("job-4", make_response("job-4"))
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    # job-3 is still being processed by a live sibling worker
+    connection = registry._connect()
+    connection.execute("UPDATE submissions SET worker_pid = ? "
+                       "WHERE processing_id = 'job-2'", (exited.pid,))
+    connection.execute("UPDATE submissions SET worker_pid = ? "
+                       "WHERE processing_id = 'job-3'", (os.getppid(),))
+
+    assert registry.fail_orphaned("restarted") == 2
+
+    statuses = {processing_id: registry.get(processing_id)["status"]
+                for processing_id in ("job-1", "job-2", "job-3", "job-4")}
+    assert statuses == {"job-1": FAILED, "job-2": FAILED, "job-3": QUEUED,
+                        "job-4": COMPLETED}
+    assert registry.get("job-1")["error"] == "restarted"
+    assert registry.admin_summary()["status_counts"] == {
+        QUEUED: 1, RUNNING: 0, COMPLETED: 1, FAILED: 2}
+    assert registry.fail_orphaned("restarted") == 0
+
+
+def test_complete_stores_result_and_check_outcomes(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.start("job-1")
+
+    assert registry.complete("job-1", make_response("job-1"))
+
+    submission = registry.get("job-1")
+    assert submission["status"] == COMPLETED
+    assert submission["slide_count"] == 2
+    assert registry.get_result("job-1").processing_id == "job-1"
+    assert registry.get_check_outcomes("job-1")["format_check"] == {
+        "passed": True, "message": "Format is acceptable."}
+    assert registry.latest(COMPLETED)["processing_id"] == "job-1"
+    assert [s["processing_id"]
+            for s in registry.find_by_content_hash("abc")] == ["job-1"]
+    assert registry.get("missing") is None
+
+
+def failing_response(processing_id):
+    response = make_response(processing_id)
+    response.probabilistic_checks.image_check.has_images = False
+    response.probabilistic_checks.title_slide_check.has_title_slide = False
+    return response
+
+
+def test_admin_summary_is_maintained_incrementally(tmp_path):
+    registry = Registry(str(tmp_path / "registry.db"))
+    for processing_id, email in [("a-1", "a@example.com"),
+                                 ("a-2", "a@example.com"),
+                                 ("b-1", "b@example.com"),
+                                 ("c-1", None)]:
+        registry.create_submission(processing_id, f"uploads/{processing_id}",
+                                   submitter_email=email)
+
+    # make_response fails only the image check
+    registry.complete("a-1", make_response("a-1"))
+    registry.complete("b-1", failing_response("b-1"))
+    registry.fail("c-1", "boom")
+
+    summary = registry.admin_summary(expected_decks=3)
+    assert summary["total_submissions"] == 4
+    assert summary["total_errors"] == 3
+    assert summary["check_failures"] == {"image_check": 2,
+                                         "title_slide_check": 1}
+    assert summary["decks_to_merge"] == 0
+    assert summary["decks_remaining"] == 3
+    assert summary["status_counts"] == {"queued": 1, "completed": 2,
+                                        "failed": 1}
+    assert [s["processing_id"]
+            for s in registry.failing_submissions("title_slide_check")] == [
+        "b-1"]
+
+    # A resubmission that passes makes the submitter's deck ready
+    passing = make_response("a-2")
+    passing.probabilistic_checks.image_check.has_images = True
+    registry.complete("a-2", passing)
+    summary = registry.admin_summary(expected_decks=3)
+    assert summary["decks_to_merge"] == 1
+    assert summary["decks_remaining"] == 2
+    assert summary["admin_submission_status"] == "in_progress"
+
+    # Rebuilding from the tables gives the same aggregates
+    counters = registry.admin_counters()
+    registry.rebuild_admin_counters()
+    assert {k: v for k, v in registry.admin_counters().items() if v} == {
+        k: v for k, v in counters.items() if v}
+
+
+def test_check_failures_follow_each_decks_latest_submission(tmp_path):
+    registry = Registry(str(tmp_path / "registry.db"))
+    for processing_id in ["a-1", "a-2", "a-3"]:
+        registry.create_submission(processing_id, f"uploads/{processing_id}",
+                                   submitter_email="a@example.com")
+
+    registry.complete("a-1", failing_response("a-1"))
+    assert registry.admin_summary()["check_failures"] == {
+        "image_check": 1, "title_slide_check": 1}
+    assert registry.admin_summary()["total_errors"] == 1
+
+    # Resubmitted and now failing only the image check
+    registry.complete("a-2", make_response("a-2"))
+    summary = registry.admin_summary()
+    assert summary["check_failures"] == {"image_check": 1}
+    assert summary["total_errors"] == 1
+    assert registry.failing_submissions("title_slide_check") == []
+    assert [s["processing_id"]
+            for s in registry.failing_submissions("image_check")] == ["a-2"]
+
+    # Resubmitted and now passing
+    passing = make_response("a-3")
+    passing.probabilistic_checks.image_check.has_images = True
+    registry.complete("a-3", passing)
+    summary = registry.admin_summary()
+    assert summary["check_failures"] == {}
+    assert summary["total_errors"] == 0
+    assert summary["decks_to_merge"] == 1
+    assert registry.failing_submissions("image_check") == []
+
+    counters = registry.admin_counters()
+    registry.rebuild_admin_counters()
+    assert {k: v for k, v in registry.admin_counters().items() if v} == {
+        k: v for k, v in counters.items() if v}
+
+
+# The submissions table as created before bulk ingestion added batch_id
+PRE_BATCH_SCHEMA = """
+CREATE TABLE submissions (
+    processing_id TEXT PRIMARY KEY,
+    file_path TEXT NOT NULL,
+    original_filename TEXT,
+    deck_format TEXT,
+    content_hash TEXT,
+    size_bytes INTEGER,
+    slide_count INTEGER,
+    status TEXT NOT NULL,
+    error TEXT,
+    submitter_name TEXT,
+    submitter_email TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+INSERT INTO submissions (processing_id, file_path, status, created_at,
+                         updated_at)
+VALUES ('old-1', 'uploads/old-1.pdf', 'completed', 1.0, 1.0);
+"""
+
+
+def test_registry_from_before_batches_is_migrated(tmp_path):
+    path = tmp_path / "registry.db"
+    connection = sqlite3.connect(str(path))
+    connection.executescript(PRE_BATCH_SCHEMA)
+    connection.close()
+
+    registry = Registry(str(path))
+    assert registry.get("old-1")["batch_id"] is None
+    registry.create_submission("new-1", "uploads/new-1.pdf",
+                               batch_id="batch-1")
+
+    assert [s["processing_id"]
+            for s in registry.batch_submissions("batch-1")] == ["new-1"]
+    indexes = [row["name"] for row in registry._connect().execute(
+        "PRAGMA index_list(submissions)")]
+    assert "submissions_batch" in indexes
+    registry.close()
+    # Opening the migrated file again changes nothing
+    assert Registry(str(path)).get("new-1")["batch_id"] == "batch-1"
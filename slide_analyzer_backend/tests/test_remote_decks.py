@@ -0,0 +1,193 @@
+# tests/test_remote_decks.py
+
+import asyncio
+import io
+import json
+import os
+import time
+
+import fitz
+import ijson
+import pytest
+
+from app.services import remote_decks, slide_processor
+from app.services.http_client import HttpFetcher
+from tests.stub_remote_server import StubRemoteServer
+
+GOOGLE_URL = "https://docs.google.com/presentation/d/abc123/edit"
+FIGMA_URL = "https://www.figma.com/design/KEY42/Conference-talk"
+
+
+@pytest.fixture
+def remote(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(slide_processor, "_slide_cache", None)
+    fetcher = HttpFetcher(cache_dir=str(tmp_path / "http"))
+    monkeypatch.setattr(remote_decks, "http_fetcher", fetcher)
+    monkeypatch.setattr(remote_decks, "REMOTE_DECK_CACHE_DIR",
+                        str(tmp_path / "remote_decks"))
+
+    def configure(stub):
+        monkeypatch.setattr(remote_decks, "GOOGLE_DISCOVERY_URL",
+                            stub.base_url + "/discovery/{api}/{version}")
+        monkeypatch.setattr(remote_decks, "GOOGLE_SLIDES_EXPORT_URL",
+                            stub.base_url
+                            + "/presentation/{presentation_id}/export/pdf")
+        monkeypatch.setattr(remote_decks, "FIGMA_API_URL", stub.base_url)
+        return fetcher
+    return configure
+
+
+def run(coroutine_function, fetcher):
+    async def main():
+        try:
+            return await coroutine_function()
+        finally:
+            await fetcher.close()
+    return asyncio.run(main())
+
+
+def test_google_slides_reuses_discovery_and_unchanged_export(remote):
+    with StubRemoteServer(slides=3) as stub:
+        fetcher = remote(stub)
+        first = run(lambda: remote_decks.fetch_remote_deck(
+            GOOGLE_URL, "google_slides"), fetcher)
+        second = run(lambda: remote_decks.fetch_remote_deck(
+            GOOGLE_URL, "google_slides"), fetcher)
+        stub.revision = "rev2"
+        third = run(lambda: remote_decks.fetch_remote_deck(
+            GOOGLE_URL, "google_slides"), fetcher)
+
+    assert first["analysis"]["number_of_slides"] == 3
+    assert first["analysis"]["fonts_used"] == ["Roboto"]
+    assert second["pdf_path"] == first["pdf_path"]
+    with fitz.open(third["pdf_path"]) as pdf:
+        assert pdf.page_count == 3
+
+    # Discovery is fetched once, metadata is revalidated every time and the
+    # export is downloaded again only for the new revision
+    assert len(stub.paths("/discovery/")) == 1
+    presentations = [headers for path, headers in stub.requests
+                     if path.startswith("/v1/presentations/")]
+    assert len(presentations) == 3
+    assert "If-None-Match" in presentations[1]
+    assert len(stub.paths("/presentation/")) == 2
+    assert fetcher.not_modified == 1
+
+
+def test_figma_frames_are_exported_once_per_version(remote):
+    with StubRemoteServer(slides=4) as stub:
+        fetcher = remote(stub)
+        first = run(lambda: remote_decks.fetch_remote_deck(
+            FIGMA_URL, "figma"), fetcher)
+        second = run(lambda: remote_decks.fetch_remote_deck(
+            FIGMA_URL, "figma"), fetcher)
+
+    assert first["analysis"]["number_of_slides"] == 4
+    assert first["analysis"]["fonts_used"] == ["Inter"]
+    with fitz.open(first["pdf_path"]) as pdf:
+        assert pdf.page_count == 4
+    assert second["pdf_path"] == first["pdf_path"]
+    assert len(stub.paths("/v1/images/")) == 1
+    assert len(stub.paths("/render/")) == 4
+
+
+def test_requests_per_host_are_bounded(remote, tmp_path):
+    fetcher = HttpFetcher(cache_dir=str(tmp_path / "http"), max_per_host=2)
+    with StubRemoteServer(delay=0.1) as stub:
+        run(lambda: asyncio.gather(*(
+            fetcher.fetch(f"{stub.base_url}/render/{n}") for n in range(6))),
+            fetcher)
+
+    assert len(stub.requests) == 6
+    assert stub.max_in_flight == 2
+
+
+def test_http_cache_evicts_least_recently_used_bodies(remote, tmp_path):
+    fetcher = HttpFetcher(cache_dir=str(tmp_path / "http"))
+    with StubRemoteServer() as stub:
+        def fetch(frame):
+            return run(lambda: fetcher.fetch(
+                f"{stub.base_url}/render/{frame}", max_age=60), fetcher)
+
+        first = fetch(1)
+        fetcher.max_size_bytes = os.path.getsize(first["path"]) * 1.5
+        old = time.time() - 60
+        os.utime(first["path"], (old, old))
+        second = fetch(2)
+        os.utime(second["path"], (old + 1, old + 1))
+        assert fetch(1)["from_cache"]
+        third = fetch(3)
+
+    assert os.path.exists(first["path"]) and os.path.exists(third["path"])
+    assert not os.path.exists(second["path"])
+    assert len(os.listdir(tmp_path / "http")) == 4
+    assert fetcher.stats()["evictions"] == 1
+
+
+def test_figma_decks_of_old_versions_expire(remote, monkeypatch):
+    monkeypatch.setattr(remote_decks, "REMOTE_DECK_CACHE_MAX_AGE_DAYS", 0)
+    with StubRemoteServer(slides=2) as stub:
+        fetcher = remote(stub)
+        first = run(lambda: remote_decks.fetch_remote_deck(
+            FIGMA_URL, "figma"), fetcher)
+        stub.revision = "rev2"
+        second = run(lambda: remote_decks.fetch_remote_deck(
+            FIGMA_URL, "figma"), fetcher)
+
+    assert not os.path.exists(first["pdf_path"])
+    assert os.listdir(remote_decks.REMOTE_DECK_CACHE_DIR) == [
+        os.path.basename(second["pdf_path"])]
+
+
+def test_process_google_slides_url(remote, vision_calls):
+    with StubRemoteServer(slides=2) as stub:
+        remote(stub)
+        result = asyncio.run(slide_processor.process_slide_deck(
+            GOOGLE_URL, "job-1", "url"))
+
+    assert result.file_analysis.number_of_slides == 2
+    assert result.file_analysis.fonts_used == ["Roboto"]
+    assert len(result.probabilistic_checks.slide_analyses) == 2
+
+
+def summarize_json(document):
+    return remote_decks.summarize_figma_events(
+        ijson.basic_parse(io.BytesIO(json.dumps(document).encode())))
+
+
+def test_figma_summary_does_not_depend_on_key_order():
+    play = {"type": "UPDATE_MEDIA_RUNTIME", "mediaAction": "TOGGLE_PLAY_PAUSE"}
+    frame = {
+        "children": [{"style": {"fontFamily": "Inter"}, "type": "TEXT"}],
+        "interactions": [{"actions": [play, {"type": "NODE"}]}],
+        "styleOverrideTable": {"1": {"fontFamily": "Ignored"}},
+        "id": "1:1",
+        "type": "FRAME",
+    }
+    summary = summarize_json({"document": {"children": [
+        # Children before type, and a second page that is not the slides
+        {"children": [frame, {"id": "1:2", "type": "FRAME"}],
+         "type": "CANVAS"},
+        {"type": "CANVAS", "children": [{"id": "2:1", "type": "FRAME"}]},
+    ], "type": "DOCUMENT"}, "version": "42"})
+
+    assert summary["slide_ids"] == ["1:1", "1:2"]
+    assert summary["fonts_used"] == ["Inter"]
+    assert summary["video_media_count"] == 1
+    assert summary["version"] == "42"
+
+
+def test_figma_summary_handles_deep_trees():
+    depth = 20000
+    text = ('{"document": {"type": "DOCUMENT", "children": ['
+            '{"type": "CANVAS", "children": [{"id": "1:1", "type": "FRAME"}, '
+            + '{"id": "1:2", "type": "GROUP", "children": [' * depth
+            + '{"type": "TEXT", "style": {"fontFamily": "Deep"}}'
+            + ']}' * depth + ']}]}}')
+
+    summary = remote_decks.summarize_figma_events(
+        ijson.basic_parse(io.BytesIO(text.encode())))
+
+    assert summary["number_of_slides"] == 2
+    assert summary["fonts_used"] == ["Deep"]
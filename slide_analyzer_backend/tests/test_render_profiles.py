@@ -0,0 +1,73 @@
+# tests/test_render_profiles.py
+
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+from PIL import Image
+
+from app.services.render_pool import render_pdf
+from app.utils.file_analyzers import iter_pdf_pages
+from app.utils.render_profiles import RenderProfile, render_page_profiles
+from tests.deck_fixtures import make_pdf
+
+
+def make_page():
+    doc = fitz.open()
+    page = doc.new_page(width=960, height=540)
+    for row in range(12):
+        page.insert_text((40, 40 + 40 * row), "Quarterly results " * 6,
+                         fontsize=18)
+    page.draw_rect(fitz.Rect(600, 300, 900, 500), fill=(0.8, 0.3, 0.1))
+    return doc, page
+
+
+def test_one_rasterization_feeds_every_profile():
+    profiles = {
+        "model": RenderProfile("model", format="JPEG", max_edge=1024,
+                               quality=80),
+        "thumbnail": RenderProfile("thumbnail", format="WEBP", max_edge=320,
+                                   quality=70),
+        "preview": RenderProfile("preview", format="PNG", dpi=150),
+    }
+    doc, page = make_page()
+
+    renditions = render_page_profiles(page, profiles)
+
+    sizes = {name: Image.open(io.BytesIO(data)).size
+             for name, data in renditions.items()}
+    assert sizes == {"model": (1024, 576), "thumbnail": (320, 180),
+                     "preview": (2000, 1125)}
+    assert len(renditions["model"]) < len(renditions["preview"])
+    assert len(renditions["thumbnail"]) < len(renditions["model"])
+
+
+def test_byte_budget_is_honoured():
+    budget = 8 * 1024
+    profiles = {"model": RenderProfile("model", format="JPEG", max_edge=1600,
+                                       quality=95, max_bytes=budget)}
+    doc, page = make_page()
+
+    renditions = render_page_profiles(page, profiles)
+
+    assert len(renditions["model"]) <= budget
+
+
+def test_render_pool_matches_serial_rendering(tmp_path):
+    pdf_path = str(tmp_path / "deck.pdf")
+    make_pdf(pdf_path, pages=5)
+    profiles = {"thumbnail": RenderProfile("thumbnail", format="PNG",
+                                           max_edge=200)}
+
+    with ProcessPoolExecutor(
+            max_workers=2,
+            mp_context=multiprocessing.get_context("spawn")) as executor:
+        pooled = asyncio.run(render_pdf(pdf_path, profiles, executor,
+                                        pages_per_task=2))
+    serial = list(iter_pdf_pages(pdf_path, profiles))
+
+    assert [page['page_number'] for page in pooled] == [1, 2, 3, 4, 5]
+    assert [page['images'] for page in pooled] == [
+        page['images'] for page in serial]
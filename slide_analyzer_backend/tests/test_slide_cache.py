@@ -0,0 +1,71 @@
+# tests/test_slide_cache.py
+
+import io
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services.slide_cache import SlideHashCache
+from app.utils.image_hashing import dhash, phash
+
+FONT = ImageFont.load_default(size=40)
+
+
+def render_slide(bullets=3, title="Highlights", noise=0):
+    """
+    A slide of one conference template: the same header bar and footer,
+    with `bullets` lines of text.
+    """
+    image = Image.new("RGB", (1280, 720), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, 1280, 120], fill=(20, 60, 140))
+    draw.text((40, 30), title, fill="white", font=FONT)
+    for line in range(bullets):
+        draw.text((100, 180 + 80 * line),
+                  f"- Point number {line + 1} of the agenda", fill="black",
+                  font=FONT)
+    draw.text((40, 680), "Conference 2024", fill="gray")
+    if noise:
+        draw.point([(x, 600) for x in range(0, 1280, 7)], fill=(noise,) * 3)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def distance(hash_function, first, second):
+    return bin(hash_function(first) ^ hash_function(second)).count("1")
+
+
+def test_template_slides_differing_in_text_are_not_shared():
+    three, five = render_slide(bullets=3), render_slide(bullets=5)
+    # Close enough for dHash to call them near-identical
+    assert distance(dhash, three, five) <= 4
+    assert distance(phash, three, five) > 2
+
+    analysis = {"is_title_slide": False, "bullet_points": 3}
+    for options in [{}, {"algorithm": "phash", "threshold": 2}]:
+        cache = SlideHashCache("fingerprint", path=None, **options)
+        cache.add(cache.hash_image(three), analysis)
+        assert cache.lookup(cache.hash_image(five)) is None
+        assert cache.lookup(cache.hash_image(three)) == analysis
+
+
+def test_cache_reuses_analysis_within_threshold(tmp_path):
+    path = tmp_path / "slides.jsonl"
+    cache = SlideHashCache("fingerprint", path=str(path), algorithm="phash",
+                           threshold=2)
+    analysis = {"is_title_slide": True, "bullet_points": 0}
+    template_hash = cache.hash_image(render_slide(0, "Thank you"))
+
+    assert cache.lookup(template_hash) is None
+    cache.add(template_hash, analysis)
+
+    variant_hash = cache.hash_image(render_slide(0, "Thank you", noise=200))
+    assert cache.lookup(variant_hash) == analysis
+    assert cache.lookup(template_hash ^ 0xFF) is None
+
+    reloaded = SlideHashCache("fingerprint", path=str(path),
+                              algorithm="phash")
+    assert reloaded.lookup(template_hash) == analysis
+    assert len(SlideHashCache("other", path=str(path),
+                              algorithm="phash")) == 0
+    assert len(SlideHashCache("fingerprint", path=str(path))) == 0
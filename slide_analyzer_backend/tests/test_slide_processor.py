@@ -0,0 +1,115 @@
+# tests/test_slide_processor.py
+
+import asyncio
+
+from app.services import slide_processor
+from app.utils.file_analyzers import iter_pdf_pages
+from tests.deck_fixtures import ANALYSIS, make_pdf, make_pptx
+
+
+def test_iter_pdf_pages_yields_fonts_and_images(tmp_path):
+    pdf_path = tmp_path / "deck.pdf"
+    make_pdf(pdf_path)
+
+    pages = list(iter_pdf_pages(str(pdf_path)))
+
+    assert [page['page_number'] for page in pages] == [1, 2, 3]
+    assert all(page['images']['model'].startswith(b"\xff\xd8")
+               for page in pages)
+    assert "Helvetica" in pages[0]['fonts']
+
+
+def test_process_pdf_fills_file_analysis(workdir, vision_calls):
+    make_pdf(workdir / "deck.pdf")
+
+    result = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-1", "pdf"))
+
+    assert result.file_analysis.number_of_slides == 3
+    assert "Helvetica" in result.file_analysis.fonts_used
+    assert len(result.probabilistic_checks.slide_analyses) == 3
+    assert (workdir / "uploads" / "job-1" / "slide_3.webp").exists()
+
+
+def test_resubmission_is_served_from_cache(workdir, vision_calls):
+    make_pdf(workdir / "deck.pdf")
+
+    first = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-1", "pdf"))
+    calls_after_first = len(vision_calls)
+    second = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-2", "pdf"))
+
+    assert len(vision_calls) == calls_after_first
+    assert second.processing_id == "job-2"
+    assert second.probabilistic_checks == first.probabilistic_checks
+    assert (workdir / "uploads" / "job-2" / "slide_1.webp").exists()
+
+
+def test_vision_failure_is_not_cached(workdir, monkeypatch):
+    make_pdf(workdir / "deck.pdf")
+    calls = []
+
+    async def failing_analyze_slide_images(slide_images, slide_numbers=None,
+                                           usage=None, **kwargs):
+        calls.extend(slide_numbers)
+        usage.record_failure(len(slide_images))
+        return [{} for _ in slide_images]
+
+    monkeypatch.setattr(slide_processor, "analyze_slide_images",
+                        failing_analyze_slide_images)
+    degraded = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-1", "pdf"))
+    failed = list(calls)
+    assert failed
+    assert len(degraded.probabilistic_checks.slide_analyses) < 3
+
+    async def analyze_slide_images(slide_images, slide_numbers=None,
+                                   **kwargs):
+        calls.extend(slide_numbers)
+        return [dict(ANALYSIS) for _ in slide_images]
+
+    monkeypatch.setattr(slide_processor, "analyze_slide_images",
+                        analyze_slide_images)
+    second = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-2", "pdf"))
+
+    assert calls == failed + failed
+    assert len(second.probabilistic_checks.slide_analyses) == 3
+
+
+def test_prompt_check_ignores_answers_that_are_not_objects():
+    check = {"scope": "every_slide"}
+    answers = [["passed"], "true", {"passed": True, "reason": "Clear."}]
+
+    result = slide_processor.prompt_check_result(check, answers)
+
+    assert result == {"passed": True, "message": "Met on every slide."}
+
+
+def test_hidden_pptx_slides_are_not_listed(workdir, vision_calls,
+                                           monkeypatch):
+    make_pptx(workdir / "deck.pptx", slides=3, hidden=(2,))
+
+    async def fake_convert_pptx_to_pdf(pptx_path, content_hash):
+        # LibreOffice exports the visible slides only
+        make_pdf(workdir / "deck-export.pdf", pages=2)
+        return str(workdir / "deck-export.pdf")
+
+    monkeypatch.setattr(slide_processor, "convert_pptx_to_pdf",
+                        fake_convert_pptx_to_pdf)
+    first = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pptx", "job-1", "pptx"))
+
+    assert first.file_analysis.number_of_slides == 3
+    assert first.rendered_slides == 2
+    assert slide_processor.rendered_slide_count(first) == 2
+    assert len(first.probabilistic_checks.slide_analyses) == 2
+
+    # The resubmission is served from the cache, images included
+    calls_after_first = len(vision_calls)
+    second = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pptx", "job-2", "pptx"))
+    assert len(vision_calls) == calls_after_first
+    assert slide_processor.rendered_slide_count(second) == 2
+    assert (workdir / "uploads" / "job-2" / "slide_2.webp").exists()
@@ -0,0 +1,95 @@
+# tests/test_structural_classifier.py
+
+import asyncio
+import io
+
+import fitz
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from app.services import slide_processor
+from app.utils.structural_classifier import (classify_pdf_page,
+                                             classify_pptx,
+                                             STRUCTURAL_CONFIDENCE_THRESHOLD)
+
+
+def png_bytes(size=(64, 48)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_text_pdf(path):
+    doc = fitz.open()
+    title = doc.new_page(width=960, height=540)
+    title.insert_text((72, 200), "Quarterly Review", fontsize=48)
+    title.insert_text((72, 260), "Finance team", fontsize=24)
+
+    bullets = doc.new_page(width=960, height=540)
+    bullets.insert_text((72, 80), "Highlights", fontsize=36)
+    for row, text in enumerate(["Revenue up", "Costs down", "Hiring"]):
+        bullets.insert_text((90, 160 + 40 * row), f"- {text}", fontsize=20)
+    bullets.insert_image(fitz.Rect(600, 150, 760, 270), stream=png_bytes())
+
+    scanned = doc.new_page(width=960, height=540)
+    scanned.insert_image(scanned.rect, stream=png_bytes((320, 180)))
+    doc.save(str(path))
+    doc.close()
+
+
+def test_classify_pdf_pages(tmp_path):
+    make_text_pdf(tmp_path / "deck.pdf")
+
+    with fitz.open(str(tmp_path / "deck.pdf")) as doc:
+        title, bullets, scanned = [classify_pdf_page(page) for page in doc]
+
+    assert title['is_title_slide'] is True
+    assert title['confidence'] >= STRUCTURAL_CONFIDENCE_THRESHOLD
+    assert bullets['is_title_slide'] is False
+    assert bullets['bullet_points'] == 3
+    assert bullets['images'] == 1
+    assert bullets['confidence'] >= STRUCTURAL_CONFIDENCE_THRESHOLD
+    # Text baked into a full-page image is invisible to the text layer
+    assert scanned['confidence'] < STRUCTURAL_CONFIDENCE_THRESHOLD
+
+
+def test_classify_pptx_skips_hidden_slides(tmp_path):
+    prs = Presentation()
+    title = prs.slides.add_slide(prs.slide_layouts[0])
+    title.shapes.title.text = "Quarterly Review"
+    title.placeholders[1].text = "Finance team"
+
+    hidden = prs.slides.add_slide(prs.slide_layouts[1])
+    hidden._element.set("show", "0")
+
+    content = prs.slides.add_slide(prs.slide_layouts[1])
+    content.shapes.title.text = "Highlights"
+    content.placeholders[1].text_frame.text = "Revenue up"
+    for text in ["Costs down", "Hiring"]:
+        content.placeholders[1].text_frame.add_paragraph().text = text
+    content.shapes.add_picture(io.BytesIO(png_bytes()), Inches(6), Inches(2))
+    prs.save(str(tmp_path / "deck.pptx"))
+
+    structures = classify_pptx(str(tmp_path / "deck.pptx"))
+
+    assert [s['slide_number'] for s in structures] == [1, 2]
+    assert structures[0]['is_title_slide'] is True
+    assert structures[1]['is_title_slide'] is False
+    assert structures[1]['bullet_points'] == 3
+    assert structures[1]['images'] == 1
+    assert all(s['confidence'] >= STRUCTURAL_CONFIDENCE_THRESHOLD
+               for s in structures)
+
+
+def test_only_ambiguous_slides_reach_the_vision_model(workdir, vision_calls):
+    make_text_pdf(workdir / "deck.pdf")
+
+    result = asyncio.run(slide_processor.process_slide_deck(
+        "deck.pdf", "job-1", "pdf"))
+
+    assert vision_calls == [3]
+    assert result.slide_cache.structural == 2
+    analyses = result.probabilistic_checks.slide_analyses
+    assert analyses[1].analysis['bullet_points'] == 3
+    assert result.probabilistic_checks.image_check.image_count == 1
@@ -0,0 +1,46 @@
+# tests/test_thumbnail_store.py
+
+import os
+
+from app.services.thumbnail_store import ThumbnailCache, etag_matches
+
+
+def test_thumbnail_cache_evicts_least_recently_used(tmp_path):
+    cache = ThumbnailCache(max_size_mb=2.5 / 1024)  # 2.5 KB
+    paths = []
+    for name in "abc":
+        path = tmp_path / f"{name}.webp"
+        path.write_bytes(name.encode() * 1024)
+        paths.append(str(path))
+
+    first = cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])
+    cache.get(paths[2])
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.get(paths[0]) == first
+    assert cache.get(str(tmp_path / "missing.webp")) is None
+
+
+def test_thumbnail_cache_rereads_replaced_files(tmp_path):
+    cache = ThumbnailCache()
+    path = tmp_path / "slide_1.webp"
+    path.write_bytes(b"old")
+    _, old_digest = cache.get(str(path))
+
+    path.write_bytes(b"newer")
+    os.utime(path, ns=(0, 0))
+
+    data, digest = cache.get(str(path))
+    assert data == b"newer"
+    assert digest != old_digest
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+    assert not etag_matches(None, '"abc"')
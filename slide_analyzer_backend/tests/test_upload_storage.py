@@ -0,0 +1,55 @@
+# tests/test_upload_storage.py
+
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.services.upload_storage import save_upload_stream, UploadRejected
+
+
+def make_upload(data, filename):
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+def test_streams_upload_and_hashes_contents(tmp_path):
+    data = b"%PDF-1.7\n" + b"x" * (3 * 1024 * 1024)
+    destination = tmp_path / "deck.pdf"
+
+    result = asyncio.run(
+        save_upload_stream(make_upload(data, "deck.pdf"), str(destination),
+                           chunk_size=64 * 1024))
+
+    assert destination.read_bytes() == data
+    assert result['sha256'] == hashlib.sha256(data).hexdigest()
+    assert result['size_bytes'] == len(data)
+    assert os.listdir(tmp_path) == ["deck.pdf"]
+
+
+def test_rejects_oversized_upload_mid_stream(tmp_path):
+    data = b"%PDF-1.7\n" + b"x" * (2 * 1024 * 1024)
+    destination = tmp_path / "deck.pdf"
+
+    with pytest.raises(UploadRejected) as excinfo:
+        asyncio.run(
+            save_upload_stream(make_upload(data, "deck.pdf"),
+                               str(destination), size_limit_mb=1,
+                               chunk_size=64 * 1024))
+
+    assert excinfo.value.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+def test_rejects_mismatched_magic_bytes(tmp_path):
+    destination = tmp_path / "deck.pptx"
+
+    with pytest.raises(UploadRejected) as excinfo:
+        asyncio.run(
+            save_upload_stream(make_upload(b"%PDF-1.7\n" * 200, "deck.pptx"),
+                               str(destination)))
+
+    assert excinfo.value.status_code == 415
+    assert not destination.exists()
@@ -6,7 +6,7 @@ import React, { useState } from "react";
 import SlidePreview from "./SlidePreview";
 import SlideAnalysis from "./SlideAnalysis";
 import ProgressBar from "./ProgressBar";
-import { AnalysisResult } from "../../../shared/types";
+import { AnalysisResult, PreflightResult } from "../../../shared/types";
 import axios from "axios";
 
 const UploadForm: React.FC = () => {
@@ -18,11 +18,54 @@ const UploadForm: React.FC = () => {
   );
   const [isLoading, setIsLoading] = useState<boolean>(false);
   const [selectedSlide, setSelectedSlide] = useState<number>(1);
+  const [preflight, setPreflight] = useState<PreflightResult | null>(null);
 
-  const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
-    setFile(e.target.files?.[0] || null);
+  const handleFileChange = async (e: React.ChangeEvent<HTMLInputElement>) => {
+    const selected = e.target.files?.[0] || null;
+    setFile(selected);
+    setPreflight(null);
+    if (!selected) return;
+
+    // Format, size and slide count verdicts before anything is queued
+    const formData = new FormData();
+    formData.append('file', selected);
+    try {
+      const apiUrl = process.env.NEXT_PUBLIC_API_URL;
+      const response = await axios.post(`${apiUrl}/api/preflight`, formData, {
+        headers: {
+          'Content-Type': 'multipart/form-data',
+        },
+      });
+      setPreflight(response.data);
+    } catch (error) {
+      console.error('Preflight failed', error);
+    }
   };
 
+  const preflightChecks: { passed: boolean; message: string }[] = [];
+  if (preflight) {
+    const { format_check, size_check, slide_count_check } = preflight;
+    preflightChecks.push({
+      passed: format_check.accepted_format,
+      message: format_check.message,
+    });
+    if (size_check) {
+      preflightChecks.push({
+        passed: size_check.size_within_limit,
+        message: size_check.message,
+      });
+    }
+    if (slide_count_check) {
+      preflightChecks.push({
+        passed: slide_count_check.slide_count_within_limit,
+        message: `${slide_count_check.message} (${slide_count_check.slide_count} slides)`,
+      });
+    }
+    if (preflight.message) {
+      preflightChecks.push({ passed: false, message: preflight.message });
+    }
+  }
+
   const handleDeckFormatChange = (e: React.ChangeEvent<HTMLSelectElement>) => {
     setDeckFormat(e.target.value);
   };
@@ -39,13 +82,49 @@ const UploadForm: React.FC = () => {
     setMessage("");
 
     try {
-      const response = await axios.post(`${process.env.NEXT_PUBLIC_API_URL}/api/process-slide-deck`, formData, {
+      const apiUrl = process.env.NEXT_PUBLIC_API_URL;
+      const response = await axios.post(`${apiUrl}/api/process-slide-deck`, formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
       });
-      console.log(response.data);
-      setAnalysisResult(response.data);
+      const processingId: string = response.data.processing_id;
+      setMessage("Upload complete, analyzing slides...");
+
+      // Follow the background job until it finishes, then fetch the result
+      await new Promise<void>((resolve, reject) => {
+        const events = new EventSource(`${apiUrl}/api/jobs/${processingId}/events`);
+        let totalSlides = 0;
+        let slidesDone = 0;
+        events.addEventListener("file_analysis", (e) => {
+          const fileAnalysis = JSON.parse((e as MessageEvent).data);
+          // Hidden slides are counted but never analyzed
+          totalSlides = fileAnalysis.rendered_slides ?? fileAnalysis.number_of_slides;
+        });
+        events.addEventListener("slide_analysis", () => {
+          slidesDone += 1;
+          setMessage(`Analyzed ${slidesDone} of ${totalSlides} slides...`);
+        });
+        events.addEventListener("status", (e) => {
+          const status = JSON.parse((e as MessageEvent).data).status;
+          if (status === "failed") {
+            events.close();
+            reject(new Error("Processing failed"));
+          }
+        });
+        events.addEventListener("done", () => {
+          events.close();
+          resolve();
+        });
+        events.onerror = () => {
+          events.close();
+          reject(new Error("Lost connection to the progress stream"));
+        };
+      });
+
+      const result = await axios.get(`${apiUrl}/api/jobs/${processingId}/result`);
+      console.log(result.data);
+      setAnalysisResult(result.data);
       setMessage("Analysis completed successfully!");
     } catch (error) {
       console.error('There was an error uploading the file!', error);
@@ -74,6 +153,7 @@ const UploadForm: React.FC = () => {
           >
             <option value="pdf">PDF</option>
             <option value="pptx">PPTX</option>
+            <option value="key">Keynote</option>
             <option value="markdown">Markdown</option>
           </select>
         </div>
@@ -94,10 +174,21 @@ const UploadForm: React.FC = () => {
           />
         </div>
 
+        {/* Preflight Verdicts */}
+        {preflight && (
+          <ul className="text-sm space-y-1">
+            {preflightChecks.map((check) => (
+              <li key={check.message}>
+                {check.passed ? "✅" : "❌"} {check.message}
+              </li>
+            ))}
+          </ul>
+        )}
+
         {/* Submit Button */}
         <button
           type="submit"
-          disabled={isLoading}
+          disabled={isLoading || preflight?.passed === false}
           className={`w-full py-2 px-4 rounded-md text-white bg-blue-600 hover:bg-blue-700 focus:outline-none ${isLoading ? "opacity-50 cursor-not-allowed" : ""
             }`}
         >